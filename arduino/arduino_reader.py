@@ -0,0 +1,600 @@
+import asyncio
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from arduino.dedup import TapDeduplicator
+from arduino.serial_config import SerialConfig, load_serial_config
+from utils.metrics import REGISTRY, SIZE_BOUNDS, HdrHistogram, family, sample
+
+# -----------------------------
+# Frame reader
+# -----------------------------
+# Bytes read from the port go into one persistent buffer; complete lines are
+# split off and a partial line waits for the next read, so nothing that was
+# already received is ever thrown away.
+#
+# Two frame formats are accepted on the same link:
+#   name,number,status\n                 plain (original firmware)
+#   @<seq>|name,number,status*<XX>\n     checked: seq is a decimal counter
+#                                        (0-65535, wraps) and XX the hex XOR
+#                                        of every byte between '@' and '*'
+# Checked frames let the host count frames lost on the wire (sequence gaps)
+# and reject corrupted ones (checksum mismatch).
+
+SEQ_MODULO = 65536
+MAX_FRAME_BYTES = 512
+
+
+def frame_checksum(data: bytes) -> int:
+    """XOR of all bytes (the checksum used by checked frames)."""
+    cs = 0
+    for b in data:
+        cs ^= b
+    return cs
+
+
+def encode_frame(payload: bytes, seq: Optional[int] = None) -> bytes:
+    """Build a wire frame; with seq it is a checked frame."""
+    if seq is None:
+        return payload + b"\n"
+    body = b"%d|%s" % (seq % SEQ_MODULO, payload)
+    return b"@%s*%02X\n" % (body, frame_checksum(body))
+
+
+# -----------------------------
+# Acknowledgements (host -> reader)
+# -----------------------------
+# Once a scan is durably stored the host answers on the same port so the
+# reader can drive its LED/buzzer:
+#   ACK|<student id>|<Present|Late|TimeOut|Repeat>
+#   NAK|<student id or ->|<rejected|store_failed>
+# Repeat = tap ignored by the duplicate-tap window. Replies use the same
+# framing as the reader: checked frames (with the host's own sequence
+# counter) when the reader sends checked frames, plain lines otherwise.
+
+ACK_STATUSES = ("Present", "Late", "TimeOut", "Repeat")
+
+
+def encode_ack(student_id: str, status: str) -> bytes:
+    return b"ACK|%s|%s" % (student_id.encode(), (status or "Stored").encode())
+
+
+def encode_nak(student_id: str, reason: str) -> bytes:
+    return b"NAK|%s|%s" % ((student_id or "-").encode(), reason.encode())
+
+
+class FrameReader:
+    """Splits a byte stream into frame payloads and keeps loss/corruption counters."""
+
+    def __init__(self, max_frame: int = MAX_FRAME_BYTES):
+        self.max_frame = max_frame
+        self._buf = bytearray()
+        self._expected_seq: Optional[int] = None
+        self.frames = 0
+        self.bad_checksum = 0
+        self.dropped = 0  # frames missing according to sequence gaps
+        self.resets = 0  # sequence jumped backwards (reader restarted)
+        self.overflows = 0  # over-long garbage discarded
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """Add received bytes; return the payloads of every complete frame."""
+        buf = self._buf
+        buf += data
+        out: List[bytes] = []
+        start = 0
+        while True:
+            nl = buf.find(b"\n", start)
+            if nl < 0:
+                break
+            frame = bytes(buf[start:nl]).rstrip(b"\r")
+            start = nl + 1
+            if frame:
+                payload = self._check(frame)
+                if payload is not None:
+                    out.append(payload)
+        if start:
+            del buf[:start]
+        if len(buf) > self.max_frame:
+            # no newline in sight: line noise, drop it rather than grow forever
+            self.overflows += 1
+            buf.clear()
+        return out
+
+    def pending(self) -> int:
+        """Bytes of a partial frame waiting for its newline."""
+        return len(self._buf)
+
+    def reset(self) -> None:
+        """Forget the partial frame and sequence position (the reader reconnected); counters stay."""
+        self._buf.clear()
+        self._expected_seq = None
+
+    @property
+    def checked(self) -> bool:
+        """True once the peer has sent a checked frame."""
+        return self._expected_seq is not None
+
+    def _check(self, frame: bytes) -> Optional[bytes]:
+        if frame[:1] != b"@":
+            self.frames += 1
+            return frame
+        star = frame.rfind(b"*")
+        bar = frame.find(b"|")
+        try:
+            if star < 0 or bar < 0 or bar > star:
+                raise ValueError
+            body = frame[1:star]
+            if int(frame[star + 1:], 16) != frame_checksum(body):
+                raise ValueError
+            seq = int(frame[1:bar])
+        except ValueError:
+            self.bad_checksum += 1
+            return None
+        self._track_seq(seq)
+        self.frames += 1
+        return frame[bar + 1:star]
+
+    def _track_seq(self, seq: int) -> None:
+        if self._expected_seq is not None and seq != self._expected_seq:
+            gap = (seq - self._expected_seq) % SEQ_MODULO
+            if gap < SEQ_MODULO // 2:
+                self.dropped += gap
+            else:
+                self.resets += 1
+        self._expected_seq = (seq + 1) % SEQ_MODULO
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "frames": self.frames,
+            "bad_checksum": self.bad_checksum,
+            "dropped": self.dropped,
+            "resets": self.resets,
+            "overflows": self.overflows,
+        }
+
+
+# -----------------------------
+# Reader ports
+# -----------------------------
+READ_CHUNK_BYTES = 4096
+
+
+def reader_id_for(port_name: str) -> str:
+    """Short reader ID for a device path ('/dev/ttyACM0' -> 'ttyACM0')."""
+    return os.path.basename(str(port_name).rstrip("/\\")) or str(port_name)
+
+
+class PortReader:
+    """One open serial port: its frame buffer and per-reader counters."""
+
+    def __init__(self, reader_id: str, ser):
+        self.reader_id = reader_id
+        self.ser = ser
+        self.frames = FrameReader()
+        self.scans = 0
+        self.bad_lines = 0
+        self.suppressed = 0
+        self.bytes_read = 0
+        self.acks = 0
+        self.naks = 0
+        self.ack_errors = 0
+        self._ack_seq = 0
+        self.opened_at = time.monotonic()
+        self.error: Optional[str] = None
+
+    def reattach(self, ser) -> None:
+        """Continue on a reopened port; counters accumulate across reconnects."""
+        self.ser = ser
+        self.frames.reset()
+        self._ack_seq = 0
+        self.opened_at = time.monotonic()
+        self.error = None
+
+    def fileno(self) -> Optional[int]:
+        """Descriptor to watch with the event loop, or None when reads must block on a thread."""
+        if os.name != "posix":
+            return None
+        try:
+            fd = self.ser.fileno()
+        except Exception:
+            return None
+        return fd if isinstance(fd, int) and fd >= 0 else None
+
+    def reply(self, payload: bytes) -> bool:
+        """Write an ACK/NAK frame to the reader; False (and counted) when the write fails."""
+        seq = None
+        if self.frames.checked:
+            seq = self._ack_seq
+            self._ack_seq = (self._ack_seq + 1) % SEQ_MODULO
+        try:
+            self.ser.write(encode_frame(payload, seq))
+            return True
+        except Exception:
+            self.ack_errors += 1
+            return False
+
+    def read_chunk(self) -> bytes:
+        # everything already buffered by the driver, or block (up to the port timeout) for one byte
+        return self.ser.read(getattr(self.ser, "in_waiting", 0) or 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scans": self.scans,
+            "bad_lines": self.bad_lines,
+            "suppressed": self.suppressed,
+            "acks": self.acks,
+            "naks": self.naks,
+            "ack_errors": self.ack_errors,
+            "bytes": self.bytes_read,
+            "uptime": round(time.monotonic() - self.opened_at, 1),
+            "error": self.error,
+            **self.frames.stats(),
+        }
+
+
+# -----------------------------
+# Asyncio ingestion pipeline
+# -----------------------------
+#   one reader task per port -- waits for its port to become readable, splits
+#        |                      the bytes into frames (a FrameReader per port)
+#        |                      and turns them into scans tagged with the port's
+#        |                      reader ID
+#   TapDeduplicator -- drops repeat taps of the same card (arduino/dedup.py)
+#   asyncio.Queue (bounded: a stalled disk pushes back into the OS serial buffers
+#        |          instead of growing memory without limit)
+#   persist task -- drains the queue in batches and hands each batch to
+#                   persist(batch) on a single writer thread, so scans from all
+#                   readers are written in arrival order and reading never
+#                   waits for disk; once a batch is stored every scan in it is
+#                   acknowledged on the port it came from
+#
+# On POSIX the port descriptors are registered with the event loop
+# (loop.add_reader), so a dozen idle readers cost no threads and no polling;
+# elsewhere each port gets a thread doing blocking reads.
+
+
+class IngestPipeline:
+    """
+    Reads frames from one or more serial ports (pyserial-like objects with
+    read()/in_waiting/fileno()), converts each frame payload (bytes, see
+    arduino/rfid_parser.py) with make_scan(payload, reader_id) -> scan tuple
+    or None, and persists batches
+    from every port with persist(list_of_scans). Both callables are plain
+    blocking functions. persist may return one status per scan (Present /
+    Late / TimeOut), which is sent back to the reader in its ACK.
+
+    `ports` is {reader_id: serial} or a single serial object. Scan tuples
+    start with the card's student ID, which is the key for repeat-tap
+    suppression.
+
+    A port whose read fails is dropped. Without on_port_lost the pipeline
+    stops once no port is left; with it, on_port_lost(reader_id, error) is
+    called on the loop and the pipeline keeps running (see
+    arduino/device_supervisor.py, which reopens the port and add_port()s it).
+    """
+
+    def __init__(self, ports, make_scan: Callable[[bytes, str], Optional[tuple]],
+                 persist: Callable[[List[tuple]], Any], config: Optional[SerialConfig] = None,
+                 on_port_lost: Optional[Callable[[str, str], None]] = None):
+        if not isinstance(ports, dict):
+            ports = {reader_id_for(getattr(ports, "port", None) or "serial"): ports}
+        self.make_scan = make_scan
+        self.persist = persist
+        self.on_port_lost = on_port_lost
+        self.config = config or load_serial_config()
+        self.ports: Dict[str, PortReader] = {}
+        self._port_tasks: Dict[str, asyncio.Future] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-persist")
+        self.dedup = TapDeduplicator(self.config.dedup_window)
+        # metrics
+        self.scans = 0
+        self.bad_lines = 0
+        self.suppressed = 0
+        self.failed_batches = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = HdrHistogram(scale=1, bounds=SIZE_BOUNDS)
+        self.parse_latency = HdrHistogram()  # seconds spent in make_scan()
+        self.flush_latency = HdrHistogram()  # seconds spent in persist()
+        self.commit_latency = HdrHistogram()  # seconds from line received to persisted
+        self.ack_latency = HdrHistogram()  # seconds from line received to ACK/NAK written
+        for reader_id, ser in ports.items():
+            self.add_port(reader_id, ser)
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    async def run(self) -> None:
+        """Run until stop() (or SIGINT/SIGTERM); buffered scans are persisted before returning."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.config.queue_size)
+        self._stopping = asyncio.Event()
+        REGISTRY.register_collector("ingest", self.collect)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # Windows / not the main thread: KeyboardInterrupt still works
+        for port in self.ports.values():
+            self._start_port(port)
+        try:
+            await asyncio.gather(self._readers(), self._persister())
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    self._loop.remove_signal_handler(sig)
+                except (NotImplementedError, RuntimeError, ValueError):
+                    pass
+            self._write_executor.shutdown(wait=True)
+
+    def stop(self) -> None:
+        """Ask the pipeline to finish (safe to call from any thread)."""
+        if self._loop is None or self._stopping is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def add_port(self, reader_id: str, ser) -> PortReader:
+        """
+        Read another port (or a reopened one after it was lost); may be called
+        before run() or from the loop while running.
+        """
+        port = self.ports.get(reader_id)
+        if port is not None:
+            if reader_id in self._port_tasks:
+                raise ValueError(f"Reader {reader_id!r} is already open")
+            port.reattach(ser)
+        else:
+            port = PortReader(reader_id, ser)
+            self.ports[reader_id] = port
+        if self._stopping is not None and not self._stopping.is_set():
+            self._start_port(port)
+        return port
+
+    async def run_blocking(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn on the writer thread, serialized with batch persistence (e.g. compaction)."""
+        return await asyncio.get_running_loop().run_in_executor(self._write_executor, fn, *args)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        def ms(h: HdrHistogram) -> Dict[str, float]:
+            return {k: (v * 1000 if k != "count" else v) for k, v in h.snapshot().items()}
+
+        framing: Dict[str, int] = {}
+        for port in self.ports.values():
+            for k, v in port.frames.stats().items():
+                framing[k] = framing.get(k, 0) + v
+        return {
+            "scans": self.scans,
+            "bad_lines": self.bad_lines,
+            "suppressed": self.suppressed,
+            "dedup": self.dedup.stats(),
+            "framing": framing,
+            "readers": {rid: port.stats() for rid, port in self.ports.items()},
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batch_sizes.count,
+            "failed_batches": self.failed_batches,
+            "batch_size": self.batch_sizes.snapshot(),
+            "parse_latency_ms": ms(self.parse_latency),
+            "flush_latency_ms": ms(self.flush_latency),
+            "commit_latency_ms": ms(self.commit_latency),
+            "ack_latency_ms": ms(self.ack_latency),
+        }
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Metrics collector (utils/metrics.py): the counters above, read only when scraped."""
+        ports = list(self.ports.items())
+
+        def per_reader(attr: str) -> List[Dict[str, Any]]:
+            return [sample(getattr(port, attr), reader=rid) for rid, port in ports]
+
+        framing: Dict[str, int] = {}
+        for _, port in ports:
+            for k, v in port.frames.stats().items():
+                framing[k] = framing.get(k, 0) + v
+        dedup = self.dedup.stats()
+        return {
+            "recordsync_scans_total": family("counter", "Scans queued for storage", per_reader("scans")),
+            "recordsync_bad_frames_total": family("counter", "Frames rejected by make_scan", per_reader("bad_lines")),
+            "recordsync_repeat_taps_total": family("counter", "Repeat taps dropped by dedup", per_reader("suppressed")),
+            "recordsync_reader_bytes_total": family("counter", "Bytes read from each reader", per_reader("bytes_read")),
+            "recordsync_replies_total": family("counter", "ACK/NAK frames written to readers",
+                                               [sample(getattr(port, attr), reader=rid, kind=kind)
+                                                for rid, port in ports
+                                                for kind, attr in (("ack", "acks"), ("nak", "naks"),
+                                                                   ("error", "ack_errors"))]),
+            "recordsync_framing_total": family("counter", "Frame reader counters summed over readers",
+                                               [sample(v, kind=k) for k, v in framing.items()]),
+            "recordsync_dedup_cards": family("gauge", "Cards inside the dedup window", [sample(dedup["tracked"])]),
+            "recordsync_queue_depth": family("gauge", "Scans waiting to be stored", [sample(self.queue_depth())]),
+            "recordsync_queue_depth_max": family("gauge", "Highest queue depth seen", [sample(self.max_queue_depth)]),
+            "recordsync_persist_failures_total": family("counter", "Batches that failed to store",
+                                                        [sample(self.failed_batches)]),
+            "recordsync_parse_seconds": family("histogram", "Time to turn a frame into a scan",
+                                               [self.parse_latency.sample()]),
+            "recordsync_persist_batch_size": family("histogram", "Scans per stored batch",
+                                                    [self.batch_sizes.sample()]),
+            "recordsync_persist_seconds": family("histogram", "Time spent storing one batch",
+                                                 [self.flush_latency.sample()]),
+            "recordsync_commit_latency_seconds": family("histogram", "Frame received to scan stored",
+                                                        [self.commit_latency.sample()]),
+            "recordsync_ack_latency_seconds": family("histogram", "Frame received to ACK/NAK written",
+                                                     [self.ack_latency.sample()]),
+        }
+
+    # -----------------------------
+    # Reader tasks
+    # -----------------------------
+    def _start_port(self, port: PortReader) -> None:
+        self._port_tasks[port.reader_id] = asyncio.ensure_future(self._read_port(port))
+
+    async def _readers(self) -> None:
+        try:
+            await self._stopping.wait()
+            while self._port_tasks:
+                await asyncio.wait(list(self._port_tasks.values()))
+        finally:
+            await self._queue.put(None)  # tells the persister no more scans are coming
+
+    async def _read_port(self, port: PortReader) -> None:
+        fd = port.fileno()
+        try:
+            if fd is not None:
+                await self._read_port_events(port, fd)
+            else:
+                await self._read_port_blocking(port)
+        except Exception as e:
+            port.error = str(e) or type(e).__name__
+            print(f"Reader {port.reader_id} stopped: {port.error}")
+        finally:
+            self._port_tasks.pop(port.reader_id, None)
+            if self._stopping.is_set() or port.error is None:
+                pass
+            elif self.on_port_lost is not None:
+                try:
+                    self.on_port_lost(port.reader_id, port.error)
+                except Exception as e:
+                    print(f"Error handling lost reader {port.reader_id}: {e}")
+            elif not self._port_tasks:
+                print("No RFID readers left, stopping ingestion.")
+                self._stopping.set()
+
+    async def _read_port_events(self, port: PortReader, fd: int) -> None:
+        """Event-driven reads: nothing runs for this port until its descriptor is readable."""
+        loop = asyncio.get_running_loop()
+        os.set_blocking(fd, False)
+        readable = asyncio.Event()
+        loop.add_reader(fd, readable.set)
+        stop = asyncio.ensure_future(self._stopping.wait())
+        try:
+            while True:
+                wake = asyncio.ensure_future(readable.wait())
+                await asyncio.wait({wake, stop}, return_when=asyncio.FIRST_COMPLETED)
+                if not wake.done():
+                    wake.cancel()
+                    break
+                readable.clear()
+                try:
+                    data = os.read(fd, READ_CHUNK_BYTES)
+                except BlockingIOError:
+                    continue
+                if not data:
+                    raise ConnectionError("device disconnected")
+                await self._feed(port, data)
+        finally:
+            loop.remove_reader(fd)
+            stop.cancel()
+
+    async def _read_port_blocking(self, port: PortReader) -> None:
+        """Thread-backed reads for ports the event loop cannot watch (Windows)."""
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"serial-{port.reader_id}")
+        stop = asyncio.ensure_future(self._stopping.wait())
+        try:
+            while True:
+                read = loop.run_in_executor(executor, port.read_chunk)
+                done, _ = await asyncio.wait({read, stop}, return_when=asyncio.FIRST_COMPLETED)
+                if read not in done:
+                    break  # stopping; the pending read returns within read_timeout
+                data = read.result()  # a failed read (unplugged) drops the port
+                if data:
+                    await self._feed(port, data)
+        finally:
+            stop.cancel()
+            executor.shutdown(wait=False)
+
+    async def _feed(self, port: PortReader, data: bytes) -> None:
+        port.bytes_read += len(data)
+        for payload in port.frames.feed(data):
+            payload = payload.strip()
+            if payload:
+                await self._enqueue(port, payload)
+
+    async def _enqueue(self, port: PortReader, payload: bytes) -> None:
+        received_at = time.perf_counter()
+        try:
+            scan = self.make_scan(payload, port.reader_id)
+        except Exception as e:
+            print(f"Error handling frame {payload!r} from {port.reader_id}: {e}")
+            scan = None
+        self.parse_latency.observe(time.perf_counter() - received_at)
+        if scan is None:
+            self.bad_lines += 1
+            port.bad_lines += 1
+            self._reply(port, encode_nak("", "rejected"), received_at, ok=False)
+            return
+        if not self.dedup.accept(str(scan[0])):
+            self.suppressed += 1
+            port.suppressed += 1
+            print(f"[{port.reader_id}] repeat tap from {scan[0]} ignored")
+            self._reply(port, encode_ack(str(scan[0]), "Repeat"), received_at)
+            return
+        await self._queue.put((scan, port.reader_id, received_at))
+        self.scans += 1
+        port.scans += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    async def _persister(self) -> None:
+        done = False
+        while not done:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.config.flush_delay
+            while len(batch) < self.config.flush_max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get_nowait() if remaining <= 0 else \
+                        await asyncio.wait_for(self._queue.get(), remaining)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[tuple, str, float]]) -> None:
+        started = time.perf_counter()
+        try:
+            statuses = await self.run_blocking(self.persist, [scan for scan, _, _ in batch])
+        except Exception as e:
+            self.failed_batches += 1
+            print(f"Error persisting {len(batch)} scans: {e}")
+            for scan, reader_id, received_at in batch:
+                self._reply(self.ports.get(reader_id), encode_nak(str(scan[0]), "store_failed"),
+                            received_at, ok=False)
+            return
+        finally:
+            self.flush_latency.observe(time.perf_counter() - started)
+            self.batch_sizes.observe(len(batch))
+        committed = time.perf_counter()
+        if not isinstance(statuses, (list, tuple)) or len(statuses) != len(batch):
+            statuses = [None] * len(batch)
+        for (scan, reader_id, received_at), status in zip(batch, statuses):
+            self.commit_latency.observe(committed - received_at)
+            self._reply(self.ports.get(reader_id), encode_ack(str(scan[0]), status or ""), received_at)
+
+    def _reply(self, port: Optional[PortReader], payload: bytes, received_at: float, ok: bool = True) -> None:
+        if port is None or not self.config.send_acks or port.error:
+            return
+        if port.reply(payload):
+            if ok:
+                port.acks += 1
+            else:
+                port.naks += 1
+            self.ack_latency.observe(time.perf_counter() - received_at)
@@ -0,0 +1,71 @@
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# -----------------------------
+# Repeat-tap suppression
+# -----------------------------
+# Students often tap two or three times in a row. A tap is dropped when the
+# same card was accepted less than `window` seconds ago, so only the first one
+# reaches storage (a later tap still records TimeOut as before).
+#
+# Accepted cards live in a dict (card -> accepted_at) plus a queue of time
+# buckets listing the cards accepted in each bucket. Expiry pops whole buckets
+# that ended more than `window` ago, so lookups and expiry are O(1) amortized
+# and memory holds roughly one window of distinct cards.
+
+DEDUP_BUCKETS = 8  # buckets per window
+
+
+class TapDeduplicator:
+    """Per-card suppression window; window <= 0 disables it."""
+
+    def __init__(self, window: float, clock: Callable[[], float] = time.monotonic):
+        self.window = max(0.0, float(window))
+        self._clock = clock
+        self._width = self.window / DEDUP_BUCKETS if self.window else 1.0
+        self._seen: Dict[str, float] = {}
+        self._buckets: Deque[Tuple[int, List[str]]] = deque()  # (bucket number, cards), oldest first
+        self.accepted = 0
+        self.suppressed = 0
+
+    def accept(self, card: str, now: Optional[float] = None) -> bool:
+        """True for the first tap of `card` within the window, False for a repeat."""
+        if not self.window:
+            self.accepted += 1
+            return True
+        now = self._clock() if now is None else now
+        self._expire(now)
+        last = self._seen.get(card)
+        if last is not None and now - last < self.window:
+            self.suppressed += 1
+            return False
+        self._seen[card] = now
+        bucket = int(now / self._width)
+        if self._buckets and self._buckets[-1][0] == bucket:
+            self._buckets[-1][1].append(card)
+        else:
+            self._buckets.append((bucket, [card]))
+        self.accepted += 1
+        return True
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        buckets, seen = self._buckets, self._seen
+        while buckets and (buckets[0][0] + 1) * self._width <= cutoff:
+            for card in buckets.popleft()[1]:
+                # the card may have been accepted again later; keep that entry
+                accepted_at = seen.get(card)
+                if accepted_at is not None and accepted_at <= cutoff:
+                    del seen[card]
+
+    def tracked(self) -> int:
+        return len(self._seen)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "window": self.window,
+            "accepted": self.accepted,
+            "suppressed": self.suppressed,
+            "tracked": self.tracked(),
+        }
@@ -0,0 +1,273 @@
+import asyncio
+import os
+import time
+from fnmatch import fnmatchcase
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from arduino.arduino_reader import IngestPipeline
+from utils import inotify
+from utils.metrics import REGISTRY, family, sample
+
+# -----------------------------
+# Reader hot-plug supervisor
+# -----------------------------
+# Keeps every RFID reader attached to the IngestPipeline:
+#   - readers that are present are opened and added to the pipeline; ones
+#     plugged in later are opened as soon as their device node appears
+#   - a reader whose port fails (unplugged, reset) is dropped from the
+#     pipeline and reopened with exponential backoff; replugging it retries
+#     immediately
+#   - per-reader uptime, downtime and reconnect counts are kept for stats
+#
+# Device changes are noticed through inotify on /dev and /dev/serial/by-id
+# (no polling while nothing happens); without inotify the device list is
+# rescanned every POLL_SECONDS. /dev is busy (terminals get IN_ATTRIB on every
+# login, audio and video nodes come and go), so only events for names that
+# match the reader port patterns wake the rescan; everything under by-id is a
+# serial device and always does.
+
+WATCH_DIRS = ("/dev", "/dev/serial/by-id")
+PORT_PATTERNS = ("ttyACM*", "ttyUSB*")  # USB CDC (Arduino Uno/Leonardo) and USB-serial adapters
+POLL_SECONDS = 2.0
+RESCAN_SECONDS = 30.0  # safety rescan even with inotify (missed events, config ports)
+SETTLE_SECONDS = 0.25  # udev creates the node first, then permissions and the by-id link
+BACKOFF_MIN_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+_WATCH_MASK = (inotify.IN_CREATE | inotify.IN_DELETE | inotify.IN_ATTRIB
+               | inotify.IN_MOVED_TO | inotify.IN_MOVED_FROM | inotify.IN_DELETE_SELF)
+
+
+class ReaderState:
+    """Connection history of one reader."""
+
+    def __init__(self, reader_id: str, path: str, now: float):
+        self.reader_id = reader_id
+        self.path = path
+        self.ser: Any = None
+        self.present = False
+        self.connected_at: Optional[float] = None
+        self.down_since: Optional[float] = now
+        self.uptime = 0.0  # completed connected time, the current session is added in stats()
+        self.downtime = 0.0
+        self.connects = 0
+        self.failures = 0  # consecutive failed opens / drops, drives the backoff
+        self.next_attempt = 0.0
+        self.last_error: Optional[str] = None
+
+    def mark_up(self, ser: Any, now: float) -> None:
+        self.ser = ser
+        if self.down_since is not None and self.connects:
+            self.downtime += now - self.down_since
+        self.down_since = None
+        self.connected_at = now
+        self.connects += 1
+        self.failures = 0
+        self.last_error = None
+
+    def mark_down(self, error: str, now: float) -> None:
+        if self.connected_at is not None:
+            self.uptime += now - self.connected_at
+            self.down_since = now
+        self.ser = None
+        self.connected_at = None
+        self.last_error = error
+        self.failures += 1
+        backoff = min(BACKOFF_MAX_SECONDS, BACKOFF_MIN_SECONDS * 2 ** (self.failures - 1))
+        self.next_attempt = now + backoff
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        up = self.uptime + (now - self.connected_at if self.connected_at is not None else 0.0)
+        down = self.downtime + (now - self.down_since if self.down_since is not None and self.connects else 0.0)
+        return {
+            "path": self.path,
+            "state": "up" if self.ser is not None else ("waiting" if not self.present else "retrying"),
+            "uptime": round(up, 1),
+            "downtime": round(down, 1),
+            "availability": round(up / (up + down), 4) if up + down else 0.0,
+            "reconnects": max(0, self.connects - 1),
+            "last_error": self.last_error,
+        }
+
+
+class DeviceSupervisor:
+    """
+    Opens readers found by discover() -> [(reader_id, path)] with
+    open_port(path) -> serial, adds them to `pipeline`, and reopens them when
+    they are lost. Run it next to pipeline.run() and stop() it afterwards.
+    """
+
+    def __init__(self, pipeline: IngestPipeline, discover: Callable[[], List[Tuple[str, str]]],
+                 open_port: Callable[[str], Any], port_patterns: Sequence[str] = PORT_PATTERNS):
+        self.pipeline = pipeline
+        self.discover = discover
+        self.open_port = open_port
+        self.port_patterns = tuple(port_patterns)
+        self.ignored_events = 0
+        self.readers: Dict[str, ReaderState] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._inotify: Optional[inotify.Inotify] = None
+        pipeline.on_port_lost = self._port_lost
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopped = asyncio.Event()
+        REGISTRY.register_collector("readers", self.collect)
+        self._start_watching(loop)
+        try:
+            while not self._stopped.is_set():
+                await self._scan()
+                await self._sleep(self._next_timeout())
+        finally:
+            if self._inotify is not None:
+                loop.remove_reader(self._inotify.fileno())
+                self._inotify.close()
+                self._inotify = None
+            for state in self.readers.values():
+                self._close(state)
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        return {rid: state.stats(now) for rid, state in self.readers.items()}
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Metrics collector: connection state per reader."""
+        stats = self.stats()
+        return {
+            "recordsync_reader_up": family("gauge", "1 while the reader is connected",
+                                           [sample(int(s["state"] == "up"), reader=rid) for rid, s in stats.items()]),
+            "recordsync_reader_availability": family("gauge", "Share of time the reader has been connected",
+                                                     [sample(s["availability"], reader=rid)
+                                                      for rid, s in stats.items()]),
+            "recordsync_reader_reconnects_total": family("counter", "Reconnects after the reader was lost",
+                                                         [sample(s["reconnects"], reader=rid)
+                                                          for rid, s in stats.items()]),
+            "recordsync_device_events_ignored_total": family("counter", "/dev events that concern no reader port",
+                                                             [sample(self.ignored_events)]),
+        }
+
+    # -----------------------------
+    # Device events
+    # -----------------------------
+    def _start_watching(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._inotify = inotify.open_inotify()
+        if self._inotify is None:
+            print(f"Watching for RFID readers every {POLL_SECONDS:.0f} s")
+            return
+        self._add_watches()
+        loop.add_reader(self._inotify.fileno(), self._on_inotify)
+
+    def _add_watches(self) -> None:
+        watched = set(self._inotify.watched())
+        for path in WATCH_DIRS:
+            if path not in watched and os.path.isdir(path):
+                try:
+                    self._inotify.add_watch(path, _WATCH_MASK)
+                except OSError as e:
+                    print(f"Cannot watch {path}: {e}")
+
+    def is_port_event(self, path: str, name: str) -> bool:
+        """Whether an inotify event (watched dir, entry name) can concern a reader."""
+        if not name or path != "/dev":
+            return True  # a watched directory itself changed, or an entry under by-id
+        return name == "serial" or any(fnmatchcase(name, pattern) for pattern in self.port_patterns)
+
+    def _on_inotify(self) -> None:
+        try:
+            events = self._inotify.read_events()
+        except OSError:
+            events = []
+        relevant = sum(1 for path, _, name in events if self.is_port_event(path, name))
+        self.ignored_events += len(events) - relevant
+        if relevant:
+            # /dev/serial/by-id comes and goes with the first/last USB serial device
+            self._add_watches()
+            self._wake.set()
+
+    def _next_timeout(self) -> float:
+        idle = RESCAN_SECONDS if self._inotify is not None else POLL_SECONDS
+        now = time.monotonic()
+        pending = [s.next_attempt - now for s in self.readers.values() if s.ser is None and s.present]
+        return max(0.05, min([idle] + pending))
+
+    async def _sleep(self, timeout: float) -> None:
+        wake = asyncio.ensure_future(self._wake.wait())
+        stop = asyncio.ensure_future(self._stopped.wait())
+        try:
+            done, _ = await asyncio.wait({wake, stop}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            wake.cancel()
+            stop.cancel()
+        if wake in done and not self._stopped.is_set():
+            await asyncio.sleep(SETTLE_SECONDS)
+        self._wake.clear()
+
+    # -----------------------------
+    # Connecting
+    # -----------------------------
+    async def _scan(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        try:
+            found = dict(self.discover())
+        except Exception as e:
+            print(f"Error discovering RFID readers: {e}")
+            found = {}
+        for reader_id, state in self.readers.items():
+            if reader_id not in found:
+                state.present = False
+        for reader_id, path in found.items():
+            state = self.readers.get(reader_id)
+            if state is None:
+                state = self.readers[reader_id] = ReaderState(reader_id, path, now)
+            if not state.present or state.path != path:
+                state.next_attempt = 0.0  # (re)plugged: try right away
+            state.present = True
+            state.path = path
+            if state.ser is not None or now < state.next_attempt:
+                continue
+            try:
+                ser = await loop.run_in_executor(None, self.open_port, path)
+            except Exception as e:
+                state.mark_down(str(e), time.monotonic())
+                print(f"Cannot open reader {reader_id} ({path}): {e}; "
+                      f"retrying in {state.next_attempt - time.monotonic():.1f} s")
+                continue
+            if self._stopped.is_set():
+                self._close_serial(ser)
+                return
+            state.mark_up(ser, time.monotonic())
+            self.pipeline.add_port(reader_id, ser)
+            again = f" (reconnect {state.connects - 1})" if state.connects > 1 else ""
+            print(f"Reader {reader_id} connected on {path}{again}")
+
+    def _port_lost(self, reader_id: str, error: str) -> None:
+        state = self.readers.get(reader_id)
+        if state is None:
+            return
+        self._close(state)
+        state.mark_down(error, time.monotonic())
+        print(f"Reader {reader_id} disconnected ({error}); reconnecting")
+        if self._wake is not None:
+            self._wake.set()
+
+    def _close(self, state: ReaderState) -> None:
+        if state.ser is not None:
+            self._close_serial(state.ser)
+            state.ser = None
+
+    @staticmethod
+    def _close_serial(ser: Any) -> None:
+        try:
+            ser.close()
+        except Exception:
+            pass
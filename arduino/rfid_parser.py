@@ -0,0 +1,116 @@
+from typing import Dict, Tuple, Union
+
+# -----------------------------
+# RFID frame parser
+# -----------------------------
+# Parses the firmware's "name,number,status" payload straight from the bytes
+# the FrameReader hands over. The field count and the numeric ID are checked
+# on the bytes; only the name is decoded (statuses come from a small cache),
+# and a bad frame returns an error object instead of raising, so junk on the
+# line costs no exception handling.
+#
+# Frames that parsed cleanly are remembered, so a card seen before costs one
+# dict lookup.
+#
+# Readers may also send just the card UID ("04A1B2C3", "04:A1:B2:C3"); those
+# frames have no comma and are parsed by parse_uid (the host maps UIDs to
+# students, see database/card_registry.py).
+
+ScanFields = Tuple[str, int, str]  # (name, number, status)
+
+# the same few hundred cards tap every day, so parsed frames are cached; once
+# the cache is full new frames are parsed without being added (parsing is a
+# pure function, so entries never go stale)
+FRAME_CACHE_SIZE = 4096
+_frame_cache: Dict[bytes, ScanFields] = {}
+_status_cache: Dict[bytes, str] = {}
+_uid_cache: Dict[bytes, str] = {}
+
+_HEX_DIGITS = b"0123456789ABCDEF"
+_UID_SEPARATORS = b": -"
+
+
+class FrameError(ValueError):
+    """A frame that is not a valid scan; `frame` holds the raw payload."""
+
+    reason = "bad frame"
+
+    def __init__(self, frame: bytes, detail: str = ""):
+        self.frame = frame
+        self.detail = detail
+        super().__init__(f"{self.reason}: {frame!r}" + (f" ({detail})" if detail else ""))
+
+
+class FieldCountError(FrameError):
+    reason = "expected 3 fields (name,number,status)"
+
+
+class BadIdError(FrameError):
+    reason = "card number is not a number"
+
+
+class EmptyFieldError(FrameError):
+    reason = "empty name or status"
+
+
+class InvalidUidError(FrameError):
+    reason = "not a card UID"
+
+
+def is_uid_frame(frame: Union[bytes, bytearray, memoryview]) -> bool:
+    """UID-only frames carry no field separators."""
+    return b"," not in frame
+
+
+def parse_frame(frame: Union[bytes, bytearray, memoryview]) -> Union[ScanFields, FrameError]:
+    """
+    b"Juan Dela Cruz,12,Present" -> ("Juan Dela Cruz", 12, "Present").
+    Returns a FrameError subclass (not raised) for a malformed frame.
+    """
+    if type(frame) is not bytes:
+        frame = bytes(frame)
+    hit = _frame_cache.get(frame)
+    if hit is not None:
+        return hit
+    parts = frame.split(b",")
+    if len(parts) != 3:
+        return FieldCountError(frame)
+    name, number, status = parts
+    number = number.strip()
+    if not number.isdigit():
+        return BadIdError(frame)
+    name = name.strip()
+    status = status.strip()
+    if not name or not status:
+        return EmptyFieldError(frame)
+    status_str = _status_cache.get(status)
+    if status_str is None:
+        status_str = status.decode("utf-8", "replace")
+        if len(_status_cache) < 64:
+            _status_cache[status] = status_str
+    parsed = (name.decode("utf-8", "replace"), int(number), status_str)
+    if len(_frame_cache) < FRAME_CACHE_SIZE:
+        _frame_cache[frame] = parsed
+    return parsed
+
+
+def parse_uid(frame: Union[bytes, bytearray, memoryview]) -> Union[str, FrameError]:
+    """b"04:a1:b2:c3" -> "04A1B2C3" (upper-case hex, separators removed)."""
+    if type(frame) is not bytes:
+        frame = bytes(frame)
+    hit = _uid_cache.get(frame)
+    if hit is not None:
+        return hit
+    value = frame.strip().translate(None, _UID_SEPARATORS).upper()
+    # every byte a hex digit <=> nothing left once the hex digits are deleted
+    if not value or len(value) % 2 or value.translate(None, _HEX_DIGITS):
+        return InvalidUidError(frame)
+    uid = value.decode("ascii")
+    if len(_uid_cache) < FRAME_CACHE_SIZE:
+        _uid_cache[frame] = uid
+    return uid
+
+
+def clear_cache() -> None:
+    _frame_cache.clear()
+    _uid_cache.clear()
@@ -0,0 +1,274 @@
+import argparse
+import os
+import random
+import select
+import sys
+import threading
+import time
+import tty
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# allow "python arduino/rfid_simulator.py" to import project packages
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from arduino.arduino_reader import encode_frame
+from arduino.serial_config import PORTS_ENV
+
+# -----------------------------
+# RFID reader simulator
+# -----------------------------
+# Stands in for the Arduinos during load tests. Each simulated reader is a
+# pseudo-terminal pair: the simulator writes scan frames into the master side
+# and database/models.py opens the slave side like any serial port, e.g.
+#
+#   python arduino/rfid_simulator.py --readers 4 --rate 200 --count 10000
+#   RECORDSYNC_SERIAL_PORTS=sim0=/dev/pts/5,sim1=/dev/pts/6,... python database/models.py
+#
+# (the exact RECORDSYNC_SERIAL_PORTS value is printed at startup; --link gives
+# the ports stable names instead). Lines are the firmware's "name,number,status"
+# or, with --uid, bare card UIDs (--enroll registers them in database/cards.csv),
+# optionally as checked frames (--checked) so models.py can count lost frames.
+#
+# Traces are text files with one scan per line, "<seconds>\t<line>", where
+# seconds is the offset from the first scan. Replaying one reproduces the
+# original timing (scaled by --speed); "record" captures a trace from a real
+# reader.
+
+STATUSES = ("Present", "Present", "Present", "Late")  # rough class-day mix
+
+
+class SimulatedReader:
+    """A pty pair that looks like one RFID reader to whoever opens `port`."""
+
+    def __init__(self, reader_id: str, checked: bool = False, link: Optional[str] = None):
+        self.reader_id = reader_id
+        self.checked = checked
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # no echo / line editing, like a real serial line
+        self.port = os.ttyname(self._slave)
+        self.link = link
+        if link:
+            try:
+                os.unlink(link)
+            except FileNotFoundError:
+                pass
+            os.symlink(self.port, link)
+        self.seq = 0
+        self.sent = 0
+        self.stalled = 0.0  # seconds spent blocked because nobody drained the port
+        # replies from the host (ACK/NAK frames), read like the firmware would
+        self.acks = 0
+        self.naks = 0
+        self._closed = threading.Event()
+        self._drainer = threading.Thread(target=self._drain, daemon=True, name=f"{reader_id}-acks")
+        self._drainer.start()
+
+    def _drain(self) -> None:
+        pending = b""
+        while not self._closed.is_set():
+            try:
+                ready, _, _ = select.select([self.master], [], [], 0.2)
+                if not ready:
+                    continue
+                data = os.read(self.master, 4096)
+            except (OSError, ValueError):
+                return
+            if not data:
+                continue
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if b"ACK|" in line:
+                    self.acks += 1
+                elif b"NAK|" in line:
+                    self.naks += 1
+
+    def send(self, line: str) -> None:
+        frame = encode_frame(line.encode(), seq=self.seq if self.checked else None)
+        self.seq += 1
+        started = time.perf_counter()
+        view = memoryview(frame)
+        while view:
+            n = os.write(self.master, view)
+            view = view[n:]
+        self.stalled += time.perf_counter() - started
+        self.sent += 1
+
+    def close(self) -> None:
+        self._closed.set()
+        self._drainer.join(1.0)
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        if self.link:
+            try:
+                os.unlink(self.link)
+            except OSError:
+                pass
+
+
+# -----------------------------
+# Scan sources
+# -----------------------------
+def card_uid(number: int) -> str:
+    """Deterministic 4-byte UID for simulated student `number`."""
+    return f"{0x04000000 + number:08X}"
+
+
+def generated_scans(count: int, students: int = 300, seed: Optional[int] = None,
+                    uid: bool = False) -> Iterator[str]:
+    """`count` 'name,number,status' lines (or card UIDs) spread over a roster of `students`."""
+    rnd = random.Random(seed)
+    for _ in range(count):
+        number = rnd.randint(1, students)
+        yield card_uid(number) if uid else f"Student {number},{number},{rnd.choice(STATUSES)}"
+
+
+def load_trace(path: str) -> List[Tuple[float, str]]:
+    """Read a "<seconds>\\t<line>" trace; offsets are made relative to the first scan."""
+    trace: List[Tuple[float, str]] = []
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            offset, sep, line = raw.rstrip("\r\n").partition("\t")
+            if not sep or not line.strip():
+                continue
+            try:
+                trace.append((float(offset), line.strip()))
+            except ValueError:
+                print(f"Skipping bad trace line: {raw.strip()}")
+    if trace:
+        first = trace[0][0]
+        trace = [(t - first, line) for t, line in trace]
+    return trace
+
+
+def record_trace(port: str, out_path: str, baud: int = 9600) -> int:
+    """Copy every line a real reader sends into a trace file until Ctrl+C; returns lines recorded."""
+    import serial
+
+    recorded = 0
+    with serial.Serial(port, baud, timeout=1) as ser, open(out_path, "w", encoding="utf-8") as out:
+        print(f"Recording {port} into {out_path} (Ctrl+C to stop)")
+        started = None
+        try:
+            while True:
+                raw = ser.readline()
+                line = raw.decode(errors="ignore").strip()
+                if not line:
+                    continue
+                now = time.monotonic()
+                started = now if started is None else started
+                out.write(f"{now - started:.3f}\t{line}\n")
+                out.flush()
+                recorded += 1
+        except KeyboardInterrupt:
+            pass
+    return recorded
+
+
+# -----------------------------
+# Emitters
+# -----------------------------
+def run_generated(readers: List[SimulatedReader], count: int, rate: float = 0.0,
+                  burst: int = 0, burst_gap: float = 0.5, students: int = 300,
+                  seed: Optional[int] = None, uid: bool = False) -> None:
+    """
+    Send `count` scans round-robin over the readers. rate is total scans per
+    second (0 = as fast as the ports accept them); with burst, scans go out in
+    groups of `burst` separated by burst_gap seconds.
+    """
+    interval = 1.0 / rate if rate > 0 else 0.0
+    next_at = time.monotonic()
+    for i, line in enumerate(generated_scans(count, students, seed, uid)):
+        readers[i % len(readers)].send(line)
+        if burst:
+            if (i + 1) % burst == 0:
+                time.sleep(burst_gap)
+            continue
+        if interval:
+            next_at += interval
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def run_replay(readers: List[SimulatedReader], trace: List[Tuple[float, str]], speed: float = 1.0) -> None:
+    """Send a trace with its original spacing (speed 2 = twice as fast), round-robin over the readers."""
+    started = time.monotonic()
+    for i, (offset, line) in enumerate(trace):
+        delay = started + offset / speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        readers[i % len(readers)].send(line)
+
+
+def open_readers(count: int, checked: bool = False, link: Optional[str] = None) -> List[SimulatedReader]:
+    """Create `count` simulated readers; link "/tmp/rfid" gives /tmp/rfid0, /tmp/rfid1, ..."""
+    return [SimulatedReader(f"sim{i}", checked, f"{link}{i}" if link else None) for i in range(count)]
+
+
+def ports_setting(readers: List[SimulatedReader]) -> str:
+    """Value for RECORDSYNC_SERIAL_PORTS that makes models.py open these readers."""
+    return ",".join(f"{r.reader_id}={r.link or r.port}" for r in readers)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate RFID readers on pseudo-terminals.")
+    parser.add_argument("--readers", type=int, default=1, help="number of simulated readers")
+    parser.add_argument("--count", type=int, default=1000, help="scans to generate")
+    parser.add_argument("--rate", type=float, default=10.0, help="scans per second over all readers (0 = flat out)")
+    parser.add_argument("--burst", type=int, default=0, help="send scans in bursts of this size")
+    parser.add_argument("--burst-gap", type=float, default=0.5, help="seconds between bursts")
+    parser.add_argument("--students", type=int, default=300, help="roster size for generated scans")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checked", action="store_true", help="send sequence-numbered, checksummed frames")
+    parser.add_argument("--uid", action="store_true", help="send card UIDs instead of name,number,status")
+    parser.add_argument("--enroll", action="store_true",
+                        help="with --uid: register the simulated cards in database/cards.csv first")
+    parser.add_argument("--replay", metavar="TRACE", help="replay a recorded trace instead of generating scans")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor")
+    parser.add_argument("--link", metavar="PREFIX", help="symlink the ports as PREFIX0, PREFIX1, ...")
+    parser.add_argument("--wait", type=float, default=3.0, help="seconds to wait before sending")
+    parser.add_argument("--record", nargs=2, metavar=("PORT", "TRACE"), help="record a trace from a real reader")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        print(f"Recorded {record_trace(*args.record)} scans")
+        return
+
+    if args.uid and args.enroll:
+        from database.card_registry import enroll_cards
+
+        stored = enroll_cards([(card_uid(n), f"00-{n:03d}", f"Student {n}") for n in range(1, args.students + 1)])
+        print(f"Enrolled {stored} simulated cards")
+
+    readers = open_readers(max(1, args.readers), args.checked, args.link)
+    print(f"{PORTS_ENV}={ports_setting(readers)}")
+    try:
+        trace = load_trace(args.replay) if args.replay else None
+        time.sleep(args.wait)  # time to start models.py against the ports
+        started = time.perf_counter()
+        if trace is not None:
+            run_replay(readers, trace, args.speed)
+        else:
+            run_generated(readers, args.count, args.rate, args.burst, args.burst_gap, args.students,
+                          args.seed, args.uid)
+        elapsed = time.perf_counter() - started
+        sent = sum(r.sent for r in readers)
+        print(f"Sent {sent} scans in {elapsed:.2f} s ({sent / elapsed if elapsed else 0:.0f}/s), "
+              f"stalled {sum(r.stalled for r in readers):.2f} s waiting for the reader side")
+        # keep the ports open until the reader side has drained them
+        print("Press Ctrl+C to close the ports.")
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Replies from the host: {sum(r.acks for r in readers)} ACK, {sum(r.naks for r in readers)} NAK")
+        for r in readers:
+            r.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+# -----------------------------
+# Serial ingestion settings
+# -----------------------------
+# Defaults can be overridden by environment variables or by a "serial" object
+# in database/settings.json, e.g. {"serial": {"queue_size": 2048}}.
+# Environment variables win over settings.json.
+#
+# "ports" (RECORDSYNC_SERIAL_PORTS) lists the RFID readers to open, e.g.
+# {"serial": {"ports": ["door-a=/dev/ttyACM0", "/dev/ttyUSB1"]}}; when it is
+# empty every reader found under /dev/serial/by-id is used.
+
+SETTINGS_JSON = Path(__file__).resolve().parent.parent / "database" / "settings.json"
+
+BAUD_RATE = 9600
+READ_TIMEOUT_SECONDS = 1.0
+QUEUE_SIZE = 1024  # scans buffered between the reader and the persistence task
+FLUSH_MAX_BATCH = 64  # scans written per batch at most
+FLUSH_DELAY_SECONDS = 0.05  # wait this long after the first scan for more to batch
+STATS_INTERVAL_SECONDS = 60.0
+DEDUP_WINDOW_SECONDS = 10.0  # repeat taps of the same card within this window are dropped (0 = off)
+SEND_ACKS = 1  # write ACK/NAK frames back to the reader (0 = read-only link)
+PORTS_ENV = "RECORDSYNC_SERIAL_PORTS"
+
+# setting name -> (environment variable, type, default, scale applied to the env value)
+_OPTIONS = {
+    "baud_rate": ("RECORDSYNC_BAUD", int, BAUD_RATE, 1),
+    "read_timeout": ("RECORDSYNC_READ_TIMEOUT", float, READ_TIMEOUT_SECONDS, 1),
+    "queue_size": ("RECORDSYNC_QUEUE_SIZE", int, QUEUE_SIZE, 1),
+    "flush_max_batch": ("RECORDSYNC_FLUSH_BATCH", int, FLUSH_MAX_BATCH, 1),
+    "flush_delay": ("RECORDSYNC_FLUSH_DELAY_MS", float, FLUSH_DELAY_SECONDS, 0.001),
+    "stats_interval": ("RECORDSYNC_STATS_INTERVAL", float, STATS_INTERVAL_SECONDS, 1),
+    "dedup_window": ("RECORDSYNC_DEDUP_WINDOW", float, DEDUP_WINDOW_SECONDS, 1),
+    "send_acks": ("RECORDSYNC_ACK", int, SEND_ACKS, 1),
+}
+
+
+def parse_ports(value: Any) -> List[str]:
+    """
+    Reader ports from a list or a comma separated string. An entry may name its
+    reader: "door-a=/dev/ttyACM0". Empty means "discover every attached reader".
+    """
+    if not value:
+        return []
+    items = value.split(",") if isinstance(value, str) else list(value)
+    return [str(p).strip() for p in items if str(p).strip()]
+
+
+class SerialConfig:
+    """Resolved ingestion settings (see load_serial_config)."""
+
+    def __init__(self, **values: Any):
+        for name, (_, typ, default, _) in _OPTIONS.items():
+            setattr(self, name, typ(values.get(name, default)))
+        self.ports = parse_ports(values.get("ports"))
+
+    def as_dict(self) -> Dict[str, Any]:
+        out = {name: getattr(self, name) for name in _OPTIONS}
+        out["ports"] = list(self.ports)
+        return out
+
+    def __repr__(self) -> str:
+        return f"SerialConfig({self.as_dict()})"
+
+
+def _settings_section() -> Dict[str, Any]:
+    try:
+        with SETTINGS_JSON.open(encoding="utf-8") as f:
+            data = json.load(f)
+        section = data.get("serial") if isinstance(data, dict) else None
+        return section if isinstance(section, dict) else {}
+    except Exception:
+        return {}
+
+
+def load_serial_config(**overrides: Any) -> SerialConfig:
+    """Defaults < settings.json "serial" < environment < keyword overrides."""
+    values: Dict[str, Any] = {}
+    section = _settings_section()
+    for name, (env, typ, _, scale) in _OPTIONS.items():
+        if name in section:
+            values[name] = section[name]
+        raw = os.environ.get(env)
+        if raw:
+            try:
+                values[name] = typ(float(raw) * scale) if scale != 1 else typ(raw)
+            except ValueError:
+                print(f"Ignoring invalid {env}={raw!r}")
+    if "ports" in section:
+        values["ports"] = section["ports"]
+    if os.environ.get(PORTS_ENV):
+        values["ports"] = os.environ[PORTS_ENV]
+    values.update({k: v for k, v in overrides.items() if v is not None})
+    return SerialConfig(**values)
@@ -4,6 +4,7 @@ from ui.login_ui import login_card
 
 # import admin auth helpers
 from core.admin_manager import admin_login as _admin_login
+from database.storage import get_backend
 
 
 def admin_login_view(page: ft.Page) -> ft.View:
@@ -32,9 +33,6 @@ def admin_login_view(page: ft.Page) -> ft.View:
         page.go("/signup")
 
     def on_login(e, username_field, password_field):
-        import csv
-        from pathlib import Path
-
         username = (username_field.value or "").strip()
         password = (password_field.value or "").strip()
 
@@ -50,30 +48,15 @@ def admin_login_view(page: ft.Page) -> ft.View:
             page.update()
             return
 
-        admin_csv = Path(__file__).resolve().parent.parent / "database" / "admin.csv"
-
-        # Ensure file exists (header) and read safely
+        # Account existence check (case-insensitive, via the active storage backend)
         try:
-            admin_csv.parent.mkdir(parents=True, exist_ok=True)
-            if not admin_csv.exists():
-                with admin_csv.open("w", newline="", encoding="utf-8") as fh:
-                    fh.write("id,username,password\n")
-            with admin_csv.open(newline="", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                rows = [r for r in reader]
+            user_row = get_backend().find_admin(username)
         except Exception:
             status_text.value = "Database error. Please try again."
             status_text.color = "#B00020"
             page.update()
             return
 
-        # Account existence check (case-insensitive)
-        user_row = None
-        for r in rows:
-            if (r.get("username") or "").strip().lower() == username.lower():
-                user_row = r
-                break
-
         if user_row is None:
             status_text.value = "Account not registered"
             status_text.color = "#B00020"
@@ -4,6 +4,7 @@ from ui.signup_ui import signup_card
 
 # import admin auth helpers
 from core.admin_manager import admin_signup as _admin_signup
+from database.storage import get_backend
 
 
 def admin_signup_view(page: ft.Page) -> ft.View:
@@ -17,9 +18,6 @@ def admin_signup_view(page: ft.Page) -> ft.View:
     status_text = ft.Text("", size=13, weight=ft.FontWeight.BOLD, color="#B00020")
 
     def on_create_account(e, username_field, password_field, confirm_password_field):
-        import csv
-        from pathlib import Path
-
         username_raw = username_field.value or ""
         password_raw = password_field.value or ""
         confirm_raw = confirm_password_field.value or ""
@@ -42,43 +40,25 @@ def admin_signup_view(page: ft.Page) -> ft.View:
             page.update()
             return
 
-        admin_csv = Path(__file__).resolve().parent.parent / "database" / "admin.csv"
+        backend = get_backend()
 
-        # Read existing accounts and handle DB errors
+        # Duplicate username check (case-insensitive) and handle DB errors
         try:
-            admin_csv.parent.mkdir(parents=True, exist_ok=True)
-            if not admin_csv.exists():
-                with admin_csv.open("w", newline="", encoding="utf-8") as fh:
-                    fh.write("id,username,password\n")
-            with admin_csv.open(newline="", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                rows = [r for r in reader]
+            existing = backend.find_admin(username)
         except Exception:
             status_text.value = "Database error. Please try again."
             status_text.color = "#B00020"
             page.update()
             return
-
-        # Duplicate username check (case-insensitive)
-        for r in rows:
-            if (r.get("username") or "").strip().lower() == username.lower():
-                status_text.value = "Username already registered"
-                status_text.color = "#B00020"
-                page.update()
-                return
+        if existing is not None:
+            status_text.value = "Username already registered"
+            status_text.color = "#B00020"
+            page.update()
+            return
 
         # Append new admin record
         try:
-            max_id = 0
-            for r in rows:
-                try:
-                    max_id = max(max_id, int(r.get("id", 0)))
-                except Exception:
-                    pass
-            new_id = max_id + 1
-            with admin_csv.open("a", newline="", encoding="utf-8") as fh:
-                writer = csv.writer(fh)
-                writer.writerow([new_id, username, password])
+            backend.insert_admin(username, password)
         except Exception:
             status_text.value = "Database error. Please try again."
             status_text.color = "#B00020"
@@ -0,0 +1,62 @@
+"""
+Per-sample cost of the metrics in utils/metrics.py.
+
+    python benchmarks/bench_metrics.py [samples]
+
+Times Counter.inc and HdrHistogram.observe over `samples` calls each
+(default 10^6, best of three), then the cost of reading them: HdrHistogram.snapshot and a full registry
+render in Prometheus text format.
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.metrics import Counter, HdrHistogram, MetricsRegistry  # noqa: E402
+
+
+def _best(fn, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> None:
+    n = int(float(sys.argv[1])) if len(sys.argv) > 1 else 1_000_000
+    rnd = random.Random(7)
+    values = [rnd.lognormvariate(-4, 1) for _ in range(n)]  # latencies around 20 ms
+
+    def loop():
+        for _ in values:
+            pass
+
+    base = _best(loop)
+    c = Counter()
+    t_counter = _best(lambda: [c.inc() for _ in values]) - base
+    hdr = HdrHistogram()
+    t_hdr = _best(lambda: [hdr.observe(v) for v in values]) - base
+    for label, t in (("Counter.inc", t_counter), ("HdrHistogram.observe", t_hdr)):
+        print(f"{label:30s} {t / n * 1e9:8.0f} ns/sample")
+
+    registry = MetricsRegistry()
+    for i in range(8):
+        registry.counter("bench_total", reader=f"r{i}").inc(i)
+        h = registry.histogram("bench_seconds", reader=f"r{i}")
+        for v in values[:10_000]:
+            h.observe(v)
+    print(f"{'HdrHistogram.snapshot':30s} {_best(hdr.snapshot) * 1e6:8.0f} us")
+    print(f"{'Prometheus text (8 readers)':30s} {_best(registry.prometheus_text) * 1e6:8.0f} us")
+    exact = sorted(values)
+    for pct in (50, 99, 99.9):
+        want = exact[min(n - 1, int(pct / 100 * n))]
+        print(f"p{pct}: exact {want * 1000:.3f} ms  hdr {hdr.percentile(pct) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
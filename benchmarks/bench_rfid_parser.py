@@ -0,0 +1,97 @@
+"""
+RFID frame parsing: bytes-level parse_frame vs the old decode/split/strip path.
+
+    python benchmarks/bench_rfid_parser.py [frames] [--bad-ratio R] [--students N]
+
+Both paths turn a payload into (name, student_id, status) with the student ID
+formatted as models.format_student_id does. `frames` payloads (default 10^6)
+are generated up front with a share of malformed ones (default 1%), then each
+parser runs over the same list, twice:
+  roster  -- taps from N students (default 300), like a real class day;
+             parse_frame answers repeat cards from its frame cache
+  unique  -- every frame different, so every parse_frame call misses the cache
+Reports the best of three runs in frames/s and checks that both paths accept and reject exactly the
+same frames.
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from arduino.rfid_parser import FrameError, clear_cache, parse_frame  # noqa: E402
+
+BAD_FRAMES = [b"garbage", b"Ana,Present", b"Ana,12a,Present", b"Ana,1,Present,extra", b",,"]
+
+
+def _frames(n: int, bad_ratio: float, students: int = 0):
+    """students=0: every frame unique."""
+    rnd = random.Random(7)
+    out = []
+    for i in range(n):
+        if rnd.random() < bad_ratio:
+            out.append(rnd.choice(BAD_FRAMES))
+        else:
+            number = rnd.randint(1, students) if students else i
+            out.append(b"Student Number %d,%d,%s" % (number, number, rnd.choice((b"Present", b"Late"))))
+    return out
+
+
+def split_parse(frames):
+    """The pre-parser models.py path: decode, split, strip every part, catch ValueError."""
+    out = []
+    for frame in frames:
+        line = frame.decode(errors="ignore").strip()
+        try:
+            name, number, status = [x.strip() for x in line.split(",")]
+            student_id = f"00-{int(number):03d}"
+        except ValueError:
+            out.append(None)
+            continue
+        out.append((name, student_id, status))
+    return out
+
+
+def bytes_parse(frames):
+    out = []
+    for frame in frames:
+        parsed = parse_frame(frame)
+        if isinstance(parsed, FrameError):
+            out.append(None)
+            continue
+        name, number, status = parsed
+        out.append((name, f"00-{number:03d}", status))
+    return out
+
+
+def _time(fn, frames, repeat: int = 3) -> tuple:
+    """Best of `repeat` runs (the cache is emptied before each one)."""
+    best = None
+    for _ in range(repeat):
+        clear_cache()
+        started = time.perf_counter()
+        result = fn(frames)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main() -> None:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(float(args[0])) if args else 1_000_000
+    bad_ratio = float(sys.argv[sys.argv.index("--bad-ratio") + 1]) if "--bad-ratio" in sys.argv else 0.01
+    students = int(sys.argv[sys.argv.index("--students") + 1]) if "--students" in sys.argv else 300
+    print(f"{n:,} frames, {bad_ratio:.1%} malformed")
+
+    for label, count in (("roster", students), ("unique", 0)):
+        frames = _frames(n, bad_ratio, count)
+        t_split, split_result = _time(split_parse, frames)
+        t_bytes, bytes_result = _time(bytes_parse, frames)
+        mismatches = sum(1 for a, b in zip(split_result, bytes_result) if a != b)
+        print(f"{label}: split-based {n / t_split:12,.0f} frames/s   parse_frame {n / t_bytes:12,.0f} frames/s"
+              f"  ({t_split / t_bytes:.2f}x), results differ on {mismatches} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Status evaluation cost: per-row strptime (before) vs a compiled Schedule (after).
+
+    python benchmarks/bench_schedule.py [rows]
+
+"before" replays the old path: sync_students_data reading settings.json twice
+to resolve the class window, then determine_status parsing the class start,
+class end and the row's TimeIn string with strptime and rebuilding the grace
+cutoff with datetime.combine for every row. "after" is load_schedule (settings
+cached until the file changes) and Schedule.status on StudentRecord.time_in,
+which is already minutes since midnight. Both must agree on every row.
+"""
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import schedule  # noqa: E402
+from database.student_record import StudentRecord  # noqa: E402
+
+START = "08:00 AM"
+GRACE = 15
+
+
+def _make_rows(n: int):
+    rows = []
+    for i in range(n):
+        minute = 7 * 60 + i % 180  # 7:00 AM .. 9:59 AM, with some never scanned
+        time_in = "" if i % 50 == 0 else f"{minute // 60}:{minute % 60:02d} AM"
+        rows.append(StudentRecord.from_row({"ID": f"00-{i:06d}", "Name": f"Student {i}", "TimeIn": time_in}))
+    return rows
+
+
+# --- before ---
+def _old_read_settings(path: Path):
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _old_window(path: Path, class_start_time: str, class_end_time: str):
+    if not class_start_time:
+        class_start_time = _old_read_settings(path).get("class_start_time") or "08:00 AM"
+    try:
+        cs = datetime.strptime(class_start_time, "%I:%M %p")
+        duration = int(_old_read_settings(path).get("class_duration_minutes", 60))
+        class_end_time = (cs + timedelta(minutes=duration)).strftime("%I:%M %p")
+    except Exception:
+        pass
+    return class_start_time, class_end_time
+
+
+def _old_parse(time_str: str):
+    if not time_str or not isinstance(time_str, str):
+        return None
+    try:
+        return datetime.strptime(time_str.strip(), "%I:%M %p").time()
+    except Exception:
+        return None
+
+
+def _old_status(time_in: str, class_start_time: str, class_end_time: str, grace: int) -> str:
+    try:
+        if not time_in or not time_in.strip():
+            return "Late"
+        t, cs, ce = _old_parse(time_in), _old_parse(class_start_time), _old_parse(class_end_time)
+        if not all([t, cs, ce]):
+            return "Late"
+        if t > ce:
+            return "Late"
+        grace_end = (datetime.combine(datetime.today(), cs) + timedelta(minutes=grace)).time()
+        return "Present" if t <= grace_end else "Late"
+    except Exception:
+        return "Late"
+
+
+def _before(path: Path, rows):
+    start, end = _old_window(path, None, "03:00 PM")
+    return [_old_status(r.time_in_str, start, end, GRACE) for r in rows]
+
+
+# --- after ---
+def _after(rows):
+    sch = schedule.load_schedule(None, "03:00 PM", GRACE)
+    status = sch.status
+    return [status(r.time_in) for r in rows]
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main() -> None:
+    n = int(float(sys.argv[1])) if len(sys.argv) > 1 else 100_000
+    rows = _make_rows(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "settings.json"
+        path.write_text(json.dumps({"class_start_time": START, "class_duration_minutes": 90}), encoding="utf-8")
+        schedule.SETTINGS_JSON = path
+        schedule.invalidate()
+
+        if _before(path, rows) != _after(rows):
+            raise SystemExit("compiled schedule disagrees with determine_status")
+        old = _time(lambda: _before(path, rows))
+        new = _time(lambda: _after(rows))
+        window_old = _time(lambda: _old_window(path, None, "03:00 PM"), repeat=100)
+        window_new = _time(lambda: schedule.class_window(None, "03:00 PM"), repeat=100)
+
+    print(f"rows: {n:,}")
+    print(f"statuses      strptime {old * 1000:8.1f} ms   schedule {new * 1000:8.1f} ms   x{old / new:6.1f}")
+    print(f"class window  2 reads  {window_old * 1e6:8.1f} us   cached   {window_new * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
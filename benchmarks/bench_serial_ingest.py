@@ -0,0 +1,76 @@
+"""
+Sustained ingestion throughput over a pseudo-terminal, checked for zero loss.
+
+    python benchmarks/bench_serial_ingest.py [frames] [--checked] [--burst N] [--readers N]
+
+Simulated readers (arduino/rfid_simulator.py, one pty pair each) stand in for
+the Arduinos: a writer thread pushes `frames` scan lines into them as fast as
+the ptys accept them (optionally in bursts of N with 50 ms pauses) while
+IngestPipeline reads every slave side through pyserial and acknowledges each
+stored scan back to its reader. Reports scans/s, scans persisted vs sent, the
+FrameReader loss counters and scan-to-commit / scan-to-ack latency.
+Linux/macOS only (needs os.openpty).
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import serial  # noqa: E402
+
+from arduino.arduino_reader import IngestPipeline  # noqa: E402
+from arduino.rfid_simulator import open_readers, run_generated  # noqa: E402
+from arduino.serial_config import load_serial_config  # noqa: E402
+
+
+def main() -> None:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    frames = int(args[0]) if args else 50_000
+    checked = "--checked" in sys.argv
+    burst = int(sys.argv[sys.argv.index("--burst") + 1]) if "--burst" in sys.argv else 0
+    n_readers = int(sys.argv[sys.argv.index("--readers") + 1]) if "--readers" in sys.argv else 1
+
+    readers = open_readers(n_readers, checked)
+    ports = {r.reader_id: serial.Serial(r.port, 115200, timeout=0.2) for r in readers}
+
+    received = []
+    done = threading.Event()
+
+    def persist(batch):
+        received.extend(batch)
+        if len(received) >= frames:
+            done.set()
+
+    pipeline = IngestPipeline(ports, lambda frame, reader_id: tuple(frame.split(b",")), persist,
+                              load_serial_config(flush_delay=0.005, flush_max_batch=256, dedup_window=0))
+    threading.Thread(target=lambda: (done.wait(120), pipeline.stop()), daemon=True).start()
+
+    started = time.perf_counter()
+    writer = threading.Thread(target=run_generated, args=(readers, frames, 0.0, burst, 0.05), daemon=True)
+    writer.start()
+    asyncio.run(pipeline.run())
+    elapsed = time.perf_counter() - started
+
+    st = pipeline.stats()
+    print(f"frames sent {frames:,}  persisted {len(received):,}  lost {frames - len(received):,}  "
+          f"({'checked' if checked else 'plain'} frames, {n_readers} reader(s)"
+          f"{f', bursts of {burst}' if burst else ''})")
+    print(f"throughput {len(received) / elapsed:,.0f} scans/s over {elapsed:.2f} s")
+    print(f"framing {st['framing']}  max queue depth {st['max_queue_depth']}")
+    cl = st["commit_latency_ms"]
+    print(f"scan-to-commit p50 {cl['p50']:.1f} ms  p95 {cl['p95']:.1f} ms  max {cl['max']:.1f} ms")
+    al = st["ack_latency_ms"]
+    time.sleep(0.3)  # let the simulated readers drain the last replies
+    print(f"scan-to-ack    p50 {al['p50']:.1f} ms  p95 {al['p95']:.1f} ms  max {al['max']:.1f} ms  "
+          f"(readers received {sum(r.acks for r in readers):,} ACKs)")
+    for port in ports.values():
+        port.close()
+    for r in readers:
+        r.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Scalar vs NumPy status evaluation (core/status_engine.py) at 10^4..10^6 rows.
+
+    python benchmarks/bench_status_engine.py [max_rows]
+
+columns  history-style recompute: TimeIn strings, Status and ClassesAttended
+         columns -> new Status and ClassesAttended (Schedule.status_of in a
+         loop vs status_engine.recompute)
+roster   update_statuses' evaluation over StudentRecords with no fingerprints
+         yet, as on the first sync after a restart: every row is checked and
+         1 in 20 gets a new Status / ClassesAttended (written to an in-memory
+         store)
+
+Each size first checks that both paths produce identical results.
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import attendance_manager, status_engine  # noqa: E402
+from core.schedule import compile_schedule  # noqa: E402
+from database.student_record import StudentRecord, minutes_to_time  # noqa: E402
+
+SCHEDULE = compile_schedule("08:00 AM", "09:30 AM", 15)
+STATUSES = ("Present", "Late", "", "Absent", " Late")
+
+
+class _MemoryStore:
+    """Just the update_many() update_statuses needs, applied to a dict of rows."""
+
+    def __init__(self, rows):
+        self.by_id = {r.id: r.copy() for r in rows}
+
+    def update_many(self, changes):
+        for student_id, fields in changes.items():
+            self.by_id[student_id].update(fields)
+        return len(changes)
+
+
+def _columns(n: int):
+    time_in = ["" if i % 37 == 0 else minutes_to_time(7 * 60 + i % 200) for i in range(n)]
+    status = [STATUSES[i % len(STATUSES)] for i in range(n)]
+    attended = [i % 20 for i in range(n)]
+    return time_in, status, attended
+
+
+def _records(n: int):
+    time_in, _, attended = _columns(n)
+    rows = []
+    for i in range(n):
+        status = SCHEDULE.status_of(time_in[i]) if i % 20 else STATUSES[i // 20 % len(STATUSES)]
+        rows.append(StudentRecord.from_row({"ID": f"00-{i:07d}", "Name": f"Student {i}", "Status": status,
+                                            "ClassesAttended": attended[i], "TimeIn": time_in[i]}))
+    return rows
+
+
+def _scalar_columns(time_in, status, attended):
+    new_status = [SCHEDULE.status_of(t) for t in time_in]
+    new_attended = [a + (s.strip() not in ("Present", "Late")) for s, a in zip(status, attended)]
+    return new_status, new_attended
+
+
+def _roster(update, rows):
+    """Run one update_statuses pass; returns (elapsed, everything it produced)."""
+    attendance_manager._status_fingerprints.clear()
+    results = {"updated": 0, "checked": 0, "skipped": 0, "written": False, "changed": {}, "rows": [], "errors": []}
+    store = _MemoryStore(rows)
+    rows = [r.copy() for r in rows]
+    t = time.perf_counter()
+    update(store, rows, SCHEDULE, SCHEDULE.key, results)
+    elapsed = time.perf_counter() - t
+    return elapsed, (results, store.by_id, dict(attendance_manager._status_fingerprints))
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def _time_roster(update, rows, repeat: int) -> float:
+    return min(_roster(update, rows)[0] for _ in range(repeat))
+
+
+def main() -> None:
+    if not status_engine.available():
+        raise SystemExit("NumPy is not installed (pip install -r requirements.txt)")
+    max_rows = int(float(sys.argv[1])) if len(sys.argv) > 1 else 1_000_000
+    sizes = [n for n in (10_000, 100_000, 1_000_000) if n <= max_rows]
+    scalar = attendance_manager._update_statuses_scalar
+    vector = attendance_manager._update_statuses_vectorized
+    for n in sizes:
+        cols = _columns(n)
+        rows = _records(n)
+        if _scalar_columns(*cols) != status_engine.recompute(SCHEDULE, *cols):
+            raise SystemExit("columns: engines disagree")
+        if _roster(scalar, rows)[1] != _roster(vector, rows)[1]:
+            raise SystemExit("roster: engines disagree")
+        repeat = 3 if n <= 100_000 else 1
+        t_cols = (_time(lambda: _scalar_columns(*cols), repeat),
+                  _time(lambda: status_engine.recompute(SCHEDULE, *cols), repeat))
+        t_roster = (_time_roster(scalar, rows, repeat), _time_roster(vector, rows, repeat))
+        for label, (old, new) in (("columns", t_cols), ("roster", t_roster)):
+            print(f"{n:>9,} {label:<8} scalar {old * 1000:8.1f} ms   numpy {new * 1000:8.1f} ms   x{old / new:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Memory and full-read cost of roster rows: CSV-shaped dicts (before) vs StudentRecord (after).
+
+    python benchmarks/bench_student_record.py [rows]
+
+"before" replays the old read path: csv.DictReader rows, a dict copy in the
+store, another in get_all_attendance / get_all_students, and one more in
+DashboardController.get_students. "after" is read_csv_records plus the single
+StudentRecord.copy() the store hands out.
+"""
+import csv
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.scan_journal import FIELDNAMES, read_csv_records  # noqa: E402
+
+
+def _make_csv(path: Path, n: int) -> None:
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(FIELDNAMES)
+        for i in range(n):
+            hour = 7 + i % 3
+            w.writerow([f"00-{i:06d}", f"Student Number {i}", "Present" if i % 4 else "Late", i % 20,
+                        f"{hour}:{i % 60:02d} AM", f"{hour + 5 - 12 if hour + 5 > 12 else hour + 5}:{i % 60:02d} PM",
+                        f"assets/profiles/StudentNumber{i}.jpeg"])
+
+
+# --- before: CSV-shaped dicts copied at every layer ---
+def _read_dicts(path: Path):
+    with path.open(newline="", encoding="utf-8") as f:
+        return [r for r in csv.DictReader(f)]
+
+
+def _old_attendance(rows):
+    rows = [dict(r) for r in rows]  # StudentStore.rows()
+    return [{k: r.get(k, "") for k in FIELDNAMES} for r in rows]  # get_all_attendance
+
+
+def _old_students(rows):
+    rows = [dict(r) for r in rows]  # StudentStore.rows()
+    out = []
+    for r in rows:  # get_all_students
+        try:
+            attended = int(r.get("ClassesAttended", 0))
+        except Exception:
+            attended = 0
+        out.append({"id": r.get("ID", ""), "name": r.get("Name", ""), "photo": "/" + r.get("Img_Path", ""),
+                    "attended": attended, "classes_total": 20})
+    return [{**s, "attended": s.get("attended", 0), "classes_total": s.get("classes_total", 20)} for s in out]
+
+
+# --- after: one StudentRecord per row, one copy per read ---
+def _new_view(rows):
+    return [r.copy() for r in rows]
+
+
+def _measure_memory(load) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    rows = load()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    del rows
+    return size
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "Students_Data.csv"
+        _make_csv(path, n)
+
+        dict_rows = _read_dicts(path)
+        records = read_csv_records(path)
+
+        mem_dicts = _measure_memory(lambda: _read_dicts(path))
+        mem_records = _measure_memory(lambda: read_csv_records(path))
+
+        results = [
+            ("parse CSV", _time(lambda: _read_dicts(path)), _time(lambda: read_csv_records(path))),
+            ("attendance view", _time(lambda: _old_attendance(dict_rows)), _time(lambda: _new_view(records))),
+            ("students view", _time(lambda: _old_students(dict_rows)), _time(lambda: _new_view(records))),
+        ]
+
+    print(f"rows: {n:,}")
+    print(f"memory     dicts {mem_dicts / n:7.0f} B/row ({mem_dicts / 2**20:6.1f} MiB)   "
+          f"records {mem_records / n:7.0f} B/row ({mem_records / 2**20:6.1f} MiB)")
+    for label, old, new in results:
+        print(f"{label:<16} dicts {old * 1000:8.1f} ms   records {new * 1000:8.1f} ms   x{old / new if new else 0:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
-import csv
 from pathlib import Path
 from typing import Optional, Dict, Any, List
+from database.storage import get_backend
 
 DB_DIR = Path(__file__).resolve().parent.parent / "database"
 ADMIN_CSV = DB_DIR / "admin.csv"
@@ -11,31 +11,22 @@ def _ensure_db_dir():
 
 
 def _read_admin_csv() -> List[Dict[str, str]]:
-    if not ADMIN_CSV.exists():
-        return []
-    with ADMIN_CSV.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return [row for row in reader]
+    return get_backend().read_admins()
 
 
 def _write_admin_csv(rows: List[Dict[str, Any]]) -> None:
     _ensure_db_dir()
-    fieldnames = ["id", "username", "password"]
-    with ADMIN_CSV.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow({"id": int(r.get("id", 0)), "username": r.get("username", ""), "password": r.get("password", "")})
+    get_backend().write_admins(rows)
 
 
 def admin_login(username: str, password: str) -> bool:
     """
-    Return True if username/password pair exists in admin.csv
+    Return True if username/password pair exists in the admin store
     """
-    for row in _read_admin_csv():
-        if (row.get("username") or "") == (username or "") and (row.get("password") or "") == (password or ""):
-            return True
-    return False
+    row = get_backend().find_admin(username)
+    if row is None:
+        return False
+    return (row.get("username") or "") == (username or "") and (row.get("password") or "") == (password or "")
 
 
 def admin_signup(username: str, password: str) -> Dict[str, Any]:
@@ -43,18 +34,8 @@ def admin_signup(username: str, password: str) -> Dict[str, Any]:
     Add a new admin account and return the created record.
     Raises ValueError if username already exists.
     """
-    rows = _read_admin_csv()
-    for r in rows:
-        if (r.get("username") or "") == (username or ""):
-            raise ValueError("username already exists")
-    max_id = 0
-    for r in rows:
-        try:
-            max_id = max(max_id, int(r.get("id", 0)))
-        except Exception:
-            continue
-    new_id = max_id + 1
-    new_row = {"id": new_id, "username": username or "", "password": password or ""}
-    rows.append(new_row)
-    _write_admin_csv(rows)
-    return new_row
\ No newline at end of file
+    backend = get_backend()
+    if backend.find_admin(username) is not None:
+        raise ValueError("username already exists")
+    _ensure_db_dir()
+    return backend.insert_admin(username, password)
@@ -1,8 +1,15 @@
-import csv
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from datetime import datetime
 import json
+import os
+from core import schedule as schedule_cache
+from core import status_engine
+from core.schedule import Schedule, compile_schedule, load_schedule
+from core.student_store import get_store
+from database import history
+from database.student_record import StudentRecord
+from database.writer_service import call_writer
 
 DB_DIR = Path(__file__).resolve().parent.parent / "database"
 ATTENDANCE_CSV = DB_DIR / "Students_Data.csv"
@@ -16,47 +23,15 @@ def _ensure_db_dir():
         print(f"Error creating database directory: {e}")
 
 
-def _read_attendance_csv() -> List[Dict[str, str]]:
-    """Read Students_Data.csv safely"""
-    if not ATTENDANCE_CSV.exists():
-        return []
-
+def _read_attendance_csv() -> List[StudentRecord]:
+    """Read the roster from the shared StudentStore (loaded once, reloaded on file change) safely"""
     try:
-        with ATTENDANCE_CSV.open(newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            return [row for row in reader] if reader else []
+        return get_store().rows()
     except Exception as e:
         print(f"Error reading attendance CSV: {e}")
         return []
 
 
-def _write_attendance_csv(rows: List[Dict[str, str]]) -> None:
-    """Write updated attendance data back to Students_Data.csv"""
-    _ensure_db_dir()
-    fieldnames = ["ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut", "Img_Path"]
-    
-    try:
-        with ATTENDANCE_CSV.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in rows:
-                writer.writerow({k: row.get(k, "") for k in fieldnames})
-    except Exception as e:
-        print(f"Error writing attendance CSV: {e}")
-        raise
-
-
-def _parse_time(time_str: str) -> Optional[datetime.time]:
-    """Parse time string in format 'HH:MM AM/PM' to datetime.time"""
-    if not time_str or not isinstance(time_str, str):
-        return None
-    
-    try:
-        return datetime.strptime(time_str.strip(), "%I:%M %p").time()
-    except Exception:
-        return None
-
-
 def _is_time_in_range(time_to_check: Optional[datetime.time], class_start: Optional[datetime.time], class_end: Optional[datetime.time]) -> bool:
     """Check if time_to_check falls within class_start and class_end"""
     if not all([time_to_check, class_start, class_end]):
@@ -72,114 +47,168 @@ def determine_status(time_in: str, class_start_time: str, class_end_time: str, c
     - Missing or unparsable TimeIn -> "Late"
     - Within grace period -> "Present"
     - After grace (including after class end) -> "Late"
+    Rows already hold TimeIn as minutes; use compile_schedule(...).status(row.time_in)
+    when checking many of them.
     """
-    try:
-        # Treat missing/empty time as Late (Absent removed)
-        if not time_in or not time_in.strip():
-            return "Late"
-
-        time_in_parsed = _parse_time(time_in)
-        class_start_parsed = _parse_time(class_start_time)
-        class_end_parsed = _parse_time(class_end_time)
-
-        # If any time couldn't be parsed, consider Late
-        if not all([time_in_parsed, class_start_parsed, class_end_parsed]):
-            return "Late"
-
-        # If checked in after class end -> Late
-        if time_in_parsed > class_end_parsed:
-            return "Late"
-
-        # Grace period calculation
-        grace_end = datetime.combine(datetime.today(), class_start_parsed) + timedelta(minutes=class_start_grace_minutes)
-        grace_end_time = grace_end.time()
-
-        if time_in_parsed <= grace_end_time:
-            return "Present"
-        else:
-            return "Late"
-    except Exception as e:
-        print(f"Error determining status: {e}")
-        return "Late"
-
-
-def update_statuses(class_start_time: str, class_end_time: str, class_start_grace_minutes: int = 15) -> Dict[str, Any]:
+    return compile_schedule(class_start_time, class_end_time, class_start_grace_minutes).status_of(time_in)
+
+
+# Per-row status fingerprints: student ID -> (TimeIn, Schedule.key, Status) as of
+# the last recompute. A row whose fingerprint still matches cannot get a new
+# status, so update_statuses skips it; a new scan (TimeIn), an edited Status
+# or a schedule change makes it dirty again.
+_status_fingerprints: Dict[str, Tuple[Optional[int], tuple, str]] = {}
+
+
+def _record_change(pending: Dict[str, Dict[str, Any]], row: StudentRecord, fields: Dict[str, Any],
+                   old_status: str, new_status: str, results: Dict[str, Any]) -> None:
+    pending.setdefault(row.id, {}).update(fields)
+    row.update(fields)
+    results["changed"][row.id] = {"old": old_status, "new": new_status}
+    results["rows"].append(row.to_row())
+
+
+def _update_statuses_scalar(store, rows: List[StudentRecord], schedule: Schedule, key: tuple,
+                            results: Dict[str, Any]) -> None:
+    pending: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        old_status = row.status.strip()
+        if _status_fingerprints.get(row.id) == (row.time_in, key, old_status):
+            results["skipped"] += 1
+            continue
+        results["checked"] += 1
+        try:
+            new_status = schedule.status(row.time_in)
+            fields: Dict[str, Any] = {}
+            # Only increment when transitioning from non-present to present/late
+            if new_status in ("Present", "Late") and old_status not in ("Present", "Late"):
+                fields["ClassesAttended"] = row.classes_attended + 1
+            # Update status field to normalized value
+            if new_status != row.status:
+                fields["Status"] = new_status
+            if fields:
+                _record_change(pending, row, fields, old_status, new_status, results)
+            _status_fingerprints[row.id] = (row.time_in, key, new_status)
+        except Exception as e:
+            results["errors"].append(f"Row update error: {e}")
+    store.update_many(pending)
+
+
+def _update_statuses_vectorized(store, rows: List[StudentRecord], schedule: Schedule, key: tuple,
+                                results: Dict[str, Any]) -> None:
+    """
+    Same as _update_statuses_scalar with the statuses computed for all rows at
+    once by core/status_engine; the loop only reads the resulting masks.
+    """
+    minutes = status_engine.minutes_column([row.time_in for row in rows])
+    codes = status_engine.codes_column([row.status for row in rows])
+    present, increment, status_changed = (mask.tolist() for mask in status_engine.compute(schedule, minutes, codes))
+    pending: Dict[str, Dict[str, Any]] = {}
+    for i, row in enumerate(rows):
+        old_status = row.status.strip()
+        if _status_fingerprints.get(row.id) == (row.time_in, key, old_status):
+            results["skipped"] += 1
+            continue
+        results["checked"] += 1
+        try:
+            new_status = "Present" if present[i] else "Late"
+            fields: Dict[str, Any] = {}
+            if increment[i]:
+                fields["ClassesAttended"] = row.classes_attended + 1
+            if status_changed[i]:
+                fields["Status"] = new_status
+            if fields:
+                _record_change(pending, row, fields, old_status, new_status, results)
+            _status_fingerprints[row.id] = (row.time_in, key, new_status)
+        except Exception as e:
+            results["errors"].append(f"Row update error: {e}")
+    store.update_many(pending)
+
+
+def update_statuses(class_start_time: str, class_end_time: str, class_start_grace_minutes: int = 15,
+                    student_ids: Optional[Sequence[str]] = None) -> Dict[str, Any]:
     """
-    Recompute status for each student in Students_Data.csv based on TimeIn and class schedule.
+    Recompute status for the students in Students_Data.csv whose TimeIn, Status
+    or class schedule changed since the last call (only those in student_ids
+    when given, e.g. the rows the attendance watcher just saw change).
     - Updates Status field
     - Increments ClassesAttended when a student transitions from non-present to Present/Late
-    Returns results dict with counts and errors.
+    - Writes only the rows that changed, and nothing at all when none did
+    - RECORDSYNC_STATUS_ENGINE=vector evaluates the rows with NumPy (core/status_engine.py), same results
+    Returns results dict: "updated" (rows changed), "checked" / "skipped" (rows
+    recomputed / unchanged since the last call), "written", "changed"
+    ({id: {"old", "new"}}), "rows" (the changed rows, CSV-shaped, so callers can
+    refresh just those) and "errors".
     """
+    if student_ids is not None:
+        student_ids = list(dict.fromkeys(student_ids))
+    handled, remote = call_writer("update_statuses", class_start_time, class_end_time, class_start_grace_minutes,
+                                  student_ids)
+    if handled:
+        return remote
     _ensure_db_dir()
-    results = {"updated": 0, "errors": [], "changed": {}}
+    results = {"updated": 0, "checked": 0, "skipped": 0, "written": False, "changed": {}, "rows": [], "errors": []}
+    schedule = compile_schedule(class_start_time, class_end_time, class_start_grace_minutes)
+    key = schedule.key
+    store = get_store()
     try:
-        rows = _read_attendance_csv()
-        if not rows:
-            return results
-
-        # operate on list of dicts; preserve order
-        for row in rows:
-            try:
-                old_status = (row.get("Status") or "").strip()
-                time_in = (row.get("TimeIn") or "").strip()
-                new_status = determine_status(time_in, class_start_time, class_end_time, class_start_grace_minutes)
-                # Only increment when transitioning from non-present to present/late
-                if new_status in ("Present", "Late") and old_status not in ("Present", "Late"):
-                    try:
-                        ca = int(row.get("ClassesAttended") or 0)
-                    except Exception:
-                        ca = 0
-                    ca += 1
-                    row["ClassesAttended"] = str(ca)
-                # Update status field to normalized value
-                row["Status"] = new_status
-                results["changed"][row.get("ID", "")] = {"old": old_status, "new": new_status}
-                results["updated"] += 1
-            except Exception as e:
-                results["errors"].append(f"Row update error: {e}")
-        # write back
-        _write_attendance_csv(rows)
+        # one batch: the rows cannot change underneath us and the changes are written once
+        with store.batch():
+            if student_ids is None:
+                rows = store.rows()
+            else:
+                rows = [row for row in map(store.get, student_ids) if row is not None]
+            if status_engine.use_vector():
+                _update_statuses_vectorized(store, rows, schedule, key, results)
+            else:
+                _update_statuses_scalar(store, rows, schedule, key, results)
+            if student_ids is None and len(_status_fingerprints) > len(rows):
+                current = {row.id for row in rows}
+                for sid in [sid for sid in _status_fingerprints if sid not in current]:
+                    del _status_fingerprints[sid]
+        results["updated"] = len(results["changed"])
+        results["written"] = bool(results["changed"])
     except Exception as e:
+        _status_fingerprints.clear()  # the changes may not have been stored; recheck everything next time
         results["errors"].append(str(e))
         print(f"Error in update_statuses: {e}")
     return results
 
 
 # backward-compatible name
-def sync_students_data(class_start_time: Optional[str] = None, class_end_time: str = "03:00 PM", class_start_grace_minutes: int = 15) -> Dict[str, Any]:
+def sync_students_data(class_start_time: Optional[str] = None, class_end_time: str = "03:00 PM", class_start_grace_minutes: int = 15,
+                       student_ids: Optional[Sequence[str]] = None) -> Dict[str, Any]:
     """
-    Convenience wrapper that recomputes statuses for all rows.
+    Convenience wrapper that recomputes statuses for all rows (or just student_ids).
     If class_start_time is not provided, attempt to read from persisted settings.
     Also compute class_end_time from class_start_time + duration (settings) when possible.
     """
-    # resolve class_start_time from persisted settings when not provided
-    if not class_start_time:
-        s = read_settings()
-        class_start_time = s.get("class_start_time") or "08:00 AM"
+    schedule = load_schedule(class_start_time, class_end_time, class_start_grace_minutes)
+    return update_statuses(schedule.start_time, schedule.end_time, class_start_grace_minutes, student_ids)
 
-    # attempt to compute class_end_time based on duration stored in settings if class_start_time is valid
-    try:
-        # only compute when we have a parsable start time
-        cs_parsed_dt = datetime.strptime(class_start_time, "%I:%M %p")
-        # prefer duration from settings, fallback to 60 minutes
-        s = read_settings()
-        duration_min = int(s.get("class_duration_minutes", 60))
-        computed_end_dt = cs_parsed_dt + timedelta(minutes=duration_min)
-        class_end_time = computed_end_dt.strftime("%I:%M %p")
-    except Exception:
-        # leave provided/ default class_end_time unchanged if parsing fails
-        pass
 
-    return update_statuses(class_start_time, class_end_time, class_start_grace_minutes)
+def preview_statuses(rows: List[StudentRecord], class_start_time: Optional[str] = None, class_end_time: str = "03:00 PM", class_start_grace_minutes: int = 15) -> List[StudentRecord]:
+    """
+    Set Status on the given rows the way sync_students_data would, without writing anything.
+    Used by the attendance watcher to show freshly scanned rows before the next full sync.
+    """
+    schedule = load_schedule(class_start_time, class_end_time, class_start_grace_minutes)
+    for row in rows:
+        row.status = schedule.status(row.time_in)
+    return rows
 
 
 def logout_user(user_id: Optional[str] = None) -> Dict[str, Any]:
-    """Clear attendance CSV data only"""
+    """Archive the session into the day-partitioned history, then clear attendance CSV data"""
+    handled, remote = call_writer("logout_user", user_id)
+    if handled:
+        return remote
     _ensure_db_dir()
     
     results = {
         "status": "success",
         "records_deleted": 0,
+        "archived": None,
         "errors": []
     }
     
@@ -187,12 +216,11 @@ def logout_user(user_id: Optional[str] = None) -> Dict[str, Any]:
         attendance_rows = _read_attendance_csv()
         count = len(attendance_rows)
 
-        fieldnames = ["ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut", "Img_Path"]
+        # keep the session; if archiving fails nothing is cleared
+        results["archived"] = history.archive_session(attendance_rows)
 
-        # Clear CSV but keep file
-        with ATTENDANCE_CSV.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
+        # Clear roster (and any pending journaled scans) but keep file
+        get_store().clear()
 
         results["records_deleted"] = count
 
@@ -205,49 +233,48 @@ def logout_user(user_id: Optional[str] = None) -> Dict[str, Any]:
 
 
 
-def get_all_attendance() -> List[Dict[str, Any]]:
-    """Get all attendance records"""
+def get_all_attendance() -> List[StudentRecord]:
+    """Get all attendance records (the store already returns private copies)"""
     try:
-        rows = _read_attendance_csv()
-        return [{
-            "ID": r.get("ID", ""),
-            "Name": r.get("Name", ""),
-            "Status": r.get("Status", ""),
-            "ClassesAttended": r.get("ClassesAttended", "0"),
-            "TimeIn": r.get("TimeIn", ""),
-            "TimeOut": r.get("TimeOut", ""),
-            "Img_Path": r.get("Img_Path", ""),
-        } for r in rows]
+        return _read_attendance_csv()
     except Exception as e:
         print(f"Error in get_all_attendance: {e}")
         return []
 
 
-def get_student_attendance(name: str) -> Optional[Dict[str, Any]]:
-    """Get attendance record for a specific student"""
+def get_student_attendance(name: str) -> Optional[StudentRecord]:
+    """Get attendance record for a specific student (O(1) name-index lookup)"""
     try:
-        name = (name or "").strip()
-        for r in get_all_attendance():
-            if r.get("Name", "").strip().lower() == name.lower():
-                return r
+        return get_store().find_by_name(name)
     except Exception as e:
         print(f"Error in get_student_attendance: {e}")
     return None
 
 
-def get_attendance_summary() -> List[Dict[str, Any]]:
+def get_attendance_summary() -> List[StudentRecord]:
     """Compatibility helper"""
     return get_all_attendance()
 
 
 def write_settings(settings: Dict[str, Any]) -> None:
-    """Persist simple UI settings to disk (not required for runtime but useful for core to read)."""
+    """
+    Persist UI settings to disk. settings.json is shared (storage_backend,
+    the serial section, ...), so the given keys are merged into what is there
+    and the file is replaced atomically.
+    """
     _ensure_db_dir()
     try:
-        with SETTINGS_JSON.open("w", encoding="utf-8") as f:
-            json.dump(settings, f)
+        merged = read_settings()
+        merged.update(settings)
+        tmp = SETTINGS_JSON.with_suffix(".json.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(merged, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, SETTINGS_JSON)
     except Exception as e:
         print(f"Error writing settings: {e}")
+    schedule_cache.invalidate()
 
 
 def read_settings() -> Dict[str, Any]:
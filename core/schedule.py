@@ -0,0 +1,156 @@
+import json
+import math
+import threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from database import changes
+
+# -----------------------------
+# Compiled class schedule
+# -----------------------------
+# Status rules (see attendance_manager.determine_status), evaluated on
+# minutes since midnight:
+#   - no TimeIn, or a start/end time that does not parse -> "Late"
+#   - TimeIn after the class end                           -> "Late"
+#   - TimeIn at or before start + grace                    -> "Present"
+#   - otherwise                                            -> "Late"
+# A Schedule parses the class window once, and StudentRecord already keeps
+# TimeIn as minutes, so checking a row is two integer comparisons. The
+# window sync_students_data uses comes from settings.json, which is only
+# re-read when the file changes.
+
+DB_DIR = Path(__file__).resolve().parent.parent / "database"
+SETTINGS_JSON = DB_DIR / "settings.json"
+
+DEFAULT_CLASS_START = "08:00 AM"
+DEFAULT_DURATION_MINUTES = 60
+MINUTES_PER_DAY = 24 * 60
+
+
+def clock_minutes(value: Any) -> Optional[int]:
+    """'08:15 AM' -> minutes since midnight; None for anything else (12-hour clock only)."""
+    if not value or not isinstance(value, str):
+        return None
+    return _clock_minutes(value)
+
+
+@lru_cache(maxsize=1024)
+def _clock_minutes(value: str) -> Optional[int]:
+    try:
+        t = datetime.strptime(value.strip(), "%I:%M %p")
+    except ValueError:
+        return None
+    return t.hour * 60 + t.minute
+
+
+def format_clock(minutes: int) -> str:
+    """Inverse of clock_minutes ('08:15 AM', zero padded like strftime("%I:%M %p"))."""
+    hour, minute = divmod(minutes % MINUTES_PER_DAY, 60)
+    return f"{(hour % 12) or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+class Schedule:
+    """One class window, parsed: start, end and the grace cutoff as minutes since midnight."""
+
+    __slots__ = ("start_time", "end_time", "grace_minutes", "start", "end", "grace_end")
+
+    def __init__(self, start_time: str, end_time: str, grace_minutes: Any = 15):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.grace_minutes = grace_minutes
+        self.start = clock_minutes(start_time)
+        self.end = clock_minutes(end_time)
+        self.grace_end: Optional[int] = None
+        if self.start is not None and self.end is not None:
+            try:
+                # like time(start) + timedelta(grace): partial minutes round down, midnight wraps
+                self.grace_end = math.floor(self.start + grace_minutes) % MINUTES_PER_DAY
+            except (TypeError, ValueError, OverflowError):
+                self.grace_end = None
+
+    @property
+    def key(self) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """Two schedules with the same key give every row the same status."""
+        return self.start, self.end, self.grace_end
+
+    def status(self, time_in: Optional[int]) -> str:
+        """Status for a TimeIn given as minutes since midnight (None = not scanned)."""
+        if time_in is None or self.grace_end is None or time_in > self.end:
+            return "Late"
+        return "Present" if time_in <= self.grace_end else "Late"
+
+    def status_of(self, time_in: str) -> str:
+        """status() for a 'HH:MM AM/PM' string."""
+        return self.status(clock_minutes(time_in))
+
+    def __repr__(self) -> str:
+        return f"Schedule({self.start_time!r}, {self.end_time!r}, grace={self.grace_minutes!r})"
+
+
+@lru_cache(maxsize=64)
+def compile_schedule(start_time: str, end_time: str, grace_minutes: Any = 15) -> Schedule:
+    """Cached Schedule for these arguments."""
+    return Schedule(start_time, end_time, grace_minutes)
+
+
+# -----------------------------
+# Settings-backed schedule
+# -----------------------------
+_settings_lock = threading.Lock()
+_settings_sig: Optional[Tuple[int, int, int]] = None
+_settings: Dict[str, Any] = {}
+
+
+def settings() -> Dict[str, Any]:
+    """settings.json as a dict, read again only when the file changed (do not modify it)."""
+    global _settings_sig, _settings
+    sig = changes.path_signature(SETTINGS_JSON)
+    if sig == _settings_sig:
+        return _settings
+    with _settings_lock:
+        data: Dict[str, Any] = {}
+        if sig != changes.MISSING:
+            try:
+                with SETTINGS_JSON.open(encoding="utf-8") as f:
+                    loaded = json.load(f)
+                data = loaded if isinstance(loaded, dict) else {}
+            except Exception as e:
+                print(f"Error reading settings: {e}")
+                sig = None  # half-written file: try again next time
+        _settings, _settings_sig = data, sig
+        return data
+
+
+def invalidate() -> None:
+    """Forget the cached settings (after writing settings.json)."""
+    global _settings_sig
+    with _settings_lock:
+        _settings_sig = None
+
+
+def class_window(class_start_time: Optional[str] = None, class_end_time: str = "03:00 PM") -> Tuple[str, str]:
+    """
+    (start, end) as sync_students_data uses them: the start time defaults to
+    the configured one, and a parsable start makes the end start plus
+    class_duration_minutes (the given end is kept otherwise).
+    """
+    s = settings()
+    if not class_start_time:
+        class_start_time = s.get("class_start_time") or DEFAULT_CLASS_START
+    start = clock_minutes(class_start_time)
+    if start is not None:
+        try:
+            class_end_time = format_clock(start + int(s.get("class_duration_minutes", DEFAULT_DURATION_MINUTES)))
+        except (TypeError, ValueError):
+            pass
+    return class_start_time, class_end_time
+
+
+def load_schedule(class_start_time: Optional[str] = None, class_end_time: str = "03:00 PM",
+                  grace_minutes: Any = 15) -> Schedule:
+    """The compiled schedule for the current settings (see class_window)."""
+    start_time, end_time = class_window(class_start_time, class_end_time)
+    return compile_schedule(start_time, end_time, grace_minutes)
@@ -0,0 +1,118 @@
+import os
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple
+
+from core.schedule import Schedule, clock_minutes
+
+try:
+    import numpy as np
+except ImportError:  # optional: NumPy comes with pandas (requirements.txt)
+    np = None
+
+# -----------------------------
+# Vectorized status engine (optional, NumPy)
+# -----------------------------
+# The rules of Schedule.status and of update_statuses' ClassesAttended
+# increment, applied to whole columns at once for large rosters and history
+# recomputes:
+#   minutes    TimeIn as minutes since midnight, -1 when missing / unparsable
+#   codes      current Status: 0 "Present", 1 "Late", 2 "Present"/"Late" with
+#              stray whitespace, 3 anything else (not counted as attended yet)
+# compute() turns them into three boolean masks: who is Present now, whose
+# ClassesAttended goes up by one, and whose Status text changes.
+#
+# RECORDSYNC_STATUS_ENGINE picks the path update_statuses uses:
+#   scalar  the per-row loop (default)
+#   vector  NumPy (falls back to scalar without it)
+# Both give identical results (tests/test_status_engine.py and
+# benchmarks/bench_status_engine.py check). On plain columns the NumPy path is
+# about twice as fast; inside update_statuses only the status rules run on the
+# columns, while the fingerprint check and the per-row bookkeeping stay a
+# Python loop, so there it is no faster and stays opt-in.
+
+ENGINE_ENV = "RECORDSYNC_STATUS_ENGINE"
+ENGINES = ("scalar", "vector")
+
+CODE_PRESENT, CODE_LATE, CODE_COUNTED, CODE_OTHER = 0, 1, 2, 3
+_STATUS_NAMES = np.array(["Late", "Present"], dtype=object) if np is not None else None
+
+
+def available() -> bool:
+    return np is not None
+
+
+def engine() -> str:
+    name = os.environ.get(ENGINE_ENV, "scalar").strip().lower()
+    return name if name in ENGINES else "scalar"
+
+
+def use_vector() -> bool:
+    """Whether update_statuses should evaluate rows with NumPy."""
+    return engine() == "vector" and np is not None
+
+
+@lru_cache(maxsize=256)
+def status_code(status: str) -> int:
+    if status == "Present":
+        return CODE_PRESENT
+    if status == "Late":
+        return CODE_LATE
+    return CODE_COUNTED if status.strip() in ("Present", "Late") else CODE_OTHER
+
+
+def _minutes(value: Any) -> int:
+    if value is None:
+        return -1
+    if isinstance(value, int):
+        return value
+    minutes = clock_minutes(value)  # strings parse exactly like determine_status
+    return -1 if minutes is None else minutes
+
+
+# -----------------------------
+# Columns
+# -----------------------------
+# A roster holds a few hundred distinct times and a handful of statuses, so
+# each distinct value is converted once and the column is mapped through the
+# lookup table without running Python code per row.
+
+def minutes_column(values: Sequence[Any]):
+    """int32 array of minutes from TimeIn values (minutes, 'HH:MM AM/PM' strings or None)."""
+    lookup = {v: _minutes(v) for v in set(values)}
+    return np.fromiter(map(lookup.__getitem__, values), dtype=np.int32, count=len(values))
+
+
+def codes_column(statuses: Sequence[str]):
+    """int8 array of status codes (see the table above)."""
+    lookup = {s: status_code(s or "") for s in set(statuses)}
+    return np.fromiter(map(lookup.__getitem__, statuses), dtype=np.int8, count=len(statuses))
+
+
+def compute(schedule: Schedule, minutes, codes) -> Tuple[Any, Any, Any]:
+    """(present, increment, status_changed) boolean masks for the given columns."""
+    if schedule.grace_end is None:
+        present = np.zeros(len(minutes), dtype=bool)
+    else:
+        present = (minutes >= 0) & (minutes <= schedule.end) & (minutes <= schedule.grace_end)
+    # every new status is Present or Late, so anyone not already counted gets the increment
+    increment = codes == CODE_OTHER
+    status_changed = np.where(present, codes != CODE_PRESENT, codes != CODE_LATE)
+    return present, increment, status_changed
+
+
+def statuses(present) -> List[str]:
+    """Status strings for a present mask."""
+    return _STATUS_NAMES[present.view(np.int8)].tolist()
+
+
+def recompute(schedule: Schedule, time_in: Sequence[Any], status: Sequence[str],
+              attended: Optional[Sequence[int]] = None) -> Tuple[List[str], Optional[List[int]]]:
+    """
+    New Status (and ClassesAttended, when given) for plain columns, e.g. a
+    history partition recomputed under another schedule.
+    """
+    present, increment, _ = compute(schedule, minutes_column(time_in), codes_column(status))
+    new_attended = None
+    if attended is not None:
+        new_attended = (np.asarray(attended, dtype=np.int64) + increment).tolist()
+    return statuses(present), new_attended
@@ -1,13 +1,14 @@
 from pathlib import Path
 from typing import List, Dict, Any
-import csv
 import shutil
 import re
+from core.student_store import get_store
+from database.student_record import PLACEHOLDER_PHOTO, StudentRecord, resolve_photo_path
+from database.writer_service import call_writer
 
 DB_DIR = Path(__file__).resolve().parent.parent / "database"
 PROFILE_DIR = Path(__file__).resolve().parent.parent / "assets" / "profiles"
 STUDENTS_CSV = DB_DIR / "Students_Data.csv"
-PLACEHOLDER_PHOTO = "/assets/placeholder.png"  # Web path
 
 
 def _ensure_dirs():
@@ -15,41 +16,13 @@ def _ensure_dirs():
     PROFILE_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def _read_students_csv() -> List[Dict[str, str]]:
-    if not STUDENTS_CSV.exists():
-        return []
+def _read_students_csv() -> List[StudentRecord]:
     try:
-        with STUDENTS_CSV.open(newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            return [row for row in reader]
+        return get_store().rows()
     except Exception:
         return []
 
 
-def _write_students_csv(rows: List[Dict[str, str]]) -> None:
-    _ensure_dirs()
-    fieldnames = ["ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut", "Img_Path"]
-    with STUDENTS_CSV.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow({k: r.get(k, "") for k in fieldnames})
-
-
-def _next_id(rows: List[Dict[str, str]]) -> str:
-    max_num = 0
-    for r in rows:
-        digits = "".join(c for c in (r.get("ID") or "") if c.isdigit())
-        if digits:
-            try:
-                val = int(digits)
-                if val > max_num:
-                    max_num = val
-            except Exception:
-                pass
-    return f"00-{max_num + 1:03d}"
-
-
 def _copy_photo_to_profiles(photo_path: str) -> str:
     """Copy uploaded photo to PROFILE_DIR and return Web path for CSV"""
     if not photo_path:
@@ -70,97 +43,53 @@ def _copy_photo_to_profiles(photo_path: str) -> str:
 
 def _resolve_photo_path(img_path: str) -> str:
     """Return Web-ready path for Flet Web"""
-    if not img_path:
-        return PLACEHOLDER_PHOTO
-    path = str(img_path).replace("\\", "/")
-    if not path.startswith("/assets/"):
-        path = "/" + path
-    return path
+    return resolve_photo_path(img_path)
 
 
-def get_all_students() -> List[Dict[str, Any]]:
-    rows = _read_students_csv()
-    out: List[Dict[str, Any]] = []
+def get_all_students() -> List[StudentRecord]:
+    """StudentRecords answer the student shape directly (id, name, photo, attended, classes_total)"""
+    return _read_students_csv()
 
-    for r in rows:
-        photo = _resolve_photo_path(r.get("Img_Path", ""))
-        try:
-            attended = int(r.get("ClassesAttended", 0))
-        except Exception:
-            attended = 0
-        out.append(
-            {
-                "id": r.get("ID", ""),
-                "name": r.get("Name", ""),
-                "photo": photo,
-                "attended": attended,
-                "classes_total": 20,
-            }
-        )
-    return out
-
-
-def add_student(payload: Dict[str, Any]) -> Dict[str, Any]:
-    rows = _read_students_csv()
-    new_id = _next_id(rows)
+
+def add_student(payload: Dict[str, Any]) -> StudentRecord:
+    handled, result = call_writer("add_student", payload)
+    if handled:
+        return result
+    _ensure_dirs()
+    store = get_store()
+    new_id = store.next_id()
     attended = int(payload.get("attended", 0))
     photo_path = _copy_photo_to_profiles(payload.get("photo", ""))
 
-    row = {
-        "ID": new_id,
-        "Name": payload.get("name", "").strip(),
-        "Status": "",
-        "ClassesAttended": str(attended),
-        "TimeIn": "",
-        "TimeOut": "",
-        "Img_Path": photo_path,
-    }
-    rows.append(row)
-    _write_students_csv(rows)
-
-    return {
-        "id": row["ID"],
-        "name": row["Name"],
-        "photo": _resolve_photo_path(row["Img_Path"]),
-        "attended": attended,
-        "classes_total": 20,
-    }
-
-
-def update_student(student_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-    rows = _read_students_csv()
-    updated = None
-
-    for r in rows:
-        if r.get("ID") == student_id:
-            if "name" in payload:
-                r["Name"] = payload["name"].strip()
-            if "photo" in payload:
-                r["Img_Path"] = _copy_photo_to_profiles(payload["photo"])
-            if "attended" in payload:
-                try:
-                    r["ClassesAttended"] = str(int(payload["attended"]))
-                except Exception:
-                    pass
-            updated = r
-            break
+    row = StudentRecord(new_id, payload.get("name", "").strip(), "", attended, None, None, photo_path)
+    return store.insert(row)
+
 
+def update_student(student_id: str, payload: Dict[str, Any]) -> StudentRecord:
+    handled, result = call_writer("update_student", student_id, payload)
+    if handled:
+        return result
+    fields: Dict[str, str] = {}
+    if "name" in payload:
+        fields["Name"] = payload["name"].strip()
+    if "photo" in payload:
+        fields["Img_Path"] = _copy_photo_to_profiles(payload["photo"])
+    if "attended" in payload:
+        try:
+            fields["ClassesAttended"] = str(int(payload["attended"]))
+        except Exception:
+            pass
+
+    _ensure_dirs()
+    updated = get_store().update(student_id, fields)
     if updated is None:
         raise KeyError("student not found")
-    _write_students_csv(rows)
-
-    return {
-        "id": updated["ID"],
-        "name": updated["Name"],
-        "photo": _resolve_photo_path(updated["Img_Path"]),
-        "attended": int(updated.get("ClassesAttended") or 0),
-        "classes_total": 20,
-    }
+    return updated
 
 
 def delete_student(student_id: str) -> None:
-    rows = _read_students_csv()
-    new_rows = [r for r in rows if r.get("ID") != student_id]
-    if len(new_rows) == len(rows):
+    handled, _ = call_writer("delete_student", student_id)
+    if handled:
+        return
+    if not get_store().delete(student_id):
         raise KeyError("student not found")
-    _write_students_csv(new_rows)
@@ -0,0 +1,362 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import changes, scan_journal
+from database.storage import get_backend
+from database.student_record import StudentRecord
+
+
+def _normalize_name(name: str) -> str:
+    return (name or "").strip().lower()
+
+
+def _id_number(student_id: str) -> int:
+    digits = "".join(c for c in (student_id or "") if c.isdigit())
+    return int(digits) if digits else 0
+
+
+class _Undo:
+    """What one batch level changed, so an exception can roll just that level back."""
+
+    __slots__ = ("rows", "saved")
+
+    def __init__(self):
+        self.rows: Optional[List[StudentRecord]] = None  # roster order before the first insert/delete
+        self.saved: Dict[int, Tuple[StudentRecord, StudentRecord]] = {}  # id(row) -> (row, copy before)
+
+    def merge_into(self, parent: "_Undo") -> None:
+        """Hand this level's changes to the enclosing level (its older copies win)."""
+        if parent.rows is None:
+            parent.rows = self.rows
+        for key, entry in self.saved.items():
+            parent.saved.setdefault(key, entry)
+
+
+def _restore(row: StudentRecord, before: StudentRecord) -> None:
+    for name in StudentRecord.__slots__:
+        setattr(row, name, getattr(before, name))
+
+
+class StudentStore:
+    """
+    Process-wide in-memory roster shared by the core managers.
+
+    The roster is loaded from the storage backend once and kept with hash
+    indexes by ID and by normalized name plus a running max-ID counter.
+    It reloads only when the backend files change size/mtime behind our back
+    (e.g. the serial process journaled a scan).
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._lock = threading.RLock()
+        self._sig: Optional[tuple] = None
+        self._rows: List[StudentRecord] = []
+        self._base = scan_journal.RowList()  # what the rows were read from (CSV signature, journal offset)
+        self._by_id: Dict[str, StudentRecord] = {}
+        self._by_name: Dict[str, List[StudentRecord]] = {}
+        self._max_num = 0
+        # group commit: while > 0, mutations stay in memory until the batch ends;
+        # one undo log per open batch level
+        self._batch_depth = 0
+        self._dirty = False
+        self._undo: List[_Undo] = []
+        self.writes = 0  # completed writes to the backend (lets callers tell a no-op batch apart)
+
+    @property
+    def backend(self):
+        return self._backend if self._backend is not None else get_backend()
+
+    # -----------------------------
+    # Loading / invalidation
+    # -----------------------------
+    def _signature(self) -> tuple:
+        return changes.file_signature(self.backend.watch_paths())
+
+    def _index(self, rows: List[StudentRecord]) -> None:
+        self._rows = list(rows)
+        self._base = scan_journal.RowList().based_on(rows)
+        self._by_id = {}
+        self._by_name = {}
+        self._max_num = 0
+        for r in self._rows:
+            self._add_to_indexes(r)
+
+    def _add_to_indexes(self, row: StudentRecord) -> None:
+        self._by_id.setdefault(row.id, row)
+        self._by_name.setdefault(_normalize_name(row.name), []).append(row)
+        self._max_num = max(self._max_num, _id_number(row.id))
+
+    def _remove_from_indexes(self, row: StudentRecord) -> None:
+        sid = row.id
+        if self._by_id.get(sid) is row:
+            del self._by_id[sid]
+        key = _normalize_name(row.name)
+        same_name = [r for r in self._by_name.get(key, []) if r is not row]
+        if same_name:
+            self._by_name[key] = same_name
+        else:
+            self._by_name.pop(key, None)
+        if _id_number(sid) == self._max_num:
+            self._max_num = max((_id_number(r.id) for r in self._rows if r is not row), default=0)
+
+    def _ensure_loaded(self) -> None:
+        if self._batch_depth:
+            return  # in-memory rows are authoritative until the batch is committed
+        sig = self._signature()
+        if sig != self._sig:
+            self._index(self.backend.read_students())
+            self._sig = sig
+
+    def _after_write(self, stored: Optional[List[StudentRecord]] = None) -> None:
+        # our own write: re-index what was stored instead of re-reading the files
+        self.writes += 1
+        if stored is not None:
+            self._index(stored)
+        self._sig = self._signature()
+        changes.record_write(self._sig)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._sig = None
+
+    def _rows_for_write(self, rows: List[StudentRecord]) -> List[StudentRecord]:
+        return scan_journal.RowList(rows).based_on(self._base)
+
+    # -----------------------------
+    # Reads (return copies so callers cannot corrupt the indexes)
+    # -----------------------------
+    def rows(self) -> List[StudentRecord]:
+        with self._lock:
+            self._ensure_loaded()
+            return scan_journal.RowList(r.copy() for r in self._rows).based_on(self._base)
+
+    def get(self, student_id: str) -> Optional[StudentRecord]:
+        with self._lock:
+            self._ensure_loaded()
+            row = self._by_id.get(student_id)
+            return row.copy() if row is not None else None
+
+    def find_by_name(self, name: str) -> Optional[StudentRecord]:
+        """First row whose name matches case-insensitively (same as the old linear search)."""
+        with self._lock:
+            self._ensure_loaded()
+            matches = self._by_name.get(_normalize_name(name))
+            return matches[0].copy() if matches else None
+
+    def next_id(self) -> str:
+        with self._lock:
+            self._ensure_loaded()
+            return f"00-{self._max_num + 1:03d}"
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    @contextmanager
+    def batch(self):
+        """
+        Group commit: mutations inside the block are applied in memory and
+        written to the backend once, when the outermost block exits.
+        A block that raises is rolled back: a nested block undoes only its
+        own changes (the writer service runs each command in one), the
+        outermost one writes nothing.
+        """
+        with self._lock:
+            if not self._batch_depth:
+                self._ensure_loaded()
+            self._batch_depth += 1
+            undo = _Undo()
+            self._undo.append(undo)
+            try:
+                yield self
+            except BaseException:
+                self._undo.pop()
+                self._batch_depth -= 1
+                self._rollback(undo)
+                if not self._batch_depth:
+                    self._dirty = False
+                raise
+            self._undo.pop()
+            self._batch_depth -= 1
+            if self._batch_depth:
+                undo.merge_into(self._undo[-1])
+            elif self._dirty:
+                self._dirty = False
+                try:
+                    stored = self.backend.write_students(self._rows_for_write(self._rows))
+                except BaseException:
+                    self._sig = None  # memory is ahead of the backend: reload on next use
+                    raise
+                self._after_write(stored)
+
+    def _save_order(self) -> None:
+        # before rows are added, removed or replaced inside a batch
+        if self._undo and self._undo[-1].rows is None:
+            self._undo[-1].rows = list(self._rows)
+
+    def _save_row(self, row: StudentRecord) -> None:
+        # before a row is changed in place inside a batch
+        if self._undo:
+            self._undo[-1].saved.setdefault(id(row), (row, row.copy()))
+
+    def _rollback(self, undo: _Undo) -> None:
+        for row, before in undo.saved.values():
+            _restore(row, before)
+        base = self._base
+        self._index(undo.rows if undo.rows is not None else self._rows)
+        self._base = base
+
+    def _defer(self, rows: List[StudentRecord]) -> None:
+        self._save_order()
+        base = self._base
+        self._index(rows)
+        self._base = base
+        self._dirty = True
+
+    def replace_all(self, rows: List[Any]) -> None:
+        """Replace the roster with rows (StudentRecords or CSV-shaped dicts)."""
+        with self._lock:
+            if self._batch_depth:
+                self._defer([StudentRecord.from_row(r) for r in rows])
+                return
+            if getattr(rows, "csv_sig", None) is None:
+                rows = self._rows_for_write(rows)
+            self._after_write(self.backend.write_students(rows))
+
+    def _committed(self) -> None:
+        # in-memory indexes already reflect the change
+        if self._batch_depth:
+            self._dirty = True
+        else:
+            self._after_write()
+
+    def insert(self, row: Any) -> StudentRecord:
+        with self._lock:
+            self._ensure_loaded()
+            backend = self.backend
+            row = StudentRecord.from_row(row)
+            if self._batch_depth or backend.supports_row_ops:
+                if not self._batch_depth:
+                    backend.insert_student(row)
+                self._save_order()
+                self._rows.append(row)
+                self._add_to_indexes(row)
+                self._committed()
+            else:
+                self._after_write(backend.write_students(self._rows_for_write(self._rows + [row])))
+            return row.copy()
+
+    def update(self, student_id: str, fields: Dict[str, Any]) -> Optional[StudentRecord]:
+        with self._lock:
+            self._ensure_loaded()
+            current = self._by_id.get(student_id)
+            if current is None:
+                return None
+            backend = self.backend
+            if self._batch_depth or backend.supports_row_ops:
+                if not self._batch_depth:
+                    backend.update_student(student_id, fields)
+                self._update_in_place(current, fields)
+                self._committed()
+                return current.copy()
+            updated = current.copy()
+            updated.update(fields)
+            rows = [updated if r is current else r for r in self._rows]
+            self._after_write(backend.write_students(self._rows_for_write(rows)))
+            row = self._by_id.get(student_id)
+            return row.copy() if row is not None else None
+
+    def update_many(self, changes: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Apply {student_id: fields} as one batch: one lock, one backend write,
+        no copies handed back. Unknown IDs are skipped; returns how many rows
+        were updated.
+        """
+        if not changes:
+            return 0
+        with self._lock, self.batch():
+            updated = 0
+            for student_id, fields in changes.items():
+                current = self._by_id.get(student_id)
+                if current is not None:
+                    self._update_in_place(current, fields)
+                    updated += 1
+            if updated:
+                self._committed()
+            return updated
+
+    def _update_in_place(self, current: StudentRecord, fields: Dict[str, Any]) -> None:
+        self._save_row(current)
+        old_key = _normalize_name(current.name)
+        current.update(fields)
+        new_key = _normalize_name(current.name)
+        if new_key != old_key:
+            # re-file under the new name, keeping roster order within each bucket
+            self._by_name[old_key] = [r for r in self._by_name.get(old_key, []) if r is not current]
+            if not self._by_name[old_key]:
+                del self._by_name[old_key]
+            self._by_name[new_key] = [r for r in self._rows if _normalize_name(r.name) == new_key]
+
+    def delete(self, student_id: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            current = self._by_id.get(student_id)
+            if current is None:
+                return False
+            backend = self.backend
+            if self._batch_depth or backend.supports_row_ops:
+                if not self._batch_depth:
+                    backend.delete_student(student_id)
+                self._save_order()
+                self._rows = [r for r in self._rows if r.id != student_id]
+                self._remove_from_indexes(current)
+                self._committed()
+            else:
+                rows = [r for r in self._rows if r.id != student_id]
+                self._after_write(backend.write_students(self._rows_for_write(rows)))
+            return True
+
+    def record_scan(self, student_id: str, name: str, status: str, time_str: str) -> Optional[StudentRecord]:
+        """Apply one RFID scan (see scan_journal.apply_scan) and return the resulting row."""
+        with self._lock:
+            if self._batch_depth:
+                existing = self._by_id.get(student_id)
+                if existing is not None:
+                    self._save_row(existing)
+                else:
+                    self._save_order()
+                before = len(self._rows)
+                row = scan_journal.apply_scan(self._rows, self._by_id, time_str, student_id, name, status)
+                if len(self._rows) != before:
+                    # new student: apply_scan filled _rows/_by_id, finish the other indexes
+                    self._by_name.setdefault(_normalize_name(row.name), []).append(row)
+                    self._max_num = max(self._max_num, _id_number(student_id))
+                self._dirty = True
+                return row.copy()
+            # outside a batch the backend records it cheaply (journal append / one UPDATE);
+            # the changed file signature makes the next read pick it up
+            self.backend.record_scan(student_id, name, status, time_str)
+            return self.get(student_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._batch_depth:
+                self._defer([])
+                return
+            self.backend.clear_students()
+            self._after_write([])
+
+
+_store: Optional[StudentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> StudentStore:
+    """Return the process-wide StudentStore."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = StudentStore()
+    return _store
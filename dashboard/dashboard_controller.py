@@ -1,7 +1,10 @@
 from typing import List, Dict, Any, Optional
+from datetime import date
 import flet as ft
 from core.attendance_manager import sync_students_data, logout_user, get_all_attendance, write_settings
 from core.student_manager import get_all_students, add_student as _add_student_real, update_student as _update_student_real, delete_student as _delete_student_real
+from database import history
+from database.student_record import StudentRecord
 
 
 class DashboardController:
@@ -34,7 +37,7 @@ class DashboardController:
                 pass
 
     # Attendance: returns rows with time_in and time_out
-    def get_attendance_data(self) -> List[Dict[str, Any]]:
+    def get_attendance_data(self) -> List[StudentRecord]:
         try:
             data = get_all_attendance()
             return data
@@ -42,16 +45,10 @@ class DashboardController:
             print(f"Error loading attendance data: {e}")
             return []
 
-    # Students CRUD using core
-    def get_students(self) -> List[Dict[str, Any]]:
+    # Students CRUD using core (StudentRecords already carry attended / classes_total)
+    def get_students(self) -> List[StudentRecord]:
         try:
-            students = get_all_students()
-            enriched = []
-            for s in students:
-                attended = s.get("attended", 0)
-                total = s.get("classes_total", self._classes_per_quarter)
-                enriched.append({**s, "attended": attended, "classes_total": total})
-            return enriched
+            return get_all_students()
         except Exception as e:
             print(f"Error loading students: {e}")
             return []
@@ -151,11 +148,14 @@ class DashboardController:
         total_possible = sum(s.get("classes_total", self._classes_per_quarter) for s in students)
         total_absent = total_possible - total_present
         
+        # last four weeks from the archived sessions (history index only, no partition reads)
         weeks = []
-        for w in range(4):
-            p = max(0, int(total_present * (0.25 + (0.05 * (w - 1)))))
-            a = max(0, int((total_possible - total_present) * (0.25 + (0.03 * (3 - w)))))
-            weeks.append({"label": f"W{w+1}", "present": p, "absent": a})
+        try:
+            for w, b in enumerate(history.weekly_totals(date.today(), weeks=4)):
+                weeks.append({"label": f"W{w+1}", "present": b["present"], "absent": b["absent"]})
+        except Exception as e:
+            print(f"Error loading attendance history: {e}")
+            weeks = [{"label": f"W{w+1}", "present": 0, "absent": 0} for w in range(4)]
         
         return {
             "number_of_students": num_students,
@@ -520,8 +520,16 @@ def dashboard_view(page: ft.Page) -> ft.View:
 
     page.on_close = _on_close
 
+    def _on_rows_changed(rows: List[Dict[str, Any]]):
+        # new scans: patch the visible attendance table; other sections re-render as before
+        if _route_to_section(page.route or "/students") == "attendance" and \
+                attendance_ui.apply_attendance_changes(content_container.content, rows):
+            page.update()
+        else:
+            render()
+
     # Start attendance file watcher (idempotent)
-    attendance_ui.start_attendance_watcher(page, controller, lambda: render())
+    attendance_ui.start_attendance_watcher(page, controller, lambda: render(), on_rows_changed=_on_rows_changed)
 
     # Default route handling: ensure we land on /students when route is empty or "/"
     if page.route in ("", "/"):
@@ -0,0 +1,138 @@
+import csv
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+if __package__ in (None, ""):
+    # allow "python database/card_registry.py enroll ..."
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import changes
+
+# -----------------------------
+# Card registry
+# -----------------------------
+# Readers may send only the card UID (e.g. "04A1B2C3"). cards.csv maps each
+# UID to a student, so enrolling a card is an edit to this file instead of a
+# firmware reflash:
+#
+#   UID,ID,Name
+#   04A1B2C3,00-001,Juan Dela Cruz
+#
+# Name may be left empty. The file is loaded into a dict (O(1) lookups) and
+# reloaded automatically when it changes; lookups check the file at most once
+# per RELOAD_CHECK_SECONDS.
+
+DB_DIR = Path(__file__).resolve().parent
+CARDS_CSV = DB_DIR / "cards.csv"
+CARD_FIELDS = ["UID", "ID", "Name"]
+RELOAD_CHECK_SECONDS = 1.0
+
+CardEntry = Tuple[str, str]  # (student_id, name)
+
+
+def normalize_uid(uid: str) -> str:
+    """'04:a1:b2:c3' / '04 A1 B2 C3' -> '04A1B2C3'; '' when it is not a hex UID."""
+    value = "".join(c for c in str(uid or "") if c not in ": -").upper()
+    if not value or len(value) % 2 or any(c not in "0123456789ABCDEF" for c in value):
+        return ""
+    return value
+
+
+class CardRegistry:
+    """UID -> (student_id, name) from cards.csv, reloaded when the file changes."""
+
+    def __init__(self, path: Path = CARDS_CSV):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._cards: Dict[str, CardEntry] = {}
+        self._sig: Optional[tuple] = None
+        self._checked = 0.0
+        self.reloads = 0
+
+    def lookup(self, uid: str) -> Optional[CardEntry]:
+        now = time.monotonic()
+        if now - self._checked >= RELOAD_CHECK_SECONDS:
+            self._checked = now
+            self.reload_if_changed()
+        return self._cards.get(uid)
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def reload_if_changed(self) -> bool:
+        sig = changes.path_signature(self.path)
+        if sig == self._sig:
+            return False
+        with self._lock:
+            cards = self._read() if sig != changes.MISSING else {}
+            self._cards = cards  # swapped in one assignment; lookups never see a half-built map
+            self._sig = sig
+            self.reloads += 1
+        if sig != changes.MISSING:
+            print(f"Loaded {len(cards)} cards from {self.path.name}")
+        return True
+
+    def _read(self) -> Dict[str, CardEntry]:
+        cards: Dict[str, CardEntry] = {}
+        try:
+            with self.path.open(newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    uid = normalize_uid(row.get("UID", ""))
+                    student_id = (row.get("ID") or "").strip()
+                    if uid and student_id:
+                        cards[uid] = (student_id, (row.get("Name") or "").strip())
+                    elif any((v or "").strip() for v in row.values() if isinstance(v, str)):
+                        print(f"Skipping bad card entry in {self.path.name}: {row}")
+        except Exception as e:
+            print(f"Error reading {self.path.name}: {e}")
+            return dict(self._cards)  # keep serving the last good map
+        return cards
+
+    def entries(self) -> List[List[str]]:
+        self.reload_if_changed()
+        return [[uid, sid, name] for uid, (sid, name) in sorted(self._cards.items())]
+
+
+def enroll_cards(entries: List[Tuple[str, str, str]], path: Path = CARDS_CSV) -> int:
+    """
+    Add or re-assign (uid, student_id, name) cards in cards.csv with one atomic
+    rewrite. Returns how many entries were valid and stored.
+    """
+    cards = CardRegistry(path)._read() if Path(path).exists() else {}
+    stored = 0
+    for uid, student_id, name in entries:
+        uid = normalize_uid(uid)
+        if not uid or not (student_id or "").strip():
+            continue
+        cards[uid] = (student_id.strip(), (name or "").strip())
+        stored += 1
+    tmp = Path(path).with_suffix(".csv.tmp")
+    with tmp.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CARD_FIELDS)
+        writer.writerows(sorted([u, sid, n] for u, (sid, n) in cards.items()))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return stored
+
+
+def enroll_card(uid: str, student_id: str, name: str = "", path: Path = CARDS_CSV) -> bool:
+    """Add or re-assign one card; False when the UID is invalid."""
+    return enroll_cards([(uid, student_id, name)], path) == 1
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) >= 3 and args[0] == "enroll":
+        ok = enroll_card(args[1], args[2], " ".join(args[3:]))
+        print("enrolled" if ok else f"invalid card UID: {args[1]}")
+    elif args[:1] == ["list"]:
+        for entry in CardRegistry().entries():
+            print(",".join(entry))
+    else:
+        print("usage: python database/card_registry.py enroll <UID> <student ID> [name] | list")
@@ -0,0 +1,100 @@
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from utils.metrics import counter
+
+# -----------------------------
+# Versioned change events
+# -----------------------------
+# Every write the StudentStore commits in this process (scans appended by the
+# serial loop aside) bumps a monotonic version and is tagged with its origin:
+# whoever wraps the call in write_origin(name) on that thread (the attendance
+# watcher around its status sync, say). The file signature the write left
+# behind is kept per origin.
+#
+# A tail reader opened for an origin compares what it finds on disk with that
+# signature. A match means nothing but the component's own write happened
+# since it last looked, so the change is absorbed without being reported and
+# the component does not wake itself up again. Any other write, before or
+# after ours, leaves a different signature and is reported as usual.
+#
+# Writes sent to the writer service are recorded in the calling process when
+# the writer reports a new data version (see writer_service.call_writer).
+
+FileSig = Tuple[int, int, int]
+Signature = Tuple[FileSig, ...]
+MISSING: FileSig = (0, 0, -1)
+
+_local = threading.local()
+_lock = threading.Lock()
+_version = 0
+_last: Dict[str, Tuple[int, Signature]] = {}  # origin -> (version, signature after its last write)
+
+
+def path_signature(path: Path) -> FileSig:
+    """
+    (inode, mtime_ns, size) of one file, MISSING when it does not exist. Any
+    write or atomic replace changes it; the modules that reload a file when
+    it changes all compare these.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return MISSING
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def file_signature(paths: Iterable[Path]) -> Signature:
+    """path_signature of each path."""
+    return tuple(path_signature(p) for p in paths)
+
+
+def current_origin() -> Optional[str]:
+    return getattr(_local, "origin", None)
+
+
+@contextmanager
+def write_origin(origin: str) -> Iterator[None]:
+    """Tag the writes made on this thread inside the block as origin's."""
+    previous = current_origin()
+    _local.origin = origin
+    try:
+        yield
+    finally:
+        _local.origin = previous
+
+
+def record_write(signature: Signature) -> int:
+    """Note a completed write that left `signature` on disk; returns the new version."""
+    global _version
+    origin = current_origin()
+    with _lock:
+        _version += 1
+        if origin is not None:
+            _last[origin] = (_version, signature)
+        return _version
+
+
+def version() -> int:
+    """Number of writes this process has made so far."""
+    return _version
+
+
+def last_write(origin: str) -> Optional[Tuple[int, Signature]]:
+    """(version, signature) of origin's most recent write, or None."""
+    return _last.get(origin)
+
+
+def is_own_write(origin: Optional[str], signature: Signature) -> bool:
+    """True when `signature` is exactly what origin's last write left on disk."""
+    if origin is None:
+        return False
+    own = _last.get(origin)
+    if own is None or own[1] != signature:
+        return False
+    counter("recordsync_own_writes_ignored_total",
+            "Changes a tail reader absorbed because its own component made them", origin=origin).inc()
+    return True
@@ -0,0 +1,310 @@
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from database import changes, scan_journal
+from database.scan_journal import journal_lock
+from database.storage import CsvBackend, SnapshotTail, _next_student_id
+from database.student_record import StudentRecord
+
+# -----------------------------
+# Fixed-width memory-mapped roster
+# -----------------------------
+# Students_Data.bin holds one fixed-size record per student, so a scan
+# rewrites only that student's bytes (pack_into on the mapping) instead of the
+# whole CSV. Every process maps the same file; readers decode straight from the
+# mapping without copying it.
+#
+#   header: magic "RSRO", format version, record size (8 bytes, little endian)
+#   record: live flag, ID, Name, Status, ClassesAttended, TimeIn, TimeOut, Img_Path
+#
+# TimeIn/TimeOut are stored as minutes since midnight (0xFFFF = empty) and
+# rendered back as "4:32 PM"; a time that does not parse has no minutes and
+# is stored as empty (the CSV and SQLite backends keep its text). Deleted records only clear their live flag;
+# compact() rewrites the file without them. Admins stay in admin.csv.
+
+DB_DIR = Path(__file__).resolve().parent
+ROSTER_BIN = DB_DIR / "Students_Data.bin"
+
+MAGIC = b"RSRO"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+_RECORD = struct.Struct("<B15s64s12sIHH128s")
+HEADER_SIZE = _HEADER.size
+RECORD_SIZE = _RECORD.size
+NO_TIME = 0xFFFF
+
+# byte offsets inside a record, for in-place field updates
+_OFF_TIMES = 1 + 15 + 64 + 12 + 4
+_TIMES = struct.Struct("<HH")
+
+
+def _encode_text(value: Any, size: int) -> bytes:
+    data = str(value or "").encode("utf-8")
+    if len(data) > size:
+        # cut on a character boundary so the stored name still decodes
+        data = data[:size].decode("utf-8", errors="ignore").encode("utf-8")
+    return data
+
+
+def _decode_text(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("utf-8", errors="replace")
+
+
+def pack_record(row: Any) -> bytes:
+    r = row if isinstance(row, StudentRecord) else StudentRecord.from_row(row)
+    return _RECORD.pack(
+        1,
+        _encode_text(r.id, 15),
+        _encode_text(r.name, 64),
+        _encode_text(r.status, 12),
+        max(0, r.classes_attended),
+        NO_TIME if r.time_in is None else r.time_in,
+        NO_TIME if r.time_out is None else r.time_out,
+        _encode_text(r.img_path, 128),
+    )
+
+
+def unpack_record(rec: tuple) -> StudentRecord:
+    _, sid, name, status, attended, time_in, time_out, img = rec
+    return StudentRecord(
+        _decode_text(sid),
+        _decode_text(name),
+        _decode_text(status),
+        attended,
+        None if time_in == NO_TIME else time_in,
+        None if time_out == NO_TIME else time_out,
+        _decode_text(img),
+    )
+
+
+def _write_file(path: Path, rows: List[Any]) -> None:
+    tmp = path.with_suffix(".bin.tmp")
+    with tmp.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, RECORD_SIZE))
+        f.write(b"".join(pack_record(r) for r in rows))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class FixedWidthBackend(CsvBackend):
+    """Students_Data.bin (fixed-width records, mmap'ed) plus admin.csv."""
+
+    name = "fixed"
+    # every row op touches one record in place
+    supports_row_ops = True
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or ROSTER_BIN)
+        self._lock = threading.RLock()
+        self._mm: Optional[mmap.mmap] = None
+        self._sig = (0, 0, 0)  # (ino, mtime_ns, size) of the mapped file
+        self._slots: Dict[str, int] = {}  # ID -> record number
+        if not self.path.exists():
+            _write_file(self.path, [])
+
+    # -----------------------------
+    # Mapping
+    # -----------------------------
+    def _unmap(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _sync(self) -> None:
+        """(Re)map and re-index when another process replaced, extended or edited the file."""
+        sig = changes.path_signature(self.path)
+        if self._mm is not None and sig == self._sig:
+            return
+        self._unmap()
+        with self.path.open("r+b") as f:
+            self._mm = mmap.mmap(f.fileno(), 0)
+        magic, version, rec_size = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or rec_size != RECORD_SIZE:
+            self._unmap()
+            raise ValueError(f"{self.path.name} is not a version {FORMAT_VERSION} roster file")
+        self._sig = sig
+        self._slots = {}
+        for i, rec in enumerate(self._records()):
+            if rec[0]:
+                self._slots.setdefault(_decode_text(rec[1]), i)
+
+    def _count(self) -> int:
+        return (self._sig[2] - HEADER_SIZE) // RECORD_SIZE
+
+    def _records(self) -> List[tuple]:
+        # unpacked straight from the mapping; the memoryview is released before returning
+        with memoryview(self._mm) as mv:
+            body = mv[HEADER_SIZE:HEADER_SIZE + self._count() * RECORD_SIZE]
+            try:
+                return list(_RECORD.iter_unpack(body))
+            finally:
+                body.release()
+
+    def _offset(self, slot: int) -> int:
+        return HEADER_SIZE + slot * RECORD_SIZE
+
+    def _read_slot(self, slot: int) -> StudentRecord:
+        return unpack_record(_RECORD.unpack_from(self._mm, self._offset(slot)))
+
+    def _append(self, rows: List[Any]) -> None:
+        if not rows:
+            return
+        self._unmap()
+        with self.path.open("r+b") as f:
+            f.seek(self._offset(self._count()))
+            f.write(b"".join(pack_record(r) for r in rows))
+            f.flush()
+            os.fsync(f.fileno())
+        self._sync()
+
+    def _commit(self) -> None:
+        """Flush dirty pages and bump the mtime so other processes notice the change."""
+        if self._mm is not None:
+            self._mm.flush()
+        os.utime(self.path)
+        self._sig = changes.path_signature(self.path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._unmap()
+
+    # -----------------------------
+    # Students
+    # -----------------------------
+    def read_students(self) -> List[StudentRecord]:
+        with self._lock:
+            self._sync()
+            return [unpack_record(rec) for rec in self._records() if rec[0]]
+
+    def write_students(self, rows: List[Any]) -> List[StudentRecord]:
+        with self._lock, journal_lock():
+            self._unmap()
+            _write_file(self.path, rows)
+            self._sync()
+            # what was stored (times normalized, long values truncated)
+            return [unpack_record(rec) for rec in self._records() if rec[0]]
+
+    def clear_students(self) -> None:
+        self.write_students([])
+
+    def get_student(self, student_id: str) -> Optional[StudentRecord]:
+        with self._lock:
+            self._sync()
+            slot = self._slots.get(student_id)
+            return self._read_slot(slot) if slot is not None else None
+
+    def next_student_id(self) -> str:
+        with self._lock:
+            self._sync()
+            return _next_student_id(self._slots)
+
+    def insert_student(self, row: Any) -> None:
+        with self._lock, journal_lock():
+            self._sync()
+            self._append([row])
+            self._commit()
+
+    def update_student(self, student_id: str, fields: Dict[str, Any]) -> Optional[StudentRecord]:
+        with self._lock, journal_lock():
+            self._sync()
+            slot = self._slots.get(student_id)
+            if slot is None:
+                return None
+            row = self._read_slot(slot)
+            row.update(fields)
+            self._mm[self._offset(slot):self._offset(slot) + RECORD_SIZE] = pack_record(row)
+            if row.id != student_id:
+                del self._slots[student_id]
+                self._slots.setdefault(row.id, slot)
+            self._commit()
+            return row
+
+    def delete_student(self, student_id: str) -> bool:
+        with self._lock, journal_lock():
+            self._sync()
+            slot = self._slots.pop(student_id, None)
+            if slot is None:
+                return False
+            self._mm[self._offset(slot)] = 0
+            self._commit()
+            return True
+
+    # -----------------------------
+    # Scans
+    # -----------------------------
+    def record_scan(self, student_id: str, name: str, status: str, time_str: str) -> None:
+        self.record_scans([(student_id, name, status, time_str)])
+
+    def record_scans(self, scans: List[tuple]) -> List[StudentRecord]:
+        """
+        Apply (student_id, name, status, time_str) scans. Known students are
+        updated in place; a TimeOut scan only rewrites the record's 4 time bytes.
+        Returns the row each scan produced, in order.
+        """
+        with self._lock, journal_lock():
+            self._sync()
+            new_rows: List[StudentRecord] = []
+            new_index: Dict[str, StudentRecord] = {}
+            results: List[StudentRecord] = []
+            for student_id, name, status, time_str in scans:
+                slot = self._slots.get(student_id)
+                if slot is None:
+                    row = scan_journal.apply_scan(new_rows, new_index, time_str, student_id, name, status)
+                    results.append(row.copy())
+                    continue
+                row = self._read_slot(slot)
+                had_time_in = row.time_in is not None
+                scan_journal.apply_scan([row], {student_id: row}, time_str, student_id, name, status)
+                off = self._offset(slot)
+                if had_time_in:
+                    _TIMES.pack_into(self._mm, off + _OFF_TIMES, row.time_in,
+                                     NO_TIME if row.time_out is None else row.time_out)
+                else:
+                    self._mm[off:off + RECORD_SIZE] = pack_record(row)
+                results.append(row.copy())
+            self._append(new_rows)
+            self._commit()
+            return results
+
+    def pending_bytes(self) -> int:
+        """Bytes held by deleted records (reclaimed by compact())."""
+        with self._lock:
+            self._sync()
+            return (self._count() - len(self._slots)) * RECORD_SIZE
+
+    def compact(self) -> int:
+        reclaimed = self.pending_bytes()
+        if reclaimed:
+            self.write_students(self.read_students())
+        return reclaimed
+
+    def watch_paths(self) -> List[Path]:
+        return [self.path]
+
+    def tail_reader(self, origin: Optional[str] = None):
+        # records are rewritten in place, there is no appended tail to follow
+        return SnapshotTail(self, origin)
+
+
+def import_students_from_csv(backend: FixedWidthBackend) -> Dict[str, Any]:
+    """Load Students_Data.csv (+ pending journal scans) into the binary roster."""
+    students = CsvBackend().read_students()
+    backend.write_students(students)
+    return {"status": "migrated", "students": len(students)}
+
+
+def open_fixed_backend() -> FixedWidthBackend:
+    """Open Students_Data.bin, importing the CSV roster the first time."""
+    fresh = not ROSTER_BIN.exists()
+    backend = FixedWidthBackend()
+    if fresh:
+        try:
+            import_students_from_csv(backend)
+        except Exception as e:
+            print(f"Error importing CSV roster into {ROSTER_BIN.name}: {e}")
+    return backend
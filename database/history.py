@@ -0,0 +1,241 @@
+import bisect
+import csv
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# -----------------------------
+# Day-partitioned attendance history
+# -----------------------------
+# logout_user archives the session's roster before clearing it. Each day gets
+# its own partition file, history/YYYY/YYYY-MM-DD.csv (one row per student per
+# session), and history/index.json lists the dates that exist with per-day
+# totals. Range queries open only the partitions inside the range, and the
+# analytics summaries are answered from the index alone.
+#
+# A session is named after the time it was archived (HHMMSS); a second
+# session archived in the same second on the same day gets "-2", "-3", ...
+
+DB_DIR = Path(__file__).resolve().parent
+HISTORY_DIR = DB_DIR / "history"
+INDEX_FILE = HISTORY_DIR / "index.json"
+
+HISTORY_FIELDS = ["Session", "ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut"]
+INDEX_VERSION = 1
+
+DateLike = Union[date, datetime, str]
+
+_lock = threading.Lock()
+_index_cache: Dict[str, Any] = {"mtime_ns": None, "days": {}, "dates": []}
+
+
+def _to_date(value: DateLike) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+
+
+def partition_path(day: DateLike) -> Path:
+    d = _to_date(day)
+    return HISTORY_DIR / f"{d.year:04d}" / f"{d.isoformat()}.csv"
+
+
+def _session_ids(path: Path) -> set:
+    """Session names already used in a partition."""
+    try:
+        with path.open(newline="", encoding="utf-8") as f:
+            return {r.get("Session", "") for r in csv.DictReader(f)}
+    except FileNotFoundError:
+        return set()
+
+
+def _unique_session(path: Path, base: str) -> str:
+    taken = _session_ids(path)
+    session, n = base, 1
+    while session in taken:
+        n += 1
+        session = f"{base}-{n}"
+    return session
+
+
+def _attended(row: Dict[str, Any]) -> bool:
+    return bool((row.get("TimeIn") or "").strip())
+
+
+# -----------------------------
+# Index
+# -----------------------------
+def _load_index() -> Dict[str, Any]:
+    """Return {"days": {iso_date: totals}, "dates": sorted iso dates}, cached until the file changes."""
+    try:
+        mtime = INDEX_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {"mtime_ns": None, "days": {}, "dates": []}
+    if _index_cache["mtime_ns"] == mtime:
+        return _index_cache
+    try:
+        with INDEX_FILE.open(encoding="utf-8") as f:
+            data = json.load(f)
+        days = data.get("days", {}) if isinstance(data, dict) else {}
+    except Exception as e:
+        print(f"Error reading history index: {e}")
+        days = {}
+    _index_cache.update(mtime_ns=mtime, days=days, dates=sorted(days))
+    return _index_cache
+
+
+def _save_index(days: Dict[str, Any]) -> None:
+    tmp = INDEX_FILE.with_suffix(".json.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "days": days}, f, indent=1, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, INDEX_FILE)
+
+
+def available_dates(start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> List[str]:
+    """ISO dates that have archived sessions, optionally limited to [start, end]."""
+    dates = _load_index()["dates"]
+    lo = bisect.bisect_left(dates, _to_date(start).isoformat()) if start is not None else 0
+    hi = bisect.bisect_right(dates, _to_date(end).isoformat()) if end is not None else len(dates)
+    return dates[lo:hi]
+
+
+def rebuild_index() -> Dict[str, Any]:
+    """Recreate index.json by scanning every partition (repair tool; normal writes keep it current)."""
+    days: Dict[str, Any] = {}
+    for path in sorted(HISTORY_DIR.glob("*/*.csv")):
+        totals = {"sessions": 0, "rows": 0, "attended": 0, "present": 0, "late": 0}
+        sessions = set()
+        for r in _read_partition(path):
+            sessions.add(r.get("Session", ""))
+            _add_to_totals(totals, r)
+        totals["sessions"] = len(sessions)
+        days[path.stem] = totals
+    with _lock:
+        _save_index(days)
+    return {"days": len(days)}
+
+
+def _add_to_totals(totals: Dict[str, int], row: Dict[str, Any]) -> None:
+    totals["rows"] += 1
+    if _attended(row):
+        totals["attended"] += 1
+    status = (row.get("Status") or "").strip().lower()
+    if status == "present":
+        totals["present"] += 1
+    elif status == "late":
+        totals["late"] += 1
+
+
+# -----------------------------
+# Writes
+# -----------------------------
+def archive_session(rows: List[Dict[str, Any]], when: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Append one session's roster to the partition for its day and update the index.
+    Returns {"date", "session", "rows"}.
+    """
+    when = when or datetime.now()
+    day = when.date().isoformat()
+    session = when.strftime("%H%M%S")
+    if not rows:
+        return {"date": day, "session": session, "rows": 0}
+
+    path = partition_path(day)
+    with _lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        session = _unique_session(path, session)
+        new_file = not path.exists() or path.stat().st_size == 0
+        with path.open("a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS)
+            if new_file:
+                writer.writeheader()
+            for r in rows:
+                writer.writerow({"Session": session, **{k: r.get(k, "") for k in HISTORY_FIELDS[1:]}})
+            f.flush()
+            os.fsync(f.fileno())
+
+        days = dict(_load_index()["days"])
+        totals = dict(days.get(day) or {"sessions": 0, "rows": 0, "attended": 0, "present": 0, "late": 0})
+        totals["sessions"] += 1
+        for r in rows:
+            _add_to_totals(totals, r)
+        days[day] = totals
+        _save_index(days)
+    return {"date": day, "session": session, "rows": len(rows)}
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def _read_partition(path: Path) -> List[Dict[str, str]]:
+    try:
+        with path.open(newline="", encoding="utf-8") as f:
+            return [r for r in csv.DictReader(f)]
+    except FileNotFoundError:
+        return []
+
+
+def sessions_between(start: DateLike, end: DateLike) -> List[Dict[str, str]]:
+    """All archived rows dated start..end (inclusive), each with a "Date" key; reads only those days."""
+    out: List[Dict[str, str]] = []
+    for day in available_dates(start, end):
+        for r in _read_partition(partition_path(day)):
+            r["Date"] = day
+            out.append(r)
+    return out
+
+
+def student_history(student_id: str, start: DateLike, end: DateLike) -> List[Dict[str, str]]:
+    """Archived rows for one student between start and end (inclusive)."""
+    return [r for r in sessions_between(start, end) if r.get("ID") == student_id]
+
+
+def daily_totals(start: DateLike, end: DateLike) -> Dict[str, Dict[str, int]]:
+    """Per-day totals from the index (no partition reads)."""
+    days = _load_index()["days"]
+    return {d: dict(days[d]) for d in available_dates(start, end)}
+
+
+def weekly_totals(end: DateLike, weeks: int = 4) -> List[Dict[str, Any]]:
+    """
+    Totals for `weeks` consecutive 7-day buckets ending on `end`, oldest first.
+    absent = roster rows without a TimeIn.
+    """
+    end_d = _to_date(end)
+    start_d = end_d - timedelta(days=7 * weeks - 1)
+    buckets = [{"start": (start_d + timedelta(days=7 * i)).isoformat(), "sessions": 0, "present": 0, "absent": 0}
+               for i in range(weeks)]
+    for day, t in daily_totals(start_d, end_d).items():
+        b = buckets[(_to_date(day) - start_d).days // 7]
+        b["sessions"] += int(t.get("sessions", 0))
+        b["present"] += int(t.get("attended", 0))
+        b["absent"] += int(t.get("rows", 0)) - int(t.get("attended", 0))
+    return buckets
+
+
+def quarter_bounds(day: Optional[DateLike] = None) -> tuple:
+    """(first_day, last_day) of the calendar quarter containing day (default today)."""
+    d = _to_date(day) if day is not None else date.today()
+    first_month = 3 * ((d.month - 1) // 3) + 1
+    first = date(d.year, first_month, 1)
+    next_first = date(d.year + (first_month == 10), 1 if first_month == 10 else first_month + 3, 1)
+    return first, next_first - timedelta(days=1)
+
+
+def quarter_totals(day: Optional[DateLike] = None) -> Dict[str, int]:
+    """Session/present/absent totals for the quarter containing day, from the index."""
+    first, last = quarter_bounds(day)
+    out = {"days": 0, "sessions": 0, "present": 0, "absent": 0}
+    for t in daily_totals(first, last).values():
+        out["days"] += 1
+        out["sessions"] += int(t.get("sessions", 0))
+        out["present"] += int(t.get("attended", 0))
+        out["absent"] += int(t.get("rows", 0)) - int(t.get("attended", 0))
+    return out
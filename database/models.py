@@ -1,28 +1,85 @@
-import serial
-import pandas as pd
-import os
+import asyncio
 import csv
+import glob
+import json
+import os
+import sys
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import serial
+
+if __package__ in (None, ""):
+    # allow "python database/models.py" to import project packages
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from arduino.arduino_reader import IngestPipeline, reader_id_for
+from arduino.device_supervisor import PORT_PATTERNS, DeviceSupervisor
+from arduino.rfid_parser import FrameError, is_uid_frame, parse_frame, parse_uid
+from arduino.serial_config import load_serial_config
+from core.schedule import load_schedule
+from database.card_registry import CardRegistry
+from database.scan_journal import scan_outcome
+from database.storage import STUDENT_FIELDS, get_backend
+from database.writer_service import call_writer
+from utils.metrics import REGISTRY, MetricsExporter
+
+# -----------------------------
+# RFID ingestion worker
+# -----------------------------
+# run() reads the RFID readers and records scans until it is stopped. It can
+# be imported and run on a thread or in a multiprocessing child (see
+# services/ingest_supervisor.py, which main.py uses), or started on its own:
+#
+#   python database/models.py
+#
+# Importing this module has no side effects beyond loading the settings.
 
 # -----------------------------
 # Arduino serial configuration
 # -----------------------------
-BAUD_RATE = 9600
+config = load_serial_config()
+BAUD_RATE = config.baud_rate
 # ensure we read/write the CSV inside the database folder (same file the GUI uses)
 csv_file = str(Path(__file__).resolve().parent / "Students_Data.csv")
 
 # CSV columns
-columns = ['ID', 'Name', 'Status', 'ClassesAttended', 'TimeIn', 'TimeOut', 'Img_Path']
+columns = list(STUDENT_FIELDS)
+
+# Readers that send only the card UID are resolved through database/cards.csv
+# (reloaded automatically when it changes)
+card_registry = CardRegistry()
+
+# Scan journal compaction: fold into the CSV every 30 s or once it reaches 64 KiB
+COMPACT_INTERVAL_SECONDS = 30.0
+COMPACT_MAX_BYTES = 64 * 1024
+_last_compact = time.monotonic()
+
+# Scans are persisted in batches: 50 ms after the first one or at 64 scans
+# (RECORDSYNC_FLUSH_DELAY_MS / RECORDSYNC_FLUSH_BATCH, see arduino/serial_config.py)
+HOUSEKEEPING_INTERVAL_SECONDS = 1.0
+
+# ACK/NAK frames are written back to the reader after each commit; a reader
+# that stops draining its port must not stall ingestion
+ACK_WRITE_TIMEOUT_SECONDS = 0.05
+_last_stats = time.monotonic()
+_last_stats_batches = 0
+
+# Snapshots handed to run(on_stats=...) for a supervisor; a standalone worker
+# started with RECORDSYNC_WORKER_STATS=1 prints them as "@stats {json}" lines
+WORKER_STATS_INTERVAL_SECONDS = 5.0
+WORKER_STATS_ENV = "RECORDSYNC_WORKER_STATS"
+STATS_LINE_PREFIX = "@stats "
 
 # -----------------------------
 # Initialize CSV if missing
 # -----------------------------
-if not os.path.exists(csv_file) or os.path.getsize(csv_file) == 0:
-    df = pd.DataFrame(columns=columns)
-    df.to_csv(csv_file, index=False)
-
-print("Waiting for RFID scans... (Press Ctrl+C to stop)")
+def _init_csv() -> None:
+    if not os.path.exists(csv_file) or os.path.getsize(csv_file) == 0:
+        with open(csv_file, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(columns)
 
 # -----------------------------
 # Helper functions
@@ -31,152 +88,288 @@ def format_student_id(number: int) -> str:
     """Format student ID as 00-001, 00-002, etc."""
     return f"00-{int(number):03d}"
 
-def get_image_path(name: str) -> str:
-    """Generate image path from name (replace spaces with nothing, default jpeg)."""
-    filename = name.replace(" ", "") + ".jpeg"
-    return f"assets/profiles/{filename}"
+def lookup_card(uid: str):
+    """Card UID -> (student_id, name); None when the card is not enrolled."""
+    return card_registry.lookup(uid)
 
-def find_serial_port():
-    """Attempt to detect Arduino/RFID serial port automatically."""
+def find_serial_ports() -> list:
+    """
+    Every RFID reader to open: the configured ports (serial.ports /
+    RECORDSYNC_SERIAL_PORTS) or, when none are configured, all devices under
+    /dev/serial/by-id plus the usual ttyACM*/ttyUSB* fallbacks.
+    Returns [(reader_id, device_path)], one entry per physical device.
+    """
+    if config.ports:
+        found = []
+        for entry in config.ports:
+            label, sep, path = entry.partition("=")
+            if not sep:
+                label, path = "", entry
+            found.append((label.strip() or reader_id_for(path.strip()), path.strip()))
+        return found
+
+    candidates = []
     # Prefer stable by-id paths
     by_id_path = "/dev/serial/by-id"
     if os.path.exists(by_id_path):
-        devices = os.listdir(by_id_path)
-        if devices:
-            return os.path.join(by_id_path, devices[0])
+        candidates += [os.path.join(by_id_path, d) for d in sorted(os.listdir(by_id_path))]
 
     # Fallbacks
-    for port in ["/dev/ttyACM0", "/dev/ttyUSB0"]:
-        if os.path.exists(port):
-            return port
+    for pattern in PORT_PATTERNS:
+        candidates += sorted(glob.glob(os.path.join("/dev", pattern)))
+
+    found, seen = [], set()
+    for port in candidates:
+        real = os.path.realpath(port)  # by-id entries are symlinks to ttyACM*/ttyUSB*
+        if real in seen or not os.path.exists(real):
+            continue
+        seen.add(real)
+        found.append((reader_id_for(port), port))
+    return found
 
-    return None
+def _port_patterns() -> tuple:
+    """Device names whose /dev events wake the reader rescan: the usual ones plus any configured port."""
+    configured = tuple(os.path.basename(path) for _, path in find_serial_ports()) if config.ports else ()
+    return PORT_PATTERNS + configured
+
+
+def find_serial_port():
+    """Attempt to detect Arduino/RFID serial port automatically."""
+    ports = find_serial_ports()
+    return ports[0][1] if ports else None
 
 def _now_str() -> str:
     """Return portable time string like '4:32 PM'."""
     return datetime.now().strftime("%I:%M %p").lstrip("0")
 
 
-def _upsert_scan(student_id: str, name: str, status: str) -> None:
+def _persist_scans(scans: list) -> list:
     """
-    Insert or update a student row in Students_Data.csv for a scan event.
-    Behavior:
-    - If student row does not exist: add new row. If status == 'Present' set TimeIn and ClassesAttended appropriately.
-    - If student row exists and TimeIn is empty: set TimeIn (first scan).
-    - If student row exists and TimeIn exists but TimeOut empty (or on subsequent scans): set/update TimeOut.
-    - ClassesAttended is incremented only when setting TimeIn for a Present status.
+    Write one batch of (student_id, name, status, time_str) scans.
+    When the writer service is running it owns the data and receives the batch
+    as one group commit; otherwise the storage backend records it atomically
+    (CSV: one fsync'ed journal append, SQLite: one transaction).
+    Returns what each scan recorded (Present / Late / TimeOut) for the reader's ACK.
     """
-    # ensure file exists and read current rows
-    rows = []
-    if os.path.exists(csv_file):
-        try:
-            with open(csv_file, newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                rows = [r for r in reader]
-        except Exception as e:
-            print(f"Error reading CSV in _upsert_scan: {e}")
-            rows = []
-
-    now = _now_str()
-    status_norm = (status or "").strip().capitalize()
-    written = False
-
-    for r in rows:
-        if r.get("ID", "").strip() == student_id:
-            # existing student
-            time_in = (r.get("TimeIn") or "").strip()
-            time_out = (r.get("TimeOut") or "").strip()
-
-            if not time_in:
-                # first scan -> set TimeIn, update Status, increment ClassesAttended if Present
-                r["TimeIn"] = now
-                r["Status"] = status_norm
-                try:
-                    ca = int(r.get("ClassesAttended") or 0)
-                except Exception:
-                    ca = 0
-                if status_norm.lower() == "present":
-                    ca += 1
-                r["ClassesAttended"] = str(ca)
-            else:
-                # subsequent scan -> record/update TimeOut
-                r["TimeOut"] = now
-                # Do not change ClassesAttended on TimeOut
-                # Optionally update status to remain as-is
-            written = True
-            break
+    handled, rows = call_writer("scans", scans)
+    if not handled:
+        rows = get_backend().record_scans(scans)
+    return [scan_outcome(r) for r in rows or []]
 
-    if not written:
-        # New student row
-        img = ""
-        try:
-            img = get_image_path(name)
-        except Exception:
-            img = ""
-        new_row = {
-            "ID": student_id,
-            "Name": name,
-            "Status": status_norm,
-            "ClassesAttended": "1" if status_norm.lower() == "present" else "0",
-            "TimeIn": now if status_norm.lower() == "present" else "",
-            "TimeOut": "" if status_norm.lower() == "present" else "",
-            "Img_Path": img,
-        }
-        rows.append(new_row)
-
-    # write back safely
+
+def _count_frame_error(reason: str) -> None:
+    REGISTRY.counter("recordsync_frame_errors_total", "Frames that did not yield a scan, by reason",
+                     reason=reason).inc()
+
+
+def _roster_name(student_id: str) -> str:
+    """Name of an enrolled student ("" when not on the roster)."""
     try:
-        with open(csv_file, "w", newline="", encoding="utf-8") as f:
-            fieldnames = ["ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut", "Img_Path"]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for r in rows:
-                writer.writerow({k: r.get(k, "") for k in fieldnames})
+        row = get_backend().get_student(student_id)
     except Exception as e:
-        print(f"Error writing CSV in _upsert_scan: {e}")
+        print(f"Error looking up student {student_id}: {e}")
+        return ""
+    return row.name.strip() if row is not None else ""
+
+
+def _make_scan(frame: bytes, reader_id: str = ""):
+    """
+    Turn one b'name,number,status' (or card UID) frame read by `reader_id`
+    into a (student_id, name, status, time_str) scan (see
+    scan_journal.apply_scan for how it is applied); None (NAK) for a bad
+    frame, an unknown card, or a card enrolled without a name whose student
+    is not on the roster. A card carries no status: it is Present or Late
+    by the class schedule at the time of the scan.
+    """
+    time_str = _now_str()
+    if is_uid_frame(frame):
+        uid = parse_uid(frame)
+        if isinstance(uid, FrameError):
+            print(f"Bad line received on {reader_id}: {uid}")
+            _count_frame_error(type(uid).__name__)
+            return None
+        card = lookup_card(uid)
+        if card is None:
+            print(f"Unknown card {uid} on {reader_id} "
+                  f"(enroll it: python database/card_registry.py enroll {uid} <student ID> [name])")
+            _count_frame_error("UnknownCard")
+            return None
+        student_id, name = card
+        name = name.strip() or _roster_name(student_id)
+        if not name:
+            print(f"Card {uid} on {reader_id} is enrolled to {student_id or '(no ID)'}, who has no name "
+                  f"and is not on the roster; scan rejected")
+            _count_frame_error("UnknownStudent")
+            return None
+        status = load_schedule().status_of(time_str)
+    else:
+        parsed = parse_frame(frame)
+        if isinstance(parsed, FrameError):
+            print(f"Bad line received on {reader_id}: {parsed}")
+            _count_frame_error(type(parsed).__name__)
+            return None
+        name, number, status = parsed
+        student_id = format_student_id(number)
+
+    # Console feedback
+    print(f"[{reader_id}] {name} ({student_id}) -> {status}")
+    return student_id, name, status, time_str
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, sec = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{sec:02d}s"
 
-# -----------------------------
-# Connect to Arduino
-# -----------------------------
-SERIAL_PORT = find_serial_port()
 
-if not SERIAL_PORT:
-    print("No Arduino/RFID device detected.")
-    print("Please plug in the device and restart the app.")
-    exit(1)
+def _report_flush_stats(pipeline: IngestPipeline, force: bool = False,
+                        supervisor: DeviceSupervisor = None) -> None:
+    """Print queue depth, batch size and scan-to-commit latency so the flush settings can be tuned."""
+    global _last_stats, _last_stats_batches
+    if not force and time.monotonic() - _last_stats < config.stats_interval:
+        return
+    _last_stats = time.monotonic()
+    st = pipeline.stats()
+    if st["batches"] == _last_stats_batches:
+        return
+    _last_stats_batches = st["batches"]
+    bs, fl, cl = st["batch_size"], st["flush_latency_ms"], st["commit_latency_ms"]
+    print(
+        f"Scan flushes: {st['batches']} batches / {st['scans']} scans, "
+        f"queue depth {st['queue_depth']} (max {st['max_queue_depth']}), "
+        f"batch size avg {bs['avg']:.1f} p95 {bs['p95']:.0f} max {bs['max']:.0f}, "
+        f"flush p50 {fl['p50']:.1f} ms p95 {fl['p95']:.1f} ms, "
+        f"scan-to-commit p50 {cl['p50']:.1f} ms p95 {cl['p95']:.1f} ms, failed {st['failed_batches']}, "
+        f"repeat taps ignored {st['suppressed']}"
+    )
+    al = st["ack_latency_ms"]
+    if al["count"]:
+        print(f"Scan-to-ack p50 {al['p50']:.1f} ms p95 {al['p95']:.1f} ms p99 {al['p99']:.1f} ms max {al['max']:.1f} ms")
+    uptime = supervisor.stats() if supervisor is not None else {}
+    if len(st["readers"]) > 1 or uptime:
+        parts = []
+        for rid, r in st["readers"].items():
+            u = uptime.get(rid)
+            link = (f", {u['state']}, up {_format_duration(u['uptime'])} ({u['availability']:.1%}), "
+                    f"{u['reconnects']} reconnects") if u else ""
+            parts.append(f"{rid} {r['scans']} scans ({r['dropped']} dropped{link})")
+        print("Readers: " + ", ".join(parts))
 
-print(f"Using serial port: {SERIAL_PORT}")
 
-try:
-    ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-except serial.SerialException as e:
-    print(f"Error connecting to {SERIAL_PORT}: {e}")
-    exit(1)
+def _maybe_compact(force: bool = False) -> None:
+    """Fold the scan journal into Students_Data.csv (or checkpoint the WAL) when it is big or old enough."""
+    global _last_compact
+    backend = get_backend()
+    pending = backend.pending_bytes()
+    if not pending:
+        _last_compact = time.monotonic()
+        return
+    due = time.monotonic() - _last_compact >= COMPACT_INTERVAL_SECONDS
+    if force or due or pending >= COMPACT_MAX_BYTES:
+        try:
+            backend.compact()
+        except Exception as e:
+            print(f"Error compacting storage: {e}")
+        _last_compact = time.monotonic()
+
+# -----------------------------
+# Connect to Arduino
+# -----------------------------
+# Readers are opened by the DeviceSupervisor: the ones present now, any that
+# are plugged in later, and again after an unplug (with backoff).
+def _open_reader(port: str):
+    return serial.Serial(port, BAUD_RATE, timeout=config.read_timeout,
+                         write_timeout=ACK_WRITE_TIMEOUT_SECONDS)
 
 # -----------------------------
 # Main loop
 # -----------------------------
-while True:
-    try:
-        ser.reset_input_buffer()
-        rfid_line = ser.readline().decode(errors='ignore').strip()  # safely decode
+def worker_stats(pipeline: IngestPipeline, supervisor: DeviceSupervisor) -> Dict[str, Any]:
+    """
+    Pipeline counters, per-reader connection stats and the metrics registry
+    snapshot, as passed to on_stats.
+    """
+    return {"time": time.time(), "pipeline": pipeline.stats(), "readers": supervisor.stats(),
+            "metrics": REGISTRY.snapshot()}
 
-        if rfid_line:
+
+def _print_stats_line(snapshot: Dict[str, Any]) -> None:
+    print(STATS_LINE_PREFIX + json.dumps(snapshot, default=str), flush=True)
+
+
+async def _housekeeping(pipeline: IngestPipeline, supervisor: DeviceSupervisor, stopped: asyncio.Event,
+                        stop=None, on_stats: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+    """
+    Compaction and stats, run on the writer thread so they never interleave
+    with a batch. Also stops the pipeline once the external `stop` event is set.
+    """
+    last_published = time.monotonic()
+    while not stopped.is_set():
+        try:
+            await asyncio.wait_for(stopped.wait(), HOUSEKEEPING_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        if stopped.is_set():
+            break
+        if stop is not None and stop.is_set():
+            pipeline.stop()
+            break
+        await pipeline.run_blocking(_maybe_compact)
+        _report_flush_stats(pipeline, supervisor=supervisor)
+        if on_stats is not None and time.monotonic() - last_published >= WORKER_STATS_INTERVAL_SECONDS:
+            last_published = time.monotonic()
             try:
-                name, number, status = [x.strip() for x in rfid_line.split(",")]
-            except ValueError:
-                print(f"Bad line received: {rfid_line}")
-                continue
+                on_stats(worker_stats(pipeline, supervisor))
+            except Exception as e:
+                print(f"Error publishing worker stats: {e}")
 
-            student_id = format_student_id(number)
 
-            _upsert_scan(student_id, name, status)
+async def _main(stop=None, on_stats: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+    pipeline = IngestPipeline({}, _make_scan, _persist_scans, config)
+    supervisor = DeviceSupervisor(pipeline, find_serial_ports, _open_reader, _port_patterns())
+    stopped = asyncio.Event()
+    devices = asyncio.ensure_future(supervisor.run())
+    housekeeping = asyncio.ensure_future(_housekeeping(pipeline, supervisor, stopped, stop, on_stats))
+    try:
+        await pipeline.run()
+    finally:
+        stopped.set()
+        supervisor.stop()
+        await housekeeping
+        await devices  # closes the ports
+        _report_flush_stats(pipeline, force=True, supervisor=supervisor)
+        _maybe_compact(force=True)
+        if on_stats is not None:
+            try:
+                on_stats(worker_stats(pipeline, supervisor))
+            except Exception as e:
+                print(f"Error publishing worker stats: {e}")
 
-            # Console feedback
-            print(f"{name} ({student_id}) -> {status}")
 
+def run(stop=None, on_stats: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+    """
+    Read the RFID readers and record scans until Ctrl+C / SIGTERM or until
+    `stop` (a threading or multiprocessing Event) is set; buffered scans are
+    stored before it returns. on_stats(snapshot) receives worker_stats() every
+    WORKER_STATS_INTERVAL_SECONDS and once more on exit.
+    """
+    _init_csv()
+    print("Waiting for RFID scans... (Press Ctrl+C to stop)")
+    if not find_serial_ports():
+        print("No Arduino/RFID device detected yet, waiting for one to be plugged in...")
+    try:
+        asyncio.run(_main(stop, on_stats))
     except KeyboardInterrupt:
-        print("\nExiting...")
-        break
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+        pass
+    print("\nExiting...")
+
+
+if __name__ == "__main__":
+    # standalone: publish metrics ourselves (under the GUI's supervisor they
+    # travel with the stats snapshots instead)
+    exporter = MetricsExporter()
+    exporter.start()
+    try:
+        run(on_stats=_print_stats_line if os.environ.get(WORKER_STATS_ENV) else None)
+    finally:
+        exporter.stop()
@@ -0,0 +1,534 @@
+import csv
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import changes
+from database.student_record import StudentRecord, records_from_csv_rows, time_to_minutes
+
+# -----------------------------
+# Append-only scan journal
+# -----------------------------
+# Every RFID scan is appended as one line to Scan_Journal.log instead of
+# rewriting Students_Data.csv. The "current state" is Students_Data.csv with
+# the journal replayed on top of it; compact() folds the journal back into the
+# CSV and truncates it.
+
+DB_DIR = Path(__file__).resolve().parent
+STUDENTS_CSV = DB_DIR / "Students_Data.csv"
+JOURNAL_FILE = DB_DIR / "Scan_Journal.log"
+LOCK_FILE = DB_DIR / "Scan_Journal.lock"
+
+FIELDNAMES = ["ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut", "Img_Path"]
+ATTENDED_STATUSES = ("Present", "Late")
+
+# journal line: TimeStr \t ID \t Status \t Name \n
+_SEP = "\t"
+_LOCK_RETRY_SECONDS = 0.002
+
+
+class RowList(list):
+    """
+    List of StudentRecords that remembers what it was built from: the
+    Students_Data.csv signature and the journal offset replayed on top of it.
+    """
+
+    journal_offset = 0
+    csv_sig: Optional[Tuple[int, int, int]] = None
+
+    def based_on(self, other: Any) -> "RowList":
+        """Take other's CSV signature and journal offset (rows derived from other's snapshot)."""
+        self.journal_offset = getattr(other, "journal_offset", 0)
+        self.csv_sig = getattr(other, "csv_sig", None)
+        return self
+
+
+class StaleRowsError(RuntimeError):
+    """write_rows() got rows built on a Students_Data.csv another writer has since replaced."""
+
+
+def _clean(value: str) -> str:
+    return (value or "").replace("\t", " ").replace("\r", " ").replace("\n", " ").strip()
+
+
+def format_entry(time_str: str, student_id: str, name: str, status: str) -> str:
+    """Return the fixed-format journal line for one scan."""
+    return _SEP.join((_clean(time_str), _clean(student_id), _clean(status), _clean(name))) + "\n"
+
+
+def parse_entry(line: str) -> Optional[Tuple[str, str, str, str]]:
+    """Parse a journal line into (time_str, student_id, status, name); None if malformed."""
+    parts = line.rstrip("\n").split(_SEP)
+    if len(parts) != 4 or not parts[1]:
+        return None
+    return parts[0], parts[1], parts[2], parts[3]
+
+
+def get_image_path(name: str) -> str:
+    """Generate image path from name (replace spaces with nothing, default jpeg)."""
+    filename = name.replace(" ", "") + ".jpeg"
+    return f"assets/profiles/{filename}"
+
+
+def apply_scan(rows: List[StudentRecord], index: Dict[str, StudentRecord], time_str: str,
+               student_id: str, name: str, status: str) -> StudentRecord:
+    """
+    Apply one scan event to the in-memory rows (same rules the serial loop always used).
+    - Unknown student: add new row. If status is Present or Late set TimeIn and ClassesAttended.
+    - Known student with empty TimeIn: set TimeIn (first scan).
+    - Known student with TimeIn: set/update TimeOut.
+    - ClassesAttended is incremented only when setting TimeIn for a Present or
+      Late status (update_statuses counts both as attended too).
+    """
+    status_norm = (status or "").strip().capitalize()
+    attended = status_norm in ATTENDED_STATUSES
+    minutes = time_to_minutes(time_str)
+    row = index.get(student_id)
+
+    if row is not None:
+        if row.time_in is None:
+            # first scan -> set TimeIn, update Status, increment ClassesAttended if Present or Late
+            row.time_in = minutes
+            row.time_in_raw = ""
+            row.status = status_norm
+            if attended:
+                row.classes_attended += 1
+        else:
+            # subsequent scan -> record/update TimeOut
+            row.time_out = minutes
+            row.time_out_raw = ""
+        return row
+
+    try:
+        img = get_image_path(name)
+    except Exception:
+        img = ""
+    row = StudentRecord(student_id, name, status_norm, 1 if attended else 0,
+                        minutes if attended else None, None, img)
+    rows.append(row)
+    index[student_id] = row
+    return row
+
+
+def scan_outcome(row: Optional[StudentRecord]) -> str:
+    """What a scan did to its row, as reported back to the reader: Present, Late or TimeOut."""
+    if row is None:
+        return ""
+    if row.time_out is not None:
+        return "TimeOut"
+    return row.status or "Present"
+
+
+def read_csv_records(path: Optional[Path] = None) -> List[StudentRecord]:
+    """Parse a roster CSV (default Students_Data.csv) into StudentRecords (empty list when the file is missing)."""
+    path = path or STUDENTS_CSV
+    if not path.exists():
+        return []
+    with path.open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        return records_from_csv_rows(header, reader) if header else []
+
+
+# -----------------------------
+# Cross-process lock
+# -----------------------------
+# An OS lock on Scan_Journal.lock (flock on Linux, msvcrt.locking on Windows).
+# The OS drops it when the holder exits or crashes, so a lock is never broken
+# while its owner is still folding, however long that takes. The file itself
+# stays; it only holds the PID of the last holder, for diagnostics.
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _open_lock_file() -> int:
+    return os.open(str(LOCK_FILE), os.O_CREAT | os.O_RDWR, 0o644)
+
+
+_held = threading.local()
+
+
+@contextmanager
+def journal_lock(timeout: float = 5.0):
+    """
+    Exclusive lock shared by the serial process and the GUI (and by threads
+    within one process: each holder opens the file on its own). Re-entrant
+    within a thread: a nested block joins the lock already held.
+    """
+    if getattr(_held, "depth", 0):
+        _held.depth += 1
+        try:
+            yield
+        finally:
+            _held.depth -= 1
+        return
+    deadline = time.monotonic() + timeout
+    fd = _open_lock_file()
+    try:
+        while not _try_lock(fd):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {LOCK_FILE.name}")
+            time.sleep(_LOCK_RETRY_SECONDS)
+        try:
+            os.ftruncate(fd, 0)
+            os.write(fd, str(os.getpid()).encode())
+            _held.depth = 1
+            try:
+                yield
+            finally:
+                _held.depth = 0
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+# -----------------------------
+# Materialized view
+# -----------------------------
+# Appends only ever add complete lines at the end of the journal, so a view
+# follows them without taking the lock. (Re)loading the CSV is different: a
+# fold replaces the CSV and then truncates the journal, and a view that read
+# the new CSV with the old journal would replay scans twice. Loads therefore
+# happen under the journal lock, and a replay that raced a fold (the CSV
+# changed while the journal was being read) is thrown away and reloaded.
+class _View:
+    """In-memory current state: CSV rows plus every journal entry replayed so far."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.csv_sig: Tuple[int, int, int] = (0, 0, -2)
+        self.offset = 0
+        self.rows: List[StudentRecord] = []
+        self.index: Dict[str, StudentRecord] = {}
+
+    def reset(self) -> None:
+        self.csv_sig = (0, 0, -2)
+        self.offset = 0
+        self.rows = []
+        self.index = {}
+
+    def _replay(self) -> List[str]:
+        """Replay complete journal lines after self.offset; return the IDs they touched (in order)."""
+        touched: Dict[str, None] = {}
+        try:
+            with JOURNAL_FILE.open("rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        end = data.rfind(b"\n")
+        if end < 0:
+            return []  # only a partial line so far
+        for raw in data[:end].split(b"\n"):
+            entry = parse_entry(raw.decode("utf-8", errors="replace"))
+            if entry is None:
+                continue
+            time_str, student_id, status, name = entry
+            apply_scan(self.rows, self.index, time_str, student_id, name, status)
+            touched[student_id] = None
+        self.offset += end + 1
+        return list(touched)
+
+    def follow(self) -> Optional[List[str]]:
+        """
+        Replay newly appended journal lines without the lock. Returns the IDs
+        they touched, or None when the CSV must be (re)loaded first (see reload).
+        """
+        csv_sig = changes.path_signature(STUDENTS_CSV)
+        if csv_sig != self.csv_sig or changes.path_signature(JOURNAL_FILE)[2] < self.offset:
+            return None
+        touched = self._replay()
+        if changes.path_signature(STUDENTS_CSV) != csv_sig:
+            return None  # folded while we read: what was replayed may be the new journal
+        return touched
+
+    def reload(self) -> None:
+        """Load the CSV and replay the whole journal; the caller holds the journal lock."""
+        self.csv_sig = changes.path_signature(STUDENTS_CSV)
+        self.rows = read_csv_records()
+        self.index = {}
+        for r in self.rows:
+            self.index.setdefault(r.id, r)
+        self.offset = 0
+        self._replay()
+
+
+_view = _View()
+
+
+def _refresh(view: _View) -> Optional[List[str]]:
+    """
+    Bring view up to date. Returns the IDs touched by newly replayed lines,
+    or None when it was reloaded from the CSV (diff the rows to see changes).
+    """
+    with view.lock:
+        touched = view.follow()
+    if touched is not None:
+        return touched
+    # the journal lock comes first, as for appenders, which take the view lock inside it
+    with journal_lock(), view.lock:
+        view.reload()
+    return None
+
+
+def _snapshot(view: _View) -> RowList:
+    out = RowList(r.copy() for r in view.rows)
+    out.journal_offset = view.offset
+    out.csv_sig = view.csv_sig
+    return out
+
+
+def materialize() -> RowList:
+    """
+    Return the current roster (CSV + journal) as fresh StudentRecords.
+    Only newly appended journal lines are parsed on each call.
+    """
+    try:
+        _refresh(_view)
+    except Exception as e:
+        print(f"Error materializing scan journal: {e}")
+        with _view.lock:
+            _view.reset()
+        return RowList()
+    with _view.lock:
+        return _snapshot(_view)
+
+
+def diff_rows(previous: Dict[str, StudentRecord], rows: List[StudentRecord]) -> Tuple[List[StudentRecord], bool]:
+    """
+    Compare a reloaded roster with the rows a reader already had (keyed by ID).
+    Returns (changed_or_new_rows, full_reload); full_reload is True when rows
+    disappeared, since a partial update cannot express a removal.
+    """
+    ids = set()
+    changed = []
+    for r in rows:
+        ids.add(r.id)
+        if previous.get(r.id) != r:
+            changed.append(r.copy())
+    return changed, any(sid not in ids for sid in previous)
+
+
+class JournalTail:
+    """
+    Incremental reader for one consumer (e.g. the attendance watcher).
+
+    Remembers the CSV signature and journal byte offset it has seen; poll()
+    parses only journal lines appended since the last call and returns the
+    rows they touched. When the CSV is rewritten or the journal truncated
+    (compaction, GUI edits) it reloads and diffs against what it had, so an
+    unchanged fold reports nothing. Changes made by `origin`'s own writes
+    (database/changes.py) are absorbed without being reported.
+    """
+
+    def __init__(self, origin: Optional[str] = None):
+        self.origin = origin
+        self._view = _View()
+        self._known: Dict[str, StudentRecord] = {}
+
+    def poll(self) -> Tuple[List[StudentRecord], bool]:
+        """Return (changed_rows, full_reload). full_reload means "re-read everything"."""
+        view = self._view
+        csv_sig = changes.path_signature(STUDENTS_CSV)
+        journal_sig = changes.path_signature(JOURNAL_FILE)
+        journal_size = journal_sig[2]
+        if csv_sig == view.csv_sig and journal_size == view.offset:
+            return [], False
+        touched = _refresh(view)
+        if touched is None:
+            changed, full = diff_rows(self._known, view.rows)
+        else:
+            changed, full = [view.index[sid].copy() for sid in touched if sid in view.index], False
+        for r in changed:
+            self._known[r.id] = r.copy()
+        if full:
+            self._known = {r.id: r.copy() for r in view.rows}
+        # own only if what was loaded is exactly what that write left behind
+        if (view.csv_sig == csv_sig and view.offset == max(0, journal_size)
+                and changes.is_own_write(self.origin, (csv_sig, journal_sig))):
+            return [], False
+        return changed, full
+
+
+def pending_bytes() -> int:
+    """Number of journal bytes not yet folded into the CSV (0 when clean)."""
+    return max(0, changes.path_signature(JOURNAL_FILE)[2])
+
+
+# -----------------------------
+# Writers
+# -----------------------------
+def append_scan(student_id: str, name: str, status: str, time_str: str) -> None:
+    """Record one scan as a single appended journal line (O(1), no CSV rewrite)."""
+    append_scans([(student_id, name, status, time_str)])
+
+
+def _preview_scans(scans: List[Tuple[str, str, str, str]]) -> List[StudentRecord]:
+    """The row each scan produces, applied to copies of the current view (caller holds the journal lock)."""
+    with _view.lock:
+        try:
+            if _view.follow() is None:
+                _view.reload()
+        except Exception as e:
+            print(f"Error materializing scan journal: {e}")
+            _view.reset()
+        rows: List[StudentRecord] = []
+        index: Dict[str, StudentRecord] = {}
+        out = []
+        for student_id, name, status, time_str in scans:
+            if student_id not in index and student_id in _view.index:
+                row = _view.index[student_id].copy()
+                rows.append(row)
+                index[student_id] = row
+            out.append(apply_scan(rows, index, time_str, student_id, name, status).copy())
+        return out
+
+
+def append_scans(scans: List[Tuple[str, str, str, str]], durable: bool = True) -> List[StudentRecord]:
+    """
+    Append (student_id, name, status, time_str) scans with one write.
+    With durable=True the data is fsync'ed before returning.
+    Returns the row each scan produced (in order).
+    """
+    data = "".join(format_entry(t, sid, name, status) for sid, name, status, t in scans).encode("utf-8")
+    if not data:
+        return []
+    with journal_lock():
+        results = _preview_scans(scans)
+        fd = os.open(str(JOURNAL_FILE), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, data)
+            if durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+    return results
+
+
+def _write_csv_atomic(rows: List[StudentRecord]) -> None:
+    tmp = STUDENTS_CSV.with_suffix(".csv.tmp")
+    with tmp.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for r in rows:
+            writer.writerow(r.to_row())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, STUDENTS_CSV)
+
+
+def _fold(rows: List[StudentRecord], journal_offset: int) -> RowList:
+    """
+    Apply journal entries after journal_offset to rows, write the CSV, truncate
+    the journal (the caller holds the journal lock). Returns the stored rows,
+    based on the new CSV.
+    """
+    index: Dict[str, StudentRecord] = {}
+    for r in rows:
+        index.setdefault(r.id, r)
+    try:
+        with JOURNAL_FILE.open("rb") as f:
+            f.seek(journal_offset)
+            tail = f.read()
+    except FileNotFoundError:
+        tail = b""
+    # complete lines only: appenders hold the lock, so a partial last line is
+    # what a crashed writer left behind and goes with the truncate
+    for raw in tail[:tail.rfind(b"\n") + 1].split(b"\n"):
+        entry = parse_entry(raw.decode("utf-8", errors="replace"))
+        if entry is None:
+            continue
+        time_str, student_id, status, name = entry
+        apply_scan(rows, index, time_str, student_id, name, status)
+
+    _write_csv_atomic(rows)
+    if JOURNAL_FILE.exists():
+        with JOURNAL_FILE.open("wb"):
+            pass
+
+    with _view.lock:
+        _view.reset()
+    out = RowList(rows)
+    out.csv_sig = changes.path_signature(STUDENTS_CSV)
+    return out
+
+
+def write_rows(rows: List[Any]) -> RowList:
+    """
+    Replace the roster with rows (records or CSV-shaped dicts, used by the GUI-side
+    managers) and return what was stored. Rows from materialize() (or based_on
+    it) keep the scans journaled after they were materialized, so they are not
+    lost; other rows replace the CSV with the pending journal applied on top.
+    Raises StaleRowsError when the CSV they were built on has been replaced
+    since (folded by another writer): re-read and redo the change.
+    """
+    base = getattr(rows, "csv_sig", None)
+    offset = getattr(rows, "journal_offset", 0) if base is not None else 0
+    records = [r if isinstance(r, StudentRecord) else StudentRecord.from_row(r) for r in rows]
+    with journal_lock():
+        if base is not None and changes.path_signature(STUDENTS_CSV) != base:
+            raise StaleRowsError(f"{STUDENTS_CSV.name} was rewritten after these rows were read")
+        return _fold(records, offset)
+
+
+def replace_rows(rows: List[StudentRecord]) -> None:
+    """
+    Replace the roster with rows that already include every journaled scan
+    (e.g. an export from another backend): the journal is dropped, not folded.
+    """
+    with journal_lock():
+        _write_csv_atomic(rows)
+        if JOURNAL_FILE.exists():
+            with JOURNAL_FILE.open("wb"):
+                pass
+        with _view.lock:
+            _view.reset()
+
+
+def compact() -> int:
+    """Fold the whole journal into Students_Data.csv; return number of journal bytes folded."""
+    with journal_lock():
+        folded = pending_bytes()
+        if folded == 0:
+            return 0
+        _fold(read_csv_records(), 0)
+        return folded
+
+
+def clear() -> None:
+    """Empty both the roster CSV (header only) and the journal."""
+    with journal_lock():
+        _write_csv_atomic([])
+        if JOURNAL_FILE.exists():
+            with JOURNAL_FILE.open("wb"):
+                pass
+        with _view.lock:
+            _view.reset()
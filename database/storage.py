@@ -0,0 +1,541 @@
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+if __package__ in (None, ""):
+    # allow "python database/storage.py migrate"
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import changes, scan_journal
+from database.student_record import StudentRecord, time_fields
+from utils.file_notifier import FileNotifier
+
+# -----------------------------
+# Pluggable storage backends
+# -----------------------------
+# The core managers talk to get_backend() instead of opening CSV files.
+#   "csv"    - Students_Data.csv + scan journal, admin.csv (default, unchanged files)
+#   "sqlite" - recordsync.db (WAL mode); the CSV files become an import/export format
+#   "fixed"  - Students_Data.bin, fixed-width records updated in place through mmap
+#              (database/fixed_roster.py); admins stay in admin.csv
+# Select with the RECORDSYNC_STORAGE environment variable or "storage_backend"
+# in settings.json.
+
+DB_DIR = Path(__file__).resolve().parent
+STUDENTS_CSV = DB_DIR / "Students_Data.csv"
+ADMIN_CSV = DB_DIR / "admin.csv"
+SETTINGS_JSON = DB_DIR / "settings.json"
+SQLITE_DB = DB_DIR / "recordsync.db"
+
+STUDENT_FIELDS = ["ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut", "Img_Path"]
+ADMIN_FIELDS = ["id", "username", "password"]
+
+
+def _next_student_id(ids) -> str:
+    max_num = 0
+    for sid in ids:
+        digits = "".join(c for c in (sid or "") if c.isdigit())
+        if digits:
+            max_num = max(max_num, int(digits))
+    return f"00-{max_num + 1:03d}"
+
+
+class CsvBackend:
+    """Students_Data.csv (+ append-only scan journal) and admin.csv."""
+
+    name = "csv"
+    # every mutation rewrites the file, so callers holding all rows should use write_students
+    supports_row_ops = False
+
+    # --- students ---
+    def read_students(self) -> List[StudentRecord]:
+        return scan_journal.materialize()
+
+    def write_students(self, rows: List[Any]) -> List[StudentRecord]:
+        """Replace all rows; returns the stored rows (including folded journal scans)."""
+        return scan_journal.write_rows(rows)
+
+    def clear_students(self) -> None:
+        scan_journal.clear()
+
+    def get_student(self, student_id: str) -> Optional[StudentRecord]:
+        for r in self.read_students():
+            if r.id == student_id:
+                return r
+        return None
+
+    def next_student_id(self) -> str:
+        return _next_student_id(r.id for r in self.read_students())
+
+    # read-modify-write under the journal lock, so no fold can land in between
+    def insert_student(self, row: Any) -> None:
+        with scan_journal.journal_lock():
+            rows = self.read_students()
+            rows.append(row)
+            self.write_students(rows)
+
+    def update_student(self, student_id: str, fields: Dict[str, Any]) -> Optional[StudentRecord]:
+        with scan_journal.journal_lock():
+            rows = self.read_students()
+            for r in rows:
+                if r.id == student_id:
+                    r.update(fields)
+                    self.write_students(rows)
+                    return r
+        return None
+
+    def delete_student(self, student_id: str) -> bool:
+        with scan_journal.journal_lock():
+            rows = self.read_students()
+            kept = scan_journal.RowList(r for r in rows if r.id != student_id).based_on(rows)
+            if len(kept) == len(rows):
+                return False
+            self.write_students(kept)
+            return True
+
+    # --- scans ---
+    def record_scan(self, student_id: str, name: str, status: str, time_str: str) -> None:
+        scan_journal.append_scan(student_id, name, status, time_str)
+
+    def record_scans(self, scans: List[tuple]) -> List[StudentRecord]:
+        """
+        Record (student_id, name, status, time_str) scans atomically (one fsync'ed
+        append). Returns the row each scan produced, in order.
+        """
+        return scan_journal.append_scans(scans)
+
+    def pending_bytes(self) -> int:
+        return scan_journal.pending_bytes()
+
+    def compact(self) -> int:
+        return scan_journal.compact()
+
+    def watch_paths(self) -> List[Path]:
+        return [STUDENTS_CSV, scan_journal.JOURNAL_FILE]
+
+    def tail_reader(self, origin: Optional[str] = None):
+        """Incremental reader that parses only newly journaled scans."""
+        return scan_journal.JournalTail(origin)
+
+    # --- admins ---
+    def read_admins(self) -> List[Dict[str, str]]:
+        if not ADMIN_CSV.exists():
+            return []
+        with ADMIN_CSV.open(newline="", encoding="utf-8") as f:
+            return [row for row in csv.DictReader(f)]
+
+    def write_admins(self, rows: List[Dict[str, Any]]) -> None:
+        DB_DIR.mkdir(parents=True, exist_ok=True)
+        with ADMIN_CSV.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=ADMIN_FIELDS)
+            writer.writeheader()
+            for r in rows:
+                writer.writerow({"id": int(r.get("id", 0)), "username": r.get("username", ""), "password": r.get("password", "")})
+
+    def find_admin(self, username: str) -> Optional[Dict[str, str]]:
+        """Case-insensitive username lookup."""
+        wanted = (username or "").strip().lower()
+        for r in self.read_admins():
+            if (r.get("username") or "").strip().lower() == wanted:
+                return r
+        return None
+
+    def insert_admin(self, username: str, password: str) -> Dict[str, Any]:
+        rows = self.read_admins()
+        max_id = 0
+        for r in rows:
+            try:
+                max_id = max(max_id, int(r.get("id", 0)))
+            except Exception:
+                continue
+        new_row = {"id": max_id + 1, "username": username or "", "password": password or ""}
+        rows.append(new_row)
+        self.write_admins(rows)
+        return new_row
+
+
+# -----------------------------
+# SQLite backend
+# -----------------------------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ID TEXT NOT NULL UNIQUE,
+    Name TEXT NOT NULL DEFAULT '',
+    Status TEXT NOT NULL DEFAULT '',
+    ClassesAttended INTEGER NOT NULL DEFAULT 0,
+    TimeIn TEXT NOT NULL DEFAULT '',
+    TimeOut TEXT NOT NULL DEFAULT '',
+    Img_Path TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS admins (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    password TEXT NOT NULL DEFAULT ''
+);
+CREATE UNIQUE INDEX IF NOT EXISTS admins_username ON admins (username COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# fixed SQL text so sqlite3's statement cache reuses the prepared statements
+_SQL_SELECT_STUDENTS = "SELECT ID, Name, Status, ClassesAttended, TimeIn, TimeOut, Img_Path FROM students ORDER BY seq"
+_SQL_SELECT_STUDENT = "SELECT ID, Name, Status, ClassesAttended, TimeIn, TimeOut, Img_Path FROM students WHERE ID = ?"
+_SQL_INSERT_STUDENT = "INSERT INTO students (ID, Name, Status, ClassesAttended, TimeIn, TimeOut, Img_Path) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_SQL_UPDATE_STUDENT = "UPDATE students SET Name = ?, Status = ?, ClassesAttended = ?, TimeIn = ?, TimeOut = ?, Img_Path = ? WHERE ID = ?"
+_SQL_DELETE_STUDENT = "DELETE FROM students WHERE ID = ?"
+_SQL_SELECT_ADMIN = "SELECT id, username, password FROM admins WHERE username = ? COLLATE NOCASE"
+
+
+def _int_or_zero(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except Exception:
+        return 0
+
+
+def _student_params(row: Dict[str, Any]) -> tuple:
+    return (
+        str(row.get("ID", "") or ""),
+        str(row.get("Name", "") or ""),
+        str(row.get("Status", "") or ""),
+        _int_or_zero(row.get("ClassesAttended")),
+        str(row.get("TimeIn", "") or ""),
+        str(row.get("TimeOut", "") or ""),
+        str(row.get("Img_Path", "") or ""),
+    )
+
+
+def _student_row(rec: tuple) -> StudentRecord:
+    sid, name, status, attended, time_in, time_out, img = rec
+    (time_in, time_in_raw), (time_out, time_out_raw) = time_fields(time_in), time_fields(time_out)
+    return StudentRecord(sid, name, status, attended or 0, time_in, time_out, img, time_in_raw, time_out_raw)
+
+
+class SqliteBackend:
+    """recordsync.db in WAL mode with indexed ID / username lookups."""
+
+    name = "sqlite"
+    supports_row_ops = True
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or SQLITE_DB)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    def _tx(self):
+        return _Transaction(self._conn, self._lock)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- students ---
+    def read_students(self) -> List[StudentRecord]:
+        with self._lock:
+            return [_student_row(rec) for rec in self._conn.execute(_SQL_SELECT_STUDENTS)]
+
+    def write_students(self, rows: List[Any]) -> List[StudentRecord]:
+        with self._tx() as cur:
+            cur.execute("DELETE FROM students")
+            cur.executemany(_SQL_INSERT_STUDENT, [_student_params(r) for r in rows])
+        return [r if isinstance(r, StudentRecord) else StudentRecord.from_row(r) for r in rows]
+
+    def clear_students(self) -> None:
+        with self._tx() as cur:
+            cur.execute("DELETE FROM students")
+
+    def get_student(self, student_id: str) -> Optional[StudentRecord]:
+        with self._lock:
+            rec = self._conn.execute(_SQL_SELECT_STUDENT, (student_id,)).fetchone()
+        return _student_row(rec) if rec else None
+
+    def next_student_id(self) -> str:
+        with self._lock:
+            return _next_student_id(rec[0] for rec in self._conn.execute("SELECT ID FROM students"))
+
+    def insert_student(self, row: Any) -> None:
+        with self._tx() as cur:
+            cur.execute(_SQL_INSERT_STUDENT, _student_params(row))
+
+    def update_student(self, student_id: str, fields: Dict[str, Any]) -> Optional[StudentRecord]:
+        with self._tx() as cur:
+            rec = cur.execute(_SQL_SELECT_STUDENT, (student_id,)).fetchone()
+            if rec is None:
+                return None
+            row = _student_row(rec)
+            row.update(fields)
+            p = _student_params(row)
+            cur.execute(_SQL_UPDATE_STUDENT, p[1:] + (student_id,))
+            return row
+
+    def delete_student(self, student_id: str) -> bool:
+        with self._tx() as cur:
+            return cur.execute(_SQL_DELETE_STUDENT, (student_id,)).rowcount > 0
+
+    # --- scans ---
+    def record_scan(self, student_id: str, name: str, status: str, time_str: str) -> None:
+        self.record_scans([(student_id, name, status, time_str)])
+
+    def record_scans(self, scans: List[tuple]) -> List[StudentRecord]:
+        """Record (student_id, name, status, time_str) scans in one transaction; returns the resulting rows."""
+        results = []
+        with self._tx() as cur:
+            for student_id, name, status, time_str in scans:
+                rec = cur.execute(_SQL_SELECT_STUDENT, (student_id,)).fetchone()
+                rows = [_student_row(rec)] if rec else []
+                index = {student_id: rows[0]} if rows else {}
+                row = scan_journal.apply_scan(rows, index, time_str, student_id, name, status)
+                p = _student_params(row)
+                if rec:
+                    cur.execute(_SQL_UPDATE_STUDENT, p[1:] + (student_id,))
+                else:
+                    cur.execute(_SQL_INSERT_STUDENT, p)
+                results.append(row.copy())
+        return results
+
+    def pending_bytes(self) -> int:
+        wal = Path(str(self.db_path) + "-wal")
+        try:
+            return wal.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def compact(self) -> int:
+        pending = self.pending_bytes()
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return pending
+
+    def watch_paths(self) -> List[Path]:
+        return [self.db_path, Path(str(self.db_path) + "-wal")]
+
+    def tail_reader(self, origin: Optional[str] = None):
+        return SnapshotTail(self, origin)
+
+    # --- admins ---
+    def read_admins(self) -> List[Dict[str, str]]:
+        with self._lock:
+            cur = self._conn.execute("SELECT id, username, password FROM admins ORDER BY id")
+            return [{"id": str(i), "username": u, "password": p} for i, u, p in cur]
+
+    def write_admins(self, rows: List[Dict[str, Any]]) -> None:
+        with self._tx() as cur:
+            cur.execute("DELETE FROM admins")
+            cur.executemany(
+                "INSERT INTO admins (id, username, password) VALUES (?, ?, ?)",
+                [(_int_or_zero(r.get("id")), r.get("username", ""), r.get("password", "")) for r in rows],
+            )
+
+    def find_admin(self, username: str) -> Optional[Dict[str, str]]:
+        """Case-insensitive username lookup (uses the NOCASE unique index)."""
+        with self._lock:
+            rec = self._conn.execute(_SQL_SELECT_ADMIN, ((username or "").strip(),)).fetchone()
+        if rec is None:
+            return None
+        return {"id": str(rec[0]), "username": rec[1], "password": rec[2]}
+
+    def insert_admin(self, username: str, password: str) -> Dict[str, Any]:
+        with self._tx() as cur:
+            cur.execute("INSERT INTO admins (username, password) VALUES (?, ?)", (username or "", password or ""))
+            return {"id": cur.lastrowid, "username": username or "", "password": password or ""}
+
+    # --- meta ---
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            rec = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return rec[0] if rec else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._tx() as cur:
+            cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a cursor, serialized by the backend lock."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self._conn = conn
+        self._lock = lock
+        self._cur = None
+
+    def __enter__(self) -> sqlite3.Cursor:
+        self._lock.acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self._lock.release()
+            raise
+        self._cur = self._conn.cursor()
+        return self._cur
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._cur.close()
+            self._lock.release()
+
+
+class SnapshotTail:
+    """
+    tail_reader() for backends without an append log: re-reads only when the
+    watched files change and reports the rows that differ from the last poll.
+    Changes made by `origin`'s own writes are absorbed without being reported.
+    """
+
+    def __init__(self, backend, origin: Optional[str] = None):
+        self._backend = backend
+        self.origin = origin
+        self._sig = None
+        self._known: Dict[str, StudentRecord] = {}
+
+    def _signature(self) -> tuple:
+        return changes.file_signature(self._backend.watch_paths())
+
+    def poll(self) -> tuple:
+        """Return (changed_rows, full_reload) like scan_journal.JournalTail.poll."""
+        sig = self._signature()
+        if sig == self._sig:
+            return [], False
+        self._sig = sig
+        rows = self._backend.read_students()
+        changed, full = scan_journal.diff_rows(self._known, rows)
+        self._known = {r.id: r.copy() for r in rows}
+        # a write that landed while reading is not ours to absorb
+        if self._signature() == sig and changes.is_own_write(self.origin, sig):
+            return [], False
+        return changed, full
+
+
+# -----------------------------
+# Migration / export
+# -----------------------------
+def migrate_from_csv(backend: SqliteBackend, force: bool = False) -> Dict[str, Any]:
+    """
+    One-shot import of Students_Data.csv (+ pending journal scans) and admin.csv.
+    Skipped once it has run, unless force=True.
+    """
+    if backend.get_meta("migrated_from_csv") and not force:
+        return {"status": "skipped", "students": 0, "admins": 0}
+    csv_backend = CsvBackend()
+    students = csv_backend.read_students()
+    admins = csv_backend.read_admins()
+    backend.write_students(students)
+    backend.write_admins(admins)
+    backend.set_meta("migrated_from_csv", "1")
+    return {"status": "migrated", "students": len(students), "admins": len(admins)}
+
+
+def export_to_csv(backend, students_csv: Optional[Path] = None, admin_csv: Optional[Path] = None) -> Dict[str, Any]:
+    """Write the backend's students and admins out in the original CSV formats."""
+    students_csv = Path(students_csv or STUDENTS_CSV)
+    admin_csv = admin_csv or ADMIN_CSV
+    students = backend.read_students()
+    if students_csv == Path(scan_journal.STUDENTS_CSV):
+        # the live roster: pending journal scans are already in students, drop them
+        scan_journal.replace_rows(students)
+    else:
+        with students_csv.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=STUDENT_FIELDS)
+            writer.writeheader()
+            for r in students:
+                writer.writerow({k: r.get(k, "") for k in STUDENT_FIELDS})
+    admins = backend.read_admins()
+    with Path(admin_csv).open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=ADMIN_FIELDS)
+        writer.writeheader()
+        for r in admins:
+            writer.writerow({k: r.get(k, "") for k in ADMIN_FIELDS})
+    return {"students": len(students), "admins": len(admins)}
+
+
+# -----------------------------
+# Backend selection
+# -----------------------------
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def configured_backend_name() -> str:
+    name = os.environ.get("RECORDSYNC_STORAGE")
+    if not name:
+        try:
+            with SETTINGS_JSON.open(encoding="utf-8") as f:
+                data = json.load(f)
+            name = data.get("storage_backend") if isinstance(data, dict) else None
+        except Exception:
+            name = None
+    return (name or "csv").strip().lower()
+
+
+def get_backend():
+    """Return the process-wide storage backend (created on first use)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = configured_backend_name()
+                if name == "sqlite":
+                    backend = SqliteBackend()
+                    try:
+                        migrate_from_csv(backend)
+                    except Exception as e:
+                        print(f"Error migrating CSV data to SQLite: {e}")
+                    _backend = backend
+                elif name == "fixed":
+                    from database.fixed_roster import open_fixed_backend
+
+                    _backend = open_fixed_backend()
+                else:
+                    _backend = CsvBackend()
+    return _backend
+
+
+_notifier = None
+
+
+def change_notifier():
+    """
+    Process-wide FileNotifier (utils/file_notifier.py) for the backend's files;
+    it starts with its first subscriber.
+    """
+    global _notifier
+    if _notifier is None:
+        paths = get_backend().watch_paths()
+        with _backend_lock:
+            if _notifier is None:
+                _notifier = FileNotifier(paths)
+    return _notifier
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    target = "fixed" if "--fixed" in sys.argv else "sqlite"
+    if cmd == "migrate" and target == "fixed":
+        from database.fixed_roster import FixedWidthBackend, import_students_from_csv
+
+        print(import_students_from_csv(FixedWidthBackend()))
+    elif cmd == "migrate":
+        print(migrate_from_csv(SqliteBackend(), force="--force" in sys.argv))
+    elif cmd == "export":
+        if target == "fixed":
+            from database.fixed_roster import FixedWidthBackend
+
+            print(export_to_csv(FixedWidthBackend()))
+        else:
+            print(export_to_csv(SqliteBackend()))
+    else:
+        print("usage: python database/storage.py migrate [--force] [--fixed] | export [--fixed]")
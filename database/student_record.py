@@ -0,0 +1,285 @@
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# -----------------------------
+# StudentRecord
+# -----------------------------
+# One roster row, shared by the storage backends, the StudentStore, the core
+# managers and the UI builders. Values are kept parsed: ClassesAttended as an
+# int and TimeIn/TimeOut as minutes since midnight (None when empty). A
+# TimeIn/TimeOut that does not parse keeps its original text in
+# time_in_raw/time_out_raw and is written back unchanged; it still counts as
+# no time for the status rules.
+#
+# For compatibility it also answers the two dict shapes the code grew up with:
+#   attendance/CSV shape: "ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut", "Img_Path"
+#   student shape:        "id", "name", "photo", "attended", "classes_total"
+# so r.get("TimeIn"), r["name"] and dict(r) (CSV shape) keep working.
+
+FIELDS = ("ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut", "Img_Path")
+CLASSES_PER_QUARTER = 20
+PLACEHOLDER_PHOTO = "/assets/placeholder.png"  # Web path
+
+
+def time_to_minutes(value: Any) -> Optional[int]:
+    """'4:32 PM' / '16:32' -> minutes since midnight; None when empty or unparsable."""
+    if value is None or isinstance(value, int):
+        return value
+    return _parse_time(str(value))
+
+
+@lru_cache(maxsize=4096)
+def _parse_time(value: str) -> Optional[int]:
+    # a roster only ever holds a few hundred distinct time strings
+    value = value.strip()
+    if not value:
+        return None
+    # fast path for the format the serial loop writes ("4:32 PM" / "04:32 PM")
+    hh, sep, rest = value.partition(":")
+    if sep and len(rest) == 5 and rest[2] == " " and hh.isdigit() and rest[:2].isdigit():
+        hour, minute, ampm = int(hh), int(rest[:2]), rest[3:].upper()
+        if 1 <= hour <= 12 and minute < 60 and ampm in ("AM", "PM"):
+            return (hour % 12 + (12 if ampm == "PM" else 0)) * 60 + minute
+    for fmt in ("%I:%M %p", "%H:%M"):
+        try:
+            t = datetime.strptime(value, fmt)
+            return t.hour * 60 + t.minute
+        except ValueError:
+            continue
+    return None
+
+
+def time_fields(value: Any) -> Tuple[Optional[int], str]:
+    """(minutes, original text when it does not parse) for a TimeIn/TimeOut value."""
+    minutes = time_to_minutes(value)
+    return minutes, _raw_time(value, minutes)
+
+
+def _raw_time(value: Any, minutes: Optional[int]) -> str:
+    """The original text of a time that did not parse ("" when it parsed or was empty)."""
+    if minutes is not None or value is None or isinstance(value, int):
+        return ""
+    value = str(value)
+    return value if value.strip() else ""
+
+
+def minutes_to_time(minutes: Optional[int]) -> str:
+    """Inverse of time_to_minutes, formatted like models._now_str() ('4:32 PM')."""
+    if minutes is None:
+        return ""
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour % 12) or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def resolve_photo_path(img_path: str) -> str:
+    """Return Web-ready path for Flet Web"""
+    if not img_path:
+        return PLACEHOLDER_PHOTO
+    path = str(img_path).replace("\\", "/")
+    if not path.startswith("/assets/"):
+        path = "/" + path
+    return path
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except Exception:
+        return 0
+
+
+def records_from_csv_rows(header: Sequence[str], rows) -> List["StudentRecord"]:
+    """
+    Build StudentRecords straight from csv.reader rows (no intermediate dicts).
+    Columns are matched by header name, so extra or reordered columns are fine.
+    """
+    pos = [header.index(k) if k in header else -1 for k in FIELDS]
+    width = max(pos) + 1
+    i_id, i_name, i_status, i_attended, i_in, i_out, i_img = pos
+    intern = sys.intern
+    out = []
+    for row in rows:
+        if not row:
+            continue
+        if len(row) < width:
+            row = list(row) + [""] * (width - len(row))
+        time_in = _parse_time(row[i_in]) if i_in >= 0 else None
+        time_out = _parse_time(row[i_out]) if i_out >= 0 else None
+        out.append(StudentRecord(
+            row[i_id].strip() if i_id >= 0 else "",
+            row[i_name] if i_name >= 0 else "",
+            intern(row[i_status]) if i_status >= 0 else "",
+            _to_int(row[i_attended]) if i_attended >= 0 else 0,
+            time_in,
+            time_out,
+            row[i_img] if i_img >= 0 else "",
+            _raw_time(row[i_in], None) if time_in is None and i_in >= 0 else "",
+            _raw_time(row[i_out], None) if time_out is None and i_out >= 0 else "",
+        ))
+    return out
+
+
+class StudentRecord:
+    """A roster row with parsed fields; see the module comment for the dict-style keys."""
+
+    __slots__ = ("id", "name", "status", "classes_attended", "time_in", "time_out", "img_path",
+                 "time_in_raw", "time_out_raw")
+
+    classes_total = CLASSES_PER_QUARTER
+
+    def __init__(self, id: str = "", name: str = "", status: str = "", classes_attended: int = 0,
+                 time_in: Optional[int] = None, time_out: Optional[int] = None, img_path: str = "",
+                 time_in_raw: str = "", time_out_raw: str = ""):
+        self.id = id
+        self.name = name
+        self.status = status
+        self.classes_attended = classes_attended
+        self.time_in = time_in
+        self.time_out = time_out
+        self.img_path = img_path
+        self.time_in_raw = time_in_raw
+        self.time_out_raw = time_out_raw
+
+    @classmethod
+    def from_row(cls, row: Any) -> "StudentRecord":
+        """Build from a CSV-shaped dict (strings) or return a copy of a record."""
+        if isinstance(row, StudentRecord):
+            return row.copy()
+        record = cls(
+            str(row.get("ID") or "").strip(),
+            str(row.get("Name") or ""),
+            str(row.get("Status") or ""),
+            _to_int(row.get("ClassesAttended")),
+            img_path=str(row.get("Img_Path") or ""),
+        )
+        _set_time_in(record, row.get("TimeIn"))
+        _set_time_out(record, row.get("TimeOut"))
+        return record
+
+    def copy(self) -> "StudentRecord":
+        return StudentRecord(*self._key())
+
+    def to_row(self) -> Dict[str, str]:
+        """CSV-shaped dict of strings."""
+        return {k: self[k] for k in FIELDS}
+
+    # --- derived values ---
+    @property
+    def time_in_str(self) -> str:
+        return self.time_in_raw if self.time_in is None else minutes_to_time(self.time_in)
+
+    @property
+    def time_out_str(self) -> str:
+        return self.time_out_raw if self.time_out is None else minutes_to_time(self.time_out)
+
+    @property
+    def photo(self) -> str:
+        return resolve_photo_path(self.img_path)
+
+    # --- dict compatibility ---
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return _GETTERS[key](self)
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        try:
+            _SETTERS[key](self, value)
+        except KeyError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        getter = _GETTERS.get(key)
+        return getter(self) if getter is not None else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in _GETTERS
+
+    def keys(self):
+        return FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def update(self, fields: Dict[str, Any]) -> None:
+        for k, v in fields.items():
+            self[k] = v
+
+    def _key(self) -> tuple:
+        return (self.id, self.name, self.status, self.classes_attended, self.time_in, self.time_out, self.img_path,
+                self.time_in_raw, self.time_out_raw)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, StudentRecord):
+            return self._key() == other._key()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # compact pickles for the writer service connection
+        return StudentRecord, self._key()
+
+    def __repr__(self) -> str:
+        return (f"StudentRecord(id={self.id!r}, name={self.name!r}, status={self.status!r}, "
+                f"attended={self.classes_attended}, time_in={self.time_in_str!r}, time_out={self.time_out_str!r})")
+
+
+def _set_id(r: StudentRecord, v: Any) -> None:
+    r.id = str(v or "").strip()
+
+
+def _set_name(r: StudentRecord, v: Any) -> None:
+    r.name = str(v or "")
+
+
+def _set_status(r: StudentRecord, v: Any) -> None:
+    r.status = str(v or "")
+
+
+def _set_attended(r: StudentRecord, v: Any) -> None:
+    r.classes_attended = _to_int(v)
+
+
+def _set_time_in(r: StudentRecord, v: Any) -> None:
+    r.time_in, r.time_in_raw = time_fields(v)
+
+
+def _set_time_out(r: StudentRecord, v: Any) -> None:
+    r.time_out, r.time_out_raw = time_fields(v)
+
+
+def _set_img(r: StudentRecord, v: Any) -> None:
+    r.img_path = str(v or "")
+
+
+_GETTERS = {
+    "ID": lambda r: r.id,
+    "Name": lambda r: r.name,
+    "Status": lambda r: r.status,
+    "ClassesAttended": lambda r: str(r.classes_attended),
+    "TimeIn": lambda r: r.time_in_str,
+    "TimeOut": lambda r: r.time_out_str,
+    "Img_Path": lambda r: r.img_path,
+    "id": lambda r: r.id,
+    "name": lambda r: r.name,
+    "photo": lambda r: r.photo,
+    "attended": lambda r: r.classes_attended,
+    "classes_total": lambda r: r.classes_total,
+}
+
+_SETTERS = {
+    "ID": _set_id,
+    "Name": _set_name,
+    "Status": _set_status,
+    "ClassesAttended": _set_attended,
+    "TimeIn": _set_time_in,
+    "TimeOut": _set_time_out,
+    "Img_Path": _set_img,
+    "id": _set_id,
+    "name": _set_name,
+    "attended": _set_attended,
+}
@@ -0,0 +1,349 @@
+import os
+import queue
+import secrets
+import signal
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+if __package__ in (None, ""):
+    # allow "python database/writer_service.py"
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import changes
+
+# -----------------------------
+# Single-writer persistence service
+# -----------------------------
+# One process owns Students_Data.csv / recordsync.db. The serial loop and the
+# GUI send it commands over a local socket; it applies them in arrival order,
+# commits each drained batch with a single write (group commit) and publishes
+# the new data version. When no writer is running, callers fall back to
+# writing locally exactly as before.
+#
+# The GUI runs it under services/ingest_supervisor.py (WriterSupervisor),
+# which restarts it after a crash and stops it on exit; each command runs in
+# its own nested StudentStore.batch, so a command that fails is rolled back
+# without touching the rest of the batch.
+
+DB_DIR = Path(__file__).resolve().parent
+KEY_FILE = DB_DIR / ".writer_key"
+VERSION_FILE = DB_DIR / "data_version"
+
+WRITER_HOST = "127.0.0.1"
+WRITER_PORT = int(os.environ.get("RECORDSYNC_WRITER_PORT", "47651"))
+MAX_BATCH = 256
+RECONNECT_BACKOFF_SECONDS = 2.0
+STATS_INTERVAL_SECONDS = 30.0
+
+# set in the writer process so the managers it calls run their local code path
+IS_WRITER = False
+
+
+class WriterError(RuntimeError):
+    """Raised in the client when the writer reports an unexpected failure."""
+
+
+# errors the managers raise on purpose are re-raised with the same type in the caller
+_PASSTHROUGH_ERRORS = {"KeyError": KeyError, "ValueError": ValueError}
+
+
+def read_version() -> int:
+    """Return the last published data version (0 if none yet)."""
+    try:
+        return int(VERSION_FILE.read_text(encoding="utf-8").strip() or 0)
+    except Exception:
+        return 0
+
+
+def _publish_version(version: int) -> None:
+    tmp = VERSION_FILE.with_suffix(".tmp")
+    tmp.write_text(str(version), encoding="utf-8")
+    os.replace(tmp, VERSION_FILE)
+
+
+def _save_key(key: bytes) -> None:
+    KEY_FILE.write_bytes(key)
+    try:
+        os.chmod(KEY_FILE, 0o600)
+    except Exception:
+        pass
+
+
+def _load_key() -> Optional[bytes]:
+    try:
+        return KEY_FILE.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+# -----------------------------
+# Server
+# -----------------------------
+def _operations() -> Dict[str, Callable[..., Any]]:
+    from core import attendance_manager, student_manager
+    from core.student_store import get_store
+
+    return {
+        "scan": lambda *a: get_store().record_scan(*a),
+        "scans": lambda scans: [get_store().record_scan(*s) for s in scans],
+        "add_student": student_manager.add_student,
+        "update_student": student_manager.update_student,
+        "delete_student": student_manager.delete_student,
+        "update_statuses": attendance_manager.update_statuses,
+        "logout_user": attendance_manager.logout_user,
+        "version": lambda: read_version(),
+    }
+
+
+class WriterService:
+    """Accepts commands from local clients and applies them with group commits."""
+
+    def __init__(self, host: str = WRITER_HOST, port: int = WRITER_PORT, max_batch: int = MAX_BATCH):
+        self.address = (host, port)
+        self.max_batch = max_batch
+        self.version = read_version()
+        self.commits = 0
+        self.commands = 0
+        self._queue: "queue.Queue[Tuple[Any, str, tuple]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._listener: Optional[Listener] = None
+        self._ops = _operations()
+
+    def serve_forever(self) -> None:
+        global IS_WRITER
+        IS_WRITER = True
+        key = secrets.token_bytes(32)
+        self._listener = Listener(self.address, backlog=16, authkey=key)
+        # only publish the key once we own the port (a second writer fails to bind above)
+        _save_key(key)
+        threading.Thread(target=self._accept_loop, daemon=True, name="writer-accept").start()
+        print(f"Writer service listening on {self.address[0]}:{self.address[1]} (version {self.version})")
+        try:
+            self._apply_loop()
+        finally:
+            self._listener.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._queue.put((None, "", ()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"version": self.version, "commits": self.commits, "commands": self.commands}
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                if self._stop.is_set():
+                    return
+                continue
+            threading.Thread(target=self._client_loop, args=(conn,), daemon=True, name="writer-client").start()
+
+    def _client_loop(self, conn) -> None:
+        try:
+            while not self._stop.is_set():
+                op, args = conn.recv()
+                self._queue.put((conn, op, tuple(args)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _drain(self) -> List[Tuple[Any, str, tuple]]:
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return [cmd for cmd in batch if cmd[0] is not None]
+
+    def _apply_loop(self) -> None:
+        from core.student_store import get_store
+
+        store = get_store()
+        while not self._stop.is_set():
+            batch = self._drain()
+            if not batch:
+                continue
+            replies = []
+            commit_error = None
+            writes = store.writes
+            try:
+                with store.batch():
+                    for conn, op, args in batch:
+                        replies.append((conn, self._apply_one(store, op, args)))
+            except Exception as e:
+                commit_error = ("err", "WriterError", f"commit failed: {e}")
+                print(f"Writer commit error: {e}")
+            else:
+                self.commands += len(batch)
+                # a batch that changed nothing (e.g. a no-op status recompute) is not a new version
+                if store.writes != writes:
+                    self.version += 1
+                    self.commits += 1
+                    try:
+                        _publish_version(self.version)
+                    except Exception as e:
+                        print(f"Error publishing data version: {e}")
+            # reply only after the batch is committed
+            for conn, reply in replies:
+                status, result, detail = commit_error or reply
+                try:
+                    conn.send((status, result, detail, self.version))
+                except Exception:
+                    pass
+
+    def _apply_one(self, store, op: str, args: tuple) -> Tuple[str, Any, Any]:
+        fn = self._ops.get(op)
+        if fn is None:
+            return "err", "WriterError", f"unknown operation {op!r}"
+        try:
+            # a command that raises leaves no half-applied changes in the batch
+            with store.batch():
+                result = fn(*args)
+            return "ok", result, None
+        except Exception as e:
+            return "err", type(e).__name__, e.args[0] if len(e.args) == 1 else str(e)
+
+
+def run(stop=None, on_stats: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+    """
+    Serve until Ctrl+C / SIGTERM or until `stop` (a threading or
+    multiprocessing Event) is set; the batch being applied is committed first.
+    on_stats(snapshot) receives stats() every STATS_INTERVAL_SECONDS and once
+    more on exit. Raises OSError when the port is taken (the supervisor retries).
+    """
+    service = WriterService()
+    done = threading.Event()
+
+    def watch() -> None:
+        next_stats = time.monotonic() + STATS_INTERVAL_SECONDS
+        while not done.is_set():
+            if stop is not None and stop.is_set():
+                service.stop()
+                return
+            done.wait(0.5)
+            if on_stats is not None and time.monotonic() >= next_stats:
+                next_stats += STATS_INTERVAL_SECONDS
+                on_stats(service.stats())
+
+    threading.Thread(target=watch, daemon=True, name="writer-stop").start()
+    previous = None
+    if threading.current_thread() is threading.main_thread():
+        # the handler may interrupt the queue's own lock: stop from another thread
+        previous = signal.signal(signal.SIGTERM,
+                                 lambda *_: threading.Thread(target=service.stop, daemon=True).start())
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        done.set()
+        if previous is not None:
+            signal.signal(signal.SIGTERM, previous)
+    if on_stats is not None:
+        on_stats(service.stats())
+    print("Writer service stopped.")
+
+
+# -----------------------------
+# Client
+# -----------------------------
+class WriterClient:
+    """Blocking request/reply connection to the writer service (thread-safe)."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.Lock()
+        self.last_version = 0
+
+    def call(self, op: str, *args) -> Any:
+        with self._lock:
+            self._conn.send((op, args))
+            status, result, detail, version = self._conn.recv()
+        self.last_version = version
+        if status == "ok":
+            return result
+        raise _PASSTHROUGH_ERRORS.get(result, WriterError)(detail)
+
+    def close(self) -> None:
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+
+_client: Optional[WriterClient] = None
+_client_lock = threading.Lock()
+_next_attempt = 0.0
+
+
+def writer_client() -> Optional[WriterClient]:
+    """
+    Return a connected client, or None when running inside the writer or when
+    no writer is reachable (callers then write locally). Failed connection
+    attempts are retried at most every RECONNECT_BACKOFF_SECONDS.
+    """
+    global _client, _next_attempt
+    if IS_WRITER or os.environ.get("RECORDSYNC_WRITER") == "off":
+        return None
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is not None or time.monotonic() < _next_attempt:
+            return _client
+        key = _load_key()
+        if key is not None:
+            try:
+                _client = WriterClient(Client((WRITER_HOST, WRITER_PORT), authkey=key))
+            except Exception:
+                _client = None
+        if _client is None:
+            _next_attempt = time.monotonic() + RECONNECT_BACKOFF_SECONDS
+        return _client
+
+
+def call_writer(op: str, *args) -> Tuple[bool, Any]:
+    """
+    Send op to the writer. Returns (True, result) when the writer handled it,
+    (False, None) when the caller should run the operation locally.
+    """
+    global _client
+    client = writer_client()
+    if client is None:
+        return False, None
+    try:
+        before = client.last_version
+        result = client.call(op, *args)
+        if client.last_version != before and changes.current_origin() is not None:
+            # the writer has committed by the time it replies: tag what it left on disk as ours
+            from database.storage import get_backend
+
+            changes.record_write(changes.file_signature(get_backend().watch_paths()))
+        return True, result
+    except (EOFError, OSError, ConnectionError):
+        # writer went away: drop the connection and let the caller write locally
+        with _client_lock:
+            if _client is client:
+                client.close()
+                _client = None
+        return False, None
+
+
+if __name__ == "__main__":
+    # run the package module, not __main__, so the managers see IS_WRITER
+    from database import writer_service
+
+    try:
+        writer_service.run()
+    except OSError as e:
+        print(f"Writer service not started (already running?): {e}")
@@ -1,8 +1,10 @@
 from pathlib import Path
+import multiprocessing
 import sys
-import subprocess
 import flet as ft
 import router
+from services.ingest_supervisor import IngestSupervisor, WorkerSupervisor, WriterSupervisor
+from utils.metrics import MetricsExporter
 
 
 # Determine the project root
@@ -14,20 +16,31 @@ else:
     project_root = Path(__file__).resolve().parent
 
 
-def _start_models_process(project_root: Path) -> None:
+def _start_worker(supervisor: WorkerSupervisor) -> WorkerSupervisor:
     """
-    Start database/models.py as a separate Python process so the serial loop
-    does not block the GUI. Non-fatal: failures are printed but do not stop the app.
+    Start a background worker under its supervisor, which restarts it after a
+    crash and forwards its output to the log.
+    Non-fatal: failures are printed but do not stop the app.
     """
     try:
-        models_py = project_root / "database" / "models.py"
-        if not models_py.exists():
-            return
-
-        # Use the same Python executable
-        subprocess.Popen([sys.executable, str(models_py)], cwd=str(project_root))
+        supervisor.start()
     except Exception as e:
-        print(f"Failed to start models process: {e}")
+        print(f"Failed to start {supervisor.spec.description}: {e}")
+    return supervisor
+
+
+def _start_writer() -> WriterSupervisor:
+    """
+    The single process that writes student data (database/writer_service.py).
+    The GUI and the serial loop send it their changes; while it is down they
+    write locally instead.
+    """
+    return _start_worker(WriterSupervisor())
+
+
+def _start_ingest_worker() -> IngestSupervisor:
+    """The RFID ingestion worker (database/models.py)."""
+    return _start_worker(IngestSupervisor())
 
 
 def main(page: ft.Page):
@@ -47,11 +60,29 @@ def main(page: ft.Page):
 
 
 if __name__ == "__main__":
-    # Start background models process
-    _start_models_process(project_root)
+    # The writer and the ingestion worker run in multiprocessing children; a
+    # frozen build must hand those children over to them before starting the GUI
+    multiprocessing.freeze_support()
+
+    # Start the data writer first so the serial loop and GUI can both use it
+    writer = _start_writer()
+
+    # Start the background ingestion worker
+    ingest = _start_ingest_worker()
+
+    # Serve ingestion/UI metrics on 127.0.0.1 and snapshot them to database/metrics.json
+    metrics = MetricsExporter()
+    metrics.start()
 
     # Launch Flet app in a native window
-    ft.app(
-        target=main,
-        assets_dir=str(project_root / "assets")
-    )
+    try:
+        ft.app(
+            target=main,
+            assets_dir=str(project_root / "assets")
+        )
+    finally:
+        # let the worker store any buffered scans (through the writer) before
+        # the writer commits its last batch and exits
+        ingest.stop()
+        writer.stop()
+        metrics.stop()
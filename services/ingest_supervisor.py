@@ -0,0 +1,372 @@
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from utils.logger import PrintToLogger, configure, get_logger
+from utils.metrics import METRICS_FILE_ENV, METRICS_PORT_ENV, REGISTRY, family, sample
+
+# -----------------------------
+# Background worker supervisor
+# -----------------------------
+# Runs the GUI's background workers and keeps them running:
+#   ingest  the serial ingestion worker (database/models.run)
+#   writer  the single-writer persistence service (database/writer_service.run)
+# For each one:
+#   - the worker is restarted with backoff when it crashes (exits non-zero or
+#     raises); a clean exit (Ctrl+C / SIGTERM reached the worker) is final
+#   - its output is forwarded to the "recordsync.<name>" logger
+#   - its stats snapshots are kept (stats()) and passed to on_stats; its
+#     metrics show up in this process's registry (utils/metrics.py), so the
+#     GUI's metrics endpoint covers the worker in every mode
+#   - stop() asks the worker to finish its work (store buffered scans, commit
+#     the current batch) and exit, and kills it only if it does not finish
+#     within STOP_TIMEOUT_SECONDS
+#
+# Modes (RECORDSYNC_WORKER_MODE):
+#   process     multiprocessing child (default): a crash or a blocked serial
+#               driver cannot take the GUI down
+#   thread      in the GUI process; cheapest, but print() output goes straight
+#               to the console instead of through the logger
+#   subprocess  "python database/<worker>.py" with its stdout piped back; not
+#               available in a PyInstaller bundle (falls back to process)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MODELS_PY = PROJECT_ROOT / "database" / "models.py"
+WRITER_PY = PROJECT_ROOT / "database" / "writer_service.py"
+
+WORKER_MODES = ("process", "thread", "subprocess")
+WORKER_MODE_ENV = "RECORDSYNC_WORKER_MODE"
+RESTART_MIN_SECONDS = 1.0
+RESTART_MAX_SECONDS = 60.0
+STABLE_SECONDS = 60.0  # a worker that ran this long restarts without backoff
+STOP_TIMEOUT_SECONDS = 10.0
+POLL_SECONDS = 0.5
+
+# kept in step with database/models.py (not imported: that pulls in pyserial)
+WORKER_STATS_ENV = "RECORDSYNC_WORKER_STATS"
+STATS_LINE_PREFIX = "@stats "
+
+
+
+class WorkerSpec:
+    """
+    A supervised worker: `module` has run(stop=None, on_stats=None), which
+    returns once `stop` is set; `script` runs the same thing standalone.
+    """
+
+    def __init__(self, name: str, module: str, script: Path, description: str):
+        self.name = name
+        self.module = module
+        self.script = script
+        self.description = description
+
+    @property
+    def log(self) -> logging.Logger:
+        return get_logger(self.name)
+
+
+INGEST = WorkerSpec("ingest", "database.models", MODELS_PY, "ingestion worker")
+WRITER = WorkerSpec("writer", "database.writer_service", WRITER_PY, "writer service")
+
+
+def default_mode() -> str:
+    mode = os.environ.get(WORKER_MODE_ENV, "process").strip().lower()
+    if mode not in WORKER_MODES:
+        print(f"Unknown {WORKER_MODE_ENV} '{mode}', using 'process'")
+        mode = "process"
+    if mode == "subprocess" and getattr(sys, "frozen", False):
+        mode = "process"  # there is no python + models.py inside the bundle
+    return mode
+
+
+# -----------------------------
+# Worker entry points
+# -----------------------------
+def _process_main(queue, stop, spec: WorkerSpec) -> None:
+    """multiprocessing target: run the worker with logs and stats sent over `queue`."""
+    configure(QueueHandler(queue))
+    sys.stdout = PrintToLogger(spec.log)
+    sys.stderr = PrintToLogger(spec.log, logging.WARNING)
+    worker = importlib.import_module(spec.module)
+    worker.run(stop=stop, on_stats=lambda snapshot: queue.put(("stats", snapshot)))
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+
+class _ThreadWorker:
+    def __init__(self, spec: WorkerSpec, publish: Callable[[Dict[str, Any]], None]):
+        self._spec = spec
+        self._publish = publish
+        self._stop = threading.Event()
+        self.pid: Optional[int] = None  # same process as the GUI
+        self.exit_code: Optional[int] = None
+        self._thread = threading.Thread(target=self._run, name=spec.name, daemon=True)
+
+    def _run(self) -> None:
+        try:
+            worker = importlib.import_module(self._spec.module)
+            worker.run(stop=self._stop, on_stats=self._publish)
+            self.exit_code = 0
+        except Exception:
+            self._spec.log.exception("%s failed", self._spec.description.capitalize())
+            self.exit_code = 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def stop(self, timeout: float) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            self._spec.log.warning("%s thread did not stop within %.0f s",
+                                   self._spec.description.capitalize(), timeout)
+
+
+class _ProcessWorker:
+    def __init__(self, spec: WorkerSpec, publish: Callable[[Dict[str, Any]], None]):
+        self._spec = spec
+        self._publish = publish
+        ctx = multiprocessing.get_context("spawn")  # never fork a process that runs the GUI
+        self._queue = ctx.Queue()
+        self._stop = ctx.Event()
+        self._proc = ctx.Process(target=_process_main, args=(self._queue, self._stop, spec),
+                                 name=spec.name, daemon=True)
+        self._pump = threading.Thread(target=self._forward, name=f"{spec.name}-log", daemon=True)
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid
+
+    @property
+    def exit_code(self) -> Optional[int]:
+        return self._proc.exitcode
+
+    def start(self) -> None:
+        self._proc.start()
+        self._pump.start()
+
+    def alive(self) -> bool:
+        return self._proc.is_alive()
+
+    def _forward(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=POLL_SECONDS)
+            except Exception:
+                if not self._proc.is_alive() and self._queue.empty():
+                    return
+                continue
+            if isinstance(item, logging.LogRecord):
+                logging.getLogger(item.name).handle(item)
+            elif isinstance(item, tuple) and item[:1] == ("stats",):
+                self._publish(item[1])
+
+    def stop(self, timeout: float) -> None:
+        self._stop.set()
+        self._proc.join(timeout)
+        if self._proc.is_alive():
+            self._spec.log.warning("%s process did not stop within %.0f s, terminating it",
+                                   self._spec.description.capitalize(), timeout)
+            self._proc.terminate()
+            self._proc.join(2.0)
+            if self._proc.is_alive():
+                self._proc.kill()
+                self._proc.join()
+        self._pump.join(2 * POLL_SECONDS)
+
+
+class _SubprocessWorker:
+    def __init__(self, spec: WorkerSpec, publish: Callable[[Dict[str, Any]], None]):
+        self._spec = spec
+        self._publish = publish
+        self._proc: Optional[subprocess.Popen] = None
+        self._pump: Optional[threading.Thread] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc else None
+
+    @property
+    def exit_code(self) -> Optional[int]:
+        return self._proc.poll() if self._proc else None
+
+    def start(self) -> None:
+        env = dict(os.environ, PYTHONUNBUFFERED="1")
+        env[WORKER_STATS_ENV] = "1"
+        # the GUI publishes the metrics; the child must not take its port
+        env[METRICS_PORT_ENV] = "0"
+        env[METRICS_FILE_ENV] = ""
+        self._proc = subprocess.Popen([sys.executable, str(self._spec.script)], cwd=str(PROJECT_ROOT), env=env,
+                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                      text=True, encoding="utf-8", errors="replace")
+        self._pump = threading.Thread(target=self._forward, name=f"{self._spec.name}-log", daemon=True)
+        self._pump.start()
+
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _forward(self) -> None:
+        for line in self._proc.stdout:
+            line = line.rstrip()
+            if line.startswith(STATS_LINE_PREFIX):
+                try:
+                    self._publish(json.loads(line[len(STATS_LINE_PREFIX):]))
+                except ValueError:
+                    pass
+            elif line.strip():
+                self._spec.log.info(line)
+
+    def stop(self, timeout: float) -> None:
+        if not self.alive():
+            return
+        # SIGTERM lets the worker finish its work; Windows has no such signal, terminate() is final
+        if os.name == "nt":
+            self._proc.terminate()
+        else:
+            self._proc.send_signal(signal.SIGTERM)
+        try:
+            self._proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._spec.log.warning("%s process did not stop within %.0f s, killing it",
+                                   self._spec.description.capitalize(), timeout)
+            self._proc.kill()
+            self._proc.wait()
+        if self._pump is not None:
+            self._pump.join(2.0)
+
+
+_WORKERS = {"thread": _ThreadWorker, "process": _ProcessWorker, "subprocess": _SubprocessWorker}
+
+
+# -----------------------------
+# Supervisor
+# -----------------------------
+class WorkerSupervisor:
+    """Starts the worker described by `spec` in `mode`, restarts it after a crash and stops it on request."""
+
+    def __init__(self, spec: WorkerSpec, mode: Optional[str] = None,
+                 on_stats: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.spec = spec
+        self.mode = mode or default_mode()
+        if self.mode not in _WORKERS:
+            raise ValueError(f"unknown worker mode: {self.mode}")
+        self.on_stats = on_stats
+        self.restarts = 0
+        self.last_exit: Optional[int] = None
+        self.started_at: Optional[float] = None
+        self.worker_stats: Dict[str, Any] = {}
+        self._worker = None
+        self._stopping = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+        REGISTRY.register_collector(f"{spec.name}-supervisor", self.collect)
+
+    def start(self) -> None:
+        if self._monitor is not None:
+            return
+        self._monitor = threading.Thread(target=self._supervise, name=f"{self.spec.name}-supervisor", daemon=True)
+        self._monitor.start()
+
+    def stop(self, timeout: float = STOP_TIMEOUT_SECONDS) -> None:
+        """Stop the worker (it finishes its current work first) and wait for it."""
+        self._stopping.set()
+        if self._monitor is not None:
+            self._monitor.join(timeout + 5.0)
+
+    def running(self) -> bool:
+        return self._worker is not None and self._worker.alive()
+
+    def stats(self) -> Dict[str, Any]:
+        worker = self._worker
+        return {
+            "mode": self.mode,
+            "running": self.running(),
+            "pid": worker.pid if worker is not None else None,
+            "uptime": round(time.monotonic() - self.started_at, 1) if self.started_at and self.running() else 0.0,
+            "restarts": self.restarts,
+            "last_exit": self.last_exit,
+            "worker": self.worker_stats,
+        }
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Metrics collector: worker state plus, for child processes, the worker's own metrics."""
+        out = {
+            "recordsync_worker_up": family("gauge", "1 while the background worker runs",
+                                           [sample(int(self.running()), worker=self.spec.name, mode=self.mode)]),
+            "recordsync_worker_restarts_total": family("counter", "Background worker restarts after a crash",
+                                                       [sample(self.restarts, worker=self.spec.name,
+                                                               mode=self.mode)]),
+        }
+        if self.mode != "thread":  # a thread worker records into this registry directly
+            out.update(self.worker_stats.get("metrics") or {})
+        return out
+
+    def _publish(self, snapshot: Dict[str, Any]) -> None:
+        self.worker_stats = snapshot
+        if self.on_stats is not None:
+            try:
+                self.on_stats(snapshot)
+            except Exception as e:
+                self.spec.log.warning("Error handling %s stats: %s", self.spec.description, e)
+
+    def _supervise(self) -> None:
+        log, what = self.spec.log, self.spec.description.capitalize()
+        delay = RESTART_MIN_SECONDS
+        while not self._stopping.is_set():
+            worker = _WORKERS[self.mode](self.spec, self._publish)
+            try:
+                worker.start()
+            except Exception as e:
+                log.error("Cannot start %s (%s): %s", self.spec.description, self.mode, e)
+                worker = None
+            else:
+                self._worker = worker
+                self.started_at = time.monotonic()
+                log.info("%s started (%s%s)", what, self.mode,
+                         f", pid {worker.pid}" if worker.pid else "")
+                while worker.alive() and not self._stopping.is_set():
+                    self._stopping.wait(POLL_SECONDS)
+                if self._stopping.is_set():
+                    worker.stop(STOP_TIMEOUT_SECONDS)
+                    self.last_exit = worker.exit_code
+                    log.info("%s stopped", what)
+                    return
+                self.last_exit = worker.exit_code
+                if self.last_exit == 0:
+                    log.info("%s exited", what)
+                    return
+                if time.monotonic() - self.started_at >= STABLE_SECONDS:
+                    delay = RESTART_MIN_SECONDS
+            log.warning("%s exited with %s, restarting in %.0f s", what, self.last_exit, delay)
+            if self._stopping.wait(delay):
+                return
+            self.restarts += 1
+            delay = min(RESTART_MAX_SECONDS, delay * 2)
+
+
+class IngestSupervisor(WorkerSupervisor):
+    """The RFID ingestion worker (database/models.run)."""
+
+    def __init__(self, mode: Optional[str] = None,
+                 on_stats: Optional[Callable[[Dict[str, Any]], None]] = None):
+        super().__init__(INGEST, mode, on_stats)
+
+
+class WriterSupervisor(WorkerSupervisor):
+    """The single-writer service (database/writer_service.run) that owns the student data."""
+
+    def __init__(self, mode: Optional[str] = None,
+                 on_stats: Optional[Callable[[Dict[str, Any]], None]] = None):
+        super().__init__(WRITER, mode, on_stats)
@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from arduino import serial_config  # noqa: E402
+from core import attendance_manager, schedule, student_store  # noqa: E402
+from database import fixed_roster, history, scan_journal, storage  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Point every data file (roster, journal, settings, SQLite, history) at a
+    temporary directory, with the writer service off and no cached state.
+    """
+    monkeypatch.setenv("RECORDSYNC_WRITER", "off")
+    monkeypatch.delenv("RECORDSYNC_STORAGE", raising=False)
+    monkeypatch.delenv("RECORDSYNC_STATUS_ENGINE", raising=False)
+
+    students_csv = tmp_path / "Students_Data.csv"
+    settings_json = tmp_path / "settings.json"
+    for module, name, value in (
+        (scan_journal, "DB_DIR", tmp_path),
+        (scan_journal, "STUDENTS_CSV", students_csv),
+        (scan_journal, "JOURNAL_FILE", tmp_path / "Scan_Journal.log"),
+        (scan_journal, "LOCK_FILE", tmp_path / "Scan_Journal.lock"),
+        (storage, "DB_DIR", tmp_path),
+        (storage, "STUDENTS_CSV", students_csv),
+        (storage, "ADMIN_CSV", tmp_path / "admin.csv"),
+        (storage, "SETTINGS_JSON", settings_json),
+        (storage, "SQLITE_DB", tmp_path / "recordsync.db"),
+        (fixed_roster, "ROSTER_BIN", tmp_path / "Students_Data.bin"),
+        (history, "HISTORY_DIR", tmp_path / "history"),
+        (history, "INDEX_FILE", tmp_path / "history" / "index.json"),
+        (attendance_manager, "DB_DIR", tmp_path),
+        (attendance_manager, "SETTINGS_JSON", settings_json),
+        (schedule, "SETTINGS_JSON", settings_json),
+        (serial_config, "SETTINGS_JSON", settings_json),
+    ):
+        monkeypatch.setattr(module, name, value)
+    monkeypatch.setattr(storage, "_backend", None)
+    monkeypatch.setattr(storage, "_notifier", None)
+    monkeypatch.setattr(student_store, "_store", None)
+    monkeypatch.setitem(history._index_cache, "mtime_ns", None)
+    scan_journal._view.reset()
+    schedule.invalidate()
+    attendance_manager._status_fingerprints.clear()
+    yield tmp_path
+    backend = storage._backend
+    if backend is not None and hasattr(backend, "close"):
+        backend.close()
+    scan_journal._view.reset()
+    schedule.invalidate()
+    attendance_manager._status_fingerprints.clear()
@@ -0,0 +1,32 @@
+from core import attendance_manager
+from core.student_store import get_store
+
+
+def _roster():
+    store = get_store()
+    with store.batch():
+        for sid, time_in in (("1", "08:05 AM"), ("2", "08:40 AM"), ("3", "08:10 AM")):
+            store.insert({"ID": sid, "Name": f"Student {sid}", "Status": "", "ClassesAttended": 0, "TimeIn": time_in})
+    return store
+
+
+def test_update_statuses_limited_to_ids(data_dir):
+    store = _roster()
+    results = attendance_manager.update_statuses("08:00 AM", "09:00 AM", 15, student_ids=["2", "2"])
+
+    assert results["changed"] == {"2": {"old": "", "new": "Late"}}
+    assert results["checked"] == 1
+    assert [r["ID"] for r in results["rows"]] == ["2"]
+    assert [(r.status, r.classes_attended) for r in store.rows()] == [("", 0), ("Late", 1), ("", 0)]
+
+    # the other rows are still recomputed by the next full pass, the limited one is not redone
+    results = attendance_manager.update_statuses("08:00 AM", "09:00 AM", 15)
+    assert set(results["changed"]) == {"1", "3"}
+    assert results["skipped"] == 1
+    assert [(r.status, r.classes_attended) for r in store.rows()] == [("Present", 1), ("Late", 1), ("Present", 1)]
+
+
+def test_update_statuses_ignores_unknown_ids(data_dir):
+    _roster()
+    results = attendance_manager.update_statuses("08:00 AM", "09:00 AM", 15, student_ids=["9"])
+    assert results["changed"] == {} and not results["written"] and not results["errors"]
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from arduino.dedup import TapDeduplicator
+
+
+def test_window_boundaries():
+    dedup = TapDeduplicator(3.0)
+    assert dedup.accept("A", 100.0)
+    assert not dedup.accept("A", 100.5)
+    assert dedup.accept("B", 101.0)
+    assert not dedup.accept("A", 102.99)  # a suppressed tap does not extend the window
+    assert dedup.accept("A", 103.0)
+    assert not dedup.accept("B", 103.5)
+    assert dedup.stats() == {"window": 3.0, "accepted": 3, "suppressed": 3, "tracked": 2}
+
+
+def test_disabled_window_and_clock():
+    dedup = TapDeduplicator(0)
+    assert all(dedup.accept("A", 5.0) for _ in range(3))
+    assert dedup.tracked() == 0
+    now = [50.0]
+    dedup = TapDeduplicator(2, clock=lambda: now[0])
+    assert dedup.accept("A") and not dedup.accept("A")
+    now[0] += 2
+    assert dedup.accept("A")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference_and_forgets_old_cards(seed):
+    rng = random.Random(seed)
+    window = rng.choice([0.5, 2.0, 5.0])
+    dedup = TapDeduplicator(window)
+    last_accepted = {}
+    now = 1000.0
+    for _ in range(5000):
+        now += rng.expovariate(20)
+        card = f"card-{rng.randrange(50)}"
+        expected = card not in last_accepted or now - last_accepted[card] >= window
+        if expected:
+            last_accepted[card] = now
+        assert dedup.accept(card, now) is expected
+        # only about one window (plus one bucket) of distinct cards stays tracked
+        recent = sum(1 for t in last_accepted.values() if now - t < window * 1.2)
+        assert dedup.tracked() <= recent
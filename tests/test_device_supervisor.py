@@ -0,0 +1,53 @@
+import asyncio
+
+from arduino.device_supervisor import DeviceSupervisor
+from utils import inotify
+
+
+class _Pipeline:
+    on_port_lost = None
+
+
+class _Inotify:
+    def __init__(self, events):
+        self.events = events
+
+    def read_events(self):
+        events, self.events = self.events, []
+        return events
+
+    def watched(self):
+        return ["/dev", "/dev/serial/by-id"]
+
+
+def _supervisor(patterns=None):
+    kwargs = {"port_patterns": patterns} if patterns is not None else {}
+    sup = DeviceSupervisor(_Pipeline(), lambda: [], lambda path: None, **kwargs)
+    sup._wake = asyncio.Event()
+    return sup
+
+
+def test_port_event_filter():
+    sup = _supervisor()
+    assert sup.is_port_event("/dev", "ttyUSB0")
+    assert sup.is_port_event("/dev", "ttyACM12")
+    assert sup.is_port_event("/dev", "serial")
+    assert sup.is_port_event("/dev/serial/by-id", "usb-Arduino_Uno_123-if00")
+    assert sup.is_port_event("/dev", "")  # the watched directory itself
+    assert not sup.is_port_event("/dev", "tty3")
+    assert not sup.is_port_event("/dev", "pts")
+    assert not sup.is_port_event("/dev", "snd")
+    assert _supervisor(("ttyACM*", "ttyUSB*", "ttyS1")).is_port_event("/dev", "ttyS1")
+
+
+def test_unrelated_dev_events_do_not_wake_the_rescan():
+    sup = _supervisor()
+    sup._inotify = _Inotify([("/dev", inotify.IN_ATTRIB, "tty2"), ("/dev", inotify.IN_CREATE, "video0")])
+    sup._on_inotify()
+    assert not sup._wake.is_set()
+    assert sup.ignored_events == 2
+
+    sup._inotify.events = [("/dev", inotify.IN_ATTRIB, "tty2"), ("/dev", inotify.IN_CREATE, "ttyACM0")]
+    sup._on_inotify()
+    assert sup._wake.is_set()
+    assert sup.ignored_events == 3
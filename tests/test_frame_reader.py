@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from arduino import rfid_parser
+from arduino.arduino_reader import SEQ_MODULO, FrameReader, encode_frame
+from arduino.rfid_parser import BadIdError, EmptyFieldError, FieldCountError, InvalidUidError, parse_frame, parse_uid
+
+PAYLOADS = [b"Juan Dela Cruz,12,Present", "José Ñuñez,7,Late".encode(), b"04:A1:B2:C3", b"Ana,3,TimeOut"]
+
+
+def _stream(checked: bool, start: int = 0) -> bytes:
+    return b"".join(encode_frame(p, start + i if checked else None) for i, p in enumerate(PAYLOADS))
+
+
+@pytest.mark.parametrize("checked", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_frames_survive_any_split(checked, seed):
+    data = _stream(checked, start=SEQ_MODULO - 2)  # sequence wraps mid-stream
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(data)), 12))
+    reader = FrameReader()
+    out = []
+    for a, b in zip([0] + cuts, cuts + [len(data)]):
+        out += reader.feed(data[a:b])
+    assert out == PAYLOADS
+    assert reader.pending() == 0
+    assert reader.stats() == {"frames": 4, "bad_checksum": 0, "dropped": 0, "resets": 0, "overflows": 0}
+    assert reader.checked is checked
+
+
+def test_byte_at_a_time_and_crlf():
+    reader = FrameReader()
+    out = []
+    for b in b"Ana,3,Present\r\n\r\n04A1B2C3\r\n":
+        out += reader.feed(bytes([b]))
+    assert out == [b"Ana,3,Present", b"04A1B2C3"]
+
+
+def test_partial_frame_waits_for_newline():
+    reader = FrameReader()
+    assert reader.feed(b"Ana,3,Pre") == []
+    assert reader.pending() == 9
+    assert reader.feed(b"sent\nJuan") == [b"Ana,3,Present"]
+    assert reader.pending() == 4
+    reader.reset()  # reconnect: the half frame from the old connection is gone
+    assert reader.feed(b",1,Late\n") == [b",1,Late"]
+
+
+def test_sequence_gaps_resets_and_bad_checksums():
+    reader = FrameReader()
+    frames = [encode_frame(b"a,1,Present", 10), encode_frame(b"b,2,Present", 13), encode_frame(b"c,3,Present", 0)]
+    corrupt = bytearray(encode_frame(b"d,4,Present", 1))
+    corrupt[4] ^= 0x20
+    assert reader.feed(b"".join(frames) + bytes(corrupt) + b"@12|x,1,Late\n") == \
+        [b"a,1,Present", b"b,2,Present", b"c,3,Present"]
+    assert reader.stats() == {"frames": 3, "bad_checksum": 2, "dropped": 2, "resets": 1, "overflows": 0}
+
+
+def test_overlong_garbage_is_dropped():
+    reader = FrameReader(max_frame=16)
+    assert reader.feed(b"x" * 40) == []
+    assert reader.pending() == 0 and reader.overflows == 1
+    assert reader.feed(b"Ana,3,Late\n") == [b"Ana,3,Late"]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    rfid_parser.clear_cache()
+    yield
+    rfid_parser.clear_cache()
+
+
+def test_parse_frame():
+    assert parse_frame(b" Juan Dela Cruz , 12 ,Present ") == ("Juan Dela Cruz", 12, "Present")
+    assert parse_frame(bytearray("José,007,Late".encode())) == ("José", 7, "Late")
+    assert parse_frame(memoryview(b"Ana,3,Late")) == parse_frame(b"Ana,3,Late")  # cached copy
+    for frame, error in ((b"Ana,3", FieldCountError), (b"Ana,3,Late,x", FieldCountError),
+                         (b"Ana,-3,Late", BadIdError), (b"Ana,,Late", BadIdError),
+                         (b" ,3,Late", EmptyFieldError), (b"Ana,3,", EmptyFieldError)):
+        result = parse_frame(frame)
+        assert isinstance(result, error) and result.frame == frame
+
+
+def test_parse_uid():
+    assert parse_uid(b"04:a1:b2:c3") == "04A1B2C3"
+    assert parse_uid(b" 04 A1-B2C3 ") == "04A1B2C3"
+    for frame in (b"", b"04A1B", b"04G1", b"::"):
+        assert isinstance(parse_uid(frame), InvalidUidError)
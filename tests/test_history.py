@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from database import history
+
+WHEN = datetime(2026, 3, 2, 9, 15, 30)
+
+
+def _row(student_id, time_in="08:00 AM", status="Present"):
+    return {"ID": student_id, "Name": f"Student {student_id}", "Status": status,
+            "ClassesAttended": 1, "TimeIn": time_in, "TimeOut": ""}
+
+
+def test_sessions_archived_in_the_same_second_stay_apart(data_dir):
+    first = history.archive_session([_row("1"), _row("2")], when=WHEN)
+    second = history.archive_session([_row("1", "", "Late")], when=WHEN)
+    third = history.archive_session([_row("3")], when=WHEN)
+
+    assert (first["session"], second["session"], third["session"]) == ("091530", "091530-2", "091530-3")
+    rows = history.sessions_between("2026-03-02", "2026-03-02")
+    assert [(r["Session"], r["ID"]) for r in rows] == \
+        [("091530", "1"), ("091530", "2"), ("091530-2", "1"), ("091530-3", "3")]
+    assert history.daily_totals("2026-03-02", "2026-03-02")["2026-03-02"]["sessions"] == 3
+
+
+def test_rebuilt_index_counts_same_second_sessions(data_dir):
+    history.archive_session([_row("1")], when=WHEN)
+    history.archive_session([_row("1")], when=WHEN)
+    before = history.daily_totals("2026-03-02", "2026-03-02")
+    history.rebuild_index()
+    assert history.daily_totals("2026-03-02", "2026-03-02") == before
+    assert before["2026-03-02"]["sessions"] == 2
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+from arduino.arduino_reader import FrameReader, IngestPipeline, encode_frame
+from arduino.rfid_parser import parse_frame
+from arduino.serial_config import SerialConfig
+
+
+class _FakeSerial:
+    """
+    Hands out the given chunks, then reads nothing. Replies are decoded as they
+    are written and go to the shared log as ("reply", port, payload, checked).
+    """
+
+    in_waiting = 0
+
+    def __init__(self, name, chunks, log):
+        self.name = name
+        self.chunks = list(chunks)
+        self.log = log
+        self._replies = FrameReader()
+
+    def fileno(self):
+        return None  # thread-backed reads
+
+    def read(self, size):
+        if self.chunks:
+            return self.chunks.pop(0)
+        time.sleep(0.005)
+        return b""
+
+    def write(self, data):
+        for payload in self._replies.feed(data):
+            self.log.append(("reply", self.name, payload, data.startswith(b"@")))
+
+
+def _make_scan(payload, reader_id):
+    parsed = parse_frame(payload)
+    if isinstance(parsed, ValueError):
+        return None
+    name, number, status = parsed
+    return (str(number), name, status)
+
+
+def _run(ports, persist, log, replies):
+    pipeline = IngestPipeline(ports, _make_scan, persist, SerialConfig(flush_delay=0.01, dedup_window=60))
+
+    async def main():
+        task = asyncio.ensure_future(pipeline.run())
+        deadline = time.monotonic() + 5
+        while sum(1 for entry in log if entry[0] == "reply") < replies:
+            assert time.monotonic() < deadline, "replies missing"
+            await asyncio.sleep(0.01)
+        pipeline.stop()
+        await task
+
+    asyncio.run(main())
+    return pipeline
+
+
+def _replies(log, name):
+    return [entry[2] for entry in log if entry[0] == "reply" and entry[1] == name]
+
+
+def test_ack_only_after_the_scan_is_stored():
+    log = []
+
+    def persist(scans):
+        log.append(("stored", [scan[0] for scan in scans]))
+        return [scan[2] for scan in scans]
+
+    door_a = _FakeSerial("door-a", [b"Juan Dela Cruz,12,Pres", b"ent\nnoise\n", b"Juan Dela Cruz,12,Present\n"], log)
+    door_b = _FakeSerial("door-b", [encode_frame(b"Ana,3,Late", 7) + encode_frame(b"Ben,4,TimeOut", 8)], log)
+    pipeline = _run({"door-a": door_a, "door-b": door_b}, persist, log, replies=5)
+
+    assert sorted(_replies(log, "door-a")) == [b"ACK|12|Present", b"ACK|12|Repeat", b"NAK|-|rejected"]
+    assert _replies(log, "door-b") == [b"ACK|3|Late", b"ACK|4|TimeOut"]
+    # the checked-frame reader gets checked replies, the plain one plain lines
+    assert {entry[1]: entry[3] for entry in log if entry[0] == "reply"} == {"door-a": False, "door-b": True}
+    stored = []
+    for entry in log:
+        if entry[0] == "stored":
+            stored += entry[1]
+        elif entry[2].startswith(b"ACK") and not entry[2].endswith(b"|Repeat"):
+            assert entry[2].split(b"|")[1].decode() in stored, f"{entry[2]!r} sent before the scan was stored"
+    assert sorted(stored) == ["12", "3", "4"]
+    assert (pipeline.ports["door-a"].acks, pipeline.ports["door-a"].naks) == (2, 1)
+
+
+def test_failed_store_is_nakked_not_acked():
+    log = []
+
+    def persist(scans):
+        raise OSError("disk full")
+
+    door = _FakeSerial("door-a", [b"Ana,3,Late\nBen,4,Present\n"], log)
+    pipeline = _run({"door-a": door}, persist, log, replies=2)
+    assert _replies(log, "door-a") == [b"NAK|3|store_failed", b"NAK|4|store_failed"]
+    assert pipeline.failed_batches >= 1
+    assert (pipeline.ports["door-a"].acks, pipeline.ports["door-a"].naks) == (0, 2)
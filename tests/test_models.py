@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+pytest.importorskip("serial")
+
+from core.student_store import get_store  # noqa: E402
+from database import card_registry, models  # noqa: E402
+
+
+@pytest.fixture
+def cards(data_dir, monkeypatch):
+    path = data_dir / "cards.csv"
+    card_registry.enroll_cards([("04A1B2C3", "00-001", "Ada Lovelace"),
+                                ("04A1B2C4", "00-002", ""),
+                                ("04A1B2C5", "00-404", "")], path)
+    monkeypatch.setattr(models, "card_registry", card_registry.CardRegistry(path))
+    (data_dir / "settings.json").write_text(json.dumps({"class_start_time": "08:00 AM",
+                                                        "class_duration_minutes": 60}), encoding="utf-8")
+    get_store().insert({"ID": "00-002", "Name": "Ben Roster"})
+    return path
+
+
+def test_card_status_follows_the_schedule(cards, monkeypatch):
+    monkeypatch.setattr(models, "_now_str", lambda: "8:10 AM")
+    assert models._make_scan(b"04A1B2C3", "r0") == ("00-001", "Ada Lovelace", "Present", "8:10 AM")
+    monkeypatch.setattr(models, "_now_str", lambda: "8:40 AM")
+    assert models._make_scan(b"04A1B2C3", "r0") == ("00-001", "Ada Lovelace", "Late", "8:40 AM")
+
+
+def test_card_without_name_uses_the_roster_name(cards, monkeypatch):
+    monkeypatch.setattr(models, "_now_str", lambda: "8:10 AM")
+    assert models._make_scan(b"04A1B2C4", "r0") == ("00-002", "Ben Roster", "Present", "8:10 AM")
+
+
+def test_unknown_or_nameless_cards_are_rejected(cards):
+    assert models._make_scan(b"04A1B2C5", "r0") is None  # enrolled without a name, not on the roster
+    assert models._make_scan(b"0BADCAFE", "r0") is None  # not enrolled
@@ -0,0 +1,194 @@
+import os
+import random
+import threading
+
+import pytest
+
+from database import scan_journal
+from database.student_record import StudentRecord, minutes_to_time
+
+
+def _apply(rows, *scans):
+    index = {r.id: r for r in rows}
+    return [scan_journal.apply_scan(rows, index, time_str, sid, name, status)
+            for sid, name, status, time_str in scans]
+
+
+def test_late_scan_counts_like_present():
+    rows = [StudentRecord("2", "Ben")]
+    new, first, out = _apply(rows, ("1", "Ada", "Late", "8:40 AM"), ("2", "Ben", "late", "8:41 AM"),
+                             ("1", "Ada", "Late", "9:30 AM"))
+    assert (new.status, new.classes_attended, new["TimeIn"], new["TimeOut"]) == ("Late", 1, "8:40 AM", "9:30 AM")
+    assert (first.status, first.classes_attended, first["TimeIn"]) == ("Late", 1, "8:41 AM")
+    assert scan_journal.scan_outcome(out) == "TimeOut"
+
+
+def test_other_status_records_no_time_in():
+    [row] = _apply([], ("1", "Ada", "Absent", "8:40 AM"))
+    assert (row.status, row.classes_attended, row.time_in) == ("Absent", 0, None)
+
+
+# -----------------------------
+# Journal append -> replay/fold -> compaction
+# -----------------------------
+SEED_ROWS = [{"ID": f"00-{i:03d}", "Name": f"Student {i}", "Status": "", "ClassesAttended": i % 4}
+             for i in range(1, 11)]
+
+
+def _scans(seed, n=60):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        sid = f"00-{rnd.randrange(1, 16):03d}"  # some students are not on the roster yet
+        out.append((sid, f"Student {int(sid[3:])}", rnd.choice(("Present", "Late", "present", "Absent")),
+                    minutes_to_time(7 * 60 + i)))
+    return out
+
+
+def _expected(scans):
+    rows = [StudentRecord.from_row(r) for r in SEED_ROWS]
+    _apply(rows, *scans)
+    return rows
+
+
+def _seed(data_dir):
+    scan_journal.write_rows(SEED_ROWS)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_append_replay_and_compact_agree(data_dir, seed):
+    _seed(data_dir)
+    scans = _scans(seed)
+    previews = []
+    for start in range(0, len(scans), 7):
+        previews += scan_journal.append_scans(scans[start:start + 7], durable=False)
+        scan_journal.materialize()  # replayed incrementally
+    expected = _expected(scans)
+
+    assert scan_journal.materialize() == expected
+    # each append reports the row as it stood right after that scan
+    replayed = [StudentRecord.from_row(r) for r in SEED_ROWS]
+    assert previews == [_apply(replayed, scan)[0].copy() for scan in scans]
+    # a fresh reader replays the whole journal to the same state
+    scan_journal._view.reset()
+    assert scan_journal.materialize() == expected
+
+    folded = scan_journal.compact()
+    assert folded > 0 and scan_journal.pending_bytes() == 0
+    assert scan_journal.read_csv_records() == expected
+    assert scan_journal.materialize() == expected
+    assert scan_journal.compact() == 0
+
+
+def test_partial_journal_line_waits_for_its_newline(data_dir):
+    _seed(data_dir)
+    line = scan_journal.format_entry("8:05 AM", "00-001", "Student 1", "Present").encode("utf-8")
+    with scan_journal.JOURNAL_FILE.open("ab") as f:
+        f.write(line[:-6])
+    assert scan_journal.materialize()[0].time_in is None
+    with scan_journal.JOURNAL_FILE.open("ab") as f:
+        f.write(line[-6:])
+    assert scan_journal.materialize()[0]["TimeIn"] == "8:05 AM"
+
+
+def test_write_rows_keeps_scans_journaled_after_materialize(data_dir):
+    _seed(data_dir)
+    rows = scan_journal.materialize()
+    scan_journal.append_scan("00-002", "Student 2", "Present", "8:01 AM")
+    rows[0]["Name"] = "Renamed"
+    stored = scan_journal.write_rows(rows)
+    assert stored[0].name == "Renamed"
+    assert stored[1]["TimeIn"] == "8:01 AM"
+    assert scan_journal.pending_bytes() == 0
+
+
+def test_tail_reports_appended_rows_and_ignores_an_unchanged_fold(data_dir):
+    _seed(data_dir)
+    tail = scan_journal.JournalTail()
+    tail.poll()
+    scan_journal.append_scans([("00-003", "Student 3", "Present", "8:00 AM"),
+                               ("00-042", "Student 42", "Late", "8:20 AM")])
+    changed, full = tail.poll()
+    assert [r.id for r in changed] == ["00-003", "00-042"] and not full
+    scan_journal.compact()
+    assert tail.poll() == ([], False)
+
+
+def test_journal_lock_is_exclusive_and_ignores_a_stale_pid(data_dir):
+    scan_journal.LOCK_FILE.write_text("999999\n")  # left behind by a crashed process
+    errors = []
+
+    def other_holder():
+        try:
+            with scan_journal.journal_lock(timeout=0.05):
+                pass
+        except TimeoutError as e:
+            errors.append(e)
+
+    with scan_journal.journal_lock(timeout=0.5):
+        assert scan_journal.LOCK_FILE.read_text().strip() == str(os.getpid())
+        with scan_journal.journal_lock(timeout=0.05):  # the same thread joins the held lock
+            pass
+        thread = threading.Thread(target=other_holder)
+        thread.start()
+        thread.join()
+        assert len(errors) == 1
+    fd = scan_journal._open_lock_file()
+    try:
+        assert scan_journal._try_lock(fd)
+        scan_journal._unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def _fold_elsewhere():
+    """What another process's compaction does to the files (without touching this process's view)."""
+    rows = scan_journal.read_csv_records()
+    _apply(rows, *[scan_journal.parse_entry(line)[1:] + scan_journal.parse_entry(line)[:1]
+                   for line in scan_journal.JOURNAL_FILE.read_text(encoding="utf-8").splitlines()])
+    scan_journal._write_csv_atomic(rows)
+    scan_journal.JOURNAL_FILE.write_bytes(b"")
+
+
+def test_view_never_replays_the_old_journal_on_a_folded_csv(data_dir, monkeypatch):
+    _seed(data_dir)
+    scan_journal.append_scan("00-001", "Student 1", "Present", "8:00 AM")
+    assert scan_journal.materialize()[0].status == "Present"
+    # the CSV is replaced while the reader replays the journal it read before the truncate
+    real_replay = scan_journal._View._replay
+    folded = []
+
+    def replay_during_fold(view):
+        touched = real_replay(view)
+        if not folded:
+            folded.append(True)
+            _fold_elsewhere()
+        return touched
+
+    monkeypatch.setattr(scan_journal._View, "_replay", replay_during_fold)
+    scan_journal.append_scan("00-001", "Student 1", "Present", "9:00 AM")
+    rows = scan_journal.materialize()
+    assert folded
+    assert (rows[0]["TimeIn"], rows[0]["TimeOut"], rows[0].classes_attended) == ("8:00 AM", "9:00 AM", 2)
+
+
+def test_write_rows_refuses_rows_read_before_a_fold(data_dir):
+    _seed(data_dir)
+    scan_journal.append_scan("00-001", "Student 1", "Present", "8:00 AM")
+    rows = scan_journal.materialize()
+    scan_journal.append_scan("00-002", "Student 2", "Present", "8:01 AM")
+    scan_journal.compact()  # another writer folds both scans into the CSV
+    rows[2]["Name"] = "Renamed"
+    with pytest.raises(scan_journal.StaleRowsError):
+        scan_journal.write_rows(rows)
+    assert scan_journal.materialize()[1]["TimeIn"] == "8:01 AM"
+
+
+def test_fold_drops_a_torn_last_line(data_dir):
+    _seed(data_dir)
+    scan_journal.append_scan("00-001", "Student 1", "Present", "8:00 AM")
+    with scan_journal.JOURNAL_FILE.open("ab") as f:
+        f.write(b"8:01 AM\t00-0")  # a writer crashed mid-append
+    assert scan_journal.compact() > 0
+    assert [r.id for r in scan_journal.read_csv_records()] == [r["ID"] for r in SEED_ROWS]
+    assert scan_journal.pending_bytes() == 0
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core import attendance_manager
+from core.schedule import MINUTES_PER_DAY, clock_minutes, compile_schedule, format_clock
+
+SCHEDULES = [
+    ("08:00 AM", "09:00 AM", 15),
+    ("08:00 AM", "08:10 AM", 15),  # grace runs past the class end
+    ("11:50 PM", "11:59 PM", 15),  # grace wraps past midnight
+    ("12:00 AM", "01:00 AM", 0),
+    ("12:00 PM", "12:45 PM", 5),
+    ("09:30 AM", "08:00 AM", 10),  # end before start
+    ("08:00 AM", "09:00 AM", 2.5),
+    ("08:00 AM", "09:00 AM", -2.5),
+    ("08:00 AM", "09:00 AM", 1440 + 3),
+    ("08:00 AM", "09:00 AM", "15"),
+    ("08:00 AM", "09:00 AM", None),
+    ("8:00 am", " 09:00 PM ", 15),
+    ("", "09:00 AM", 15),
+    ("08:00 AM", "25:00 PM", 15),
+]
+ODD_TIMES = ["", "   ", None, "8:15 AM", "08:15AM", "08:15 am", " 08:15 AM ", "12:00 AM", "12:00 PM",
+             "00:30 AM", "13:00 PM", "8:15", "08:15 XM", "late", 495]
+
+
+def _old_parse(time_str):
+    if not time_str or not isinstance(time_str, str):
+        return None
+    try:
+        return datetime.strptime(time_str.strip(), "%I:%M %p").time()
+    except Exception:
+        return None
+
+
+def _old_determine_status(time_in, class_start_time, class_end_time, class_start_grace_minutes=5):
+    """determine_status as it was before Schedule: strptime and datetime arithmetic per call."""
+    try:
+        if not time_in or not time_in.strip():
+            return "Late"
+        time_in_parsed = _old_parse(time_in)
+        class_start_parsed = _old_parse(class_start_time)
+        class_end_parsed = _old_parse(class_end_time)
+        if not all([time_in_parsed, class_start_parsed, class_end_parsed]):
+            return "Late"
+        if time_in_parsed > class_end_parsed:
+            return "Late"
+        grace_end = datetime.combine(datetime.today(), class_start_parsed) + timedelta(minutes=class_start_grace_minutes)
+        return "Present" if time_in_parsed <= grace_end.time() else "Late"
+    except Exception:
+        return "Late"
+
+
+@pytest.mark.parametrize("start,end,grace", SCHEDULES)
+def test_status_matches_old_determine_status(start, end, grace):
+    schedule = compile_schedule(start, end, grace)
+    for minute in range(MINUTES_PER_DAY):
+        time_in = format_clock(minute)
+        expected = _old_determine_status(time_in, start, end, grace)
+        assert schedule.status(minute) == expected, time_in
+        assert schedule.status_of(time_in) == expected, time_in
+        assert attendance_manager.determine_status(time_in, start, end, grace) == expected, time_in
+    for time_in in ODD_TIMES:
+        expected = _old_determine_status(time_in, start, end, grace)
+        assert schedule.status_of(time_in) == expected, time_in
+        assert schedule.status(clock_minutes(time_in)) == expected, time_in
+
+
+def test_clock_minutes_round_trip():
+    for minute in range(MINUTES_PER_DAY):
+        assert clock_minutes(format_clock(minute)) == minute
+    assert format_clock(MINUTES_PER_DAY + 5) == "12:05 AM"
+    assert [clock_minutes(v) for v in ("12:00 AM", "12:00 PM", "11:59 PM", "8:05 am")] == [0, 720, 1439, 485]
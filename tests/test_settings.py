@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from arduino.serial_config import load_serial_config
+from core import attendance_manager, schedule
+from database import storage
+
+DASHBOARD_KEYS = {"classes_per_quarter": 18, "class_start_time": "09:30 AM", "class_duration_minutes": 50}
+
+
+@pytest.fixture
+def shared_settings(data_dir):
+    path = data_dir / "settings.json"
+    path.write_text(json.dumps({
+        "classes_per_quarter": 20,
+        "class_start_time": "08:00 AM",
+        "class_duration_minutes": 45,
+        "storage_backend": "sqlite",
+        "serial": {"baud_rate": 115200, "ports": ["door-a=/dev/ttyACM0"], "dedup_window": 4},
+    }), encoding="utf-8")
+    return path
+
+
+def test_write_settings_keeps_backend_and_serial(shared_settings, monkeypatch):
+    for env in ("RECORDSYNC_BAUD", "RECORDSYNC_DEDUP_WINDOW", "RECORDSYNC_SERIAL_PORTS"):
+        monkeypatch.delenv(env, raising=False)
+
+    attendance_manager.write_settings(DASHBOARD_KEYS)
+
+    data = json.loads(shared_settings.read_text(encoding="utf-8"))
+    assert data["storage_backend"] == "sqlite"
+    assert data["serial"] == {"baud_rate": 115200, "ports": ["door-a=/dev/ttyACM0"], "dedup_window": 4}
+    for key, value in DASHBOARD_KEYS.items():
+        assert data[key] == value
+    assert storage.configured_backend_name() == "sqlite"
+    config = load_serial_config()
+    assert config.baud_rate == 115200
+    assert config.ports == ["door-a=/dev/ttyACM0"]
+    assert config.dedup_window == 4.0
+    assert schedule.class_window() == ("09:30 AM", "10:20 AM")
+    assert not list(shared_settings.parent.glob("*.tmp"))
+
+
+def test_write_settings_creates_missing_file(data_dir):
+    attendance_manager.write_settings(DASHBOARD_KEYS)
+    assert attendance_manager.read_settings() == DASHBOARD_KEYS
+
+
+def test_dashboard_save_keeps_backend_and_serial(shared_settings):
+    pytest.importorskip("flet", minversion="0.24")
+    from dashboard.dashboard_controller import DashboardController
+
+    class _Page:
+        session = {}
+
+    controller = DashboardController(_Page())
+    controller.set_class_time("10:00 AM")
+    controller.set_class_duration_minutes(30)
+    controller.update_class_settings(22)
+
+    data = json.loads(shared_settings.read_text(encoding="utf-8"))
+    assert data["storage_backend"] == "sqlite"
+    assert data["serial"]["baud_rate"] == 115200
+    assert (data["class_start_time"], data["class_duration_minutes"], data["classes_per_quarter"]) == \
+        ("10:00 AM", 30, 22)
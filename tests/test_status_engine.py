@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from core import attendance_manager, status_engine  # noqa: E402
+from core.student_store import get_store  # noqa: E402
+from database.storage import get_backend  # noqa: E402
+from database.student_record import StudentRecord, minutes_to_time  # noqa: E402
+
+STATUSES = ("Present", "Late", "", "Absent", " Late", "Present ", "  ", "late")
+SCHEDULES = (
+    ("08:00 AM", "09:30 AM", 15),
+    ("08:00 AM", "08:10 AM", 15),  # grace runs past the class end
+    ("11:50 PM", "11:59 PM", 15),  # grace ends at 12:05 AM, past midnight
+    ("10:00 PM", "11:30 PM", 150),  # grace wraps to 12:30 AM, after the class end
+)
+
+
+def _time_in(rnd):
+    pick = rnd.random()
+    if pick < 0.1:
+        return ""
+    if pick < 0.15:
+        return rnd.choice(("soon", "25:61", "8.05am", "  "))
+    return minutes_to_time(rnd.randrange(24 * 60))
+
+
+def _roster(seed):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(400):
+        sid = f"00-{rnd.randrange(300):03d}"  # about a quarter of the IDs repeat
+        rows.append(StudentRecord.from_row({"ID": sid, "Name": f"Student {i}", "Status": rnd.choice(STATUSES),
+                                            "ClassesAttended": rnd.randrange(20), "TimeIn": _time_in(rnd)}))
+    return rows
+
+
+def _run(engine, rows, monkeypatch):
+    monkeypatch.setenv(status_engine.ENGINE_ENV, engine)
+    attendance_manager._status_fingerprints.clear()
+    get_backend().write_students(rows)
+    get_store().invalidate()
+    passes = []
+    for schedule in SCHEDULES + SCHEDULES[-1:]:
+        results = attendance_manager.update_statuses(*schedule)
+        stored = [(r.id, r.status, r.classes_attended) for r in get_store().rows()]
+        passes.append((results, stored))
+    return passes, dict(attendance_manager._status_fingerprints)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_engines_agree(data_dir, monkeypatch, seed):
+    rows = _roster(seed)
+    scalar = _run("scalar", rows, monkeypatch)
+    vector = _run("vector", rows, monkeypatch)
+    for (s_results, s_stored), (v_results, v_stored) in zip(scalar[0], vector[0]):
+        assert s_results["changed"] == v_results["changed"]
+        assert s_results["rows"] == v_results["rows"]
+        assert s_stored == v_stored
+        for key in ("updated", "checked", "skipped", "written", "errors"):
+            assert s_results[key] == v_results[key], key
+    assert scalar[1] == vector[1]
+    # rows whose ID is unique are not recomputed again under the same schedule
+    ids = [row.id for row in rows]
+    assert scalar[0][-1][0]["skipped"] >= sum(1 for sid in ids if ids.count(sid) == 1)
+
+
+def test_column_recompute_matches_schedule():
+    rnd = random.Random(7)
+    time_in = [_time_in(rnd) for _ in range(500)]
+    status = [rnd.choice(STATUSES) for _ in range(500)]
+    attended = [rnd.randrange(20) for _ in range(500)]
+    for schedule in SCHEDULES:
+        compiled = attendance_manager.compile_schedule(*schedule)
+        new_status, new_attended = status_engine.recompute(compiled, time_in, status, attended)
+        assert new_status == [compiled.status_of(t) for t in time_in]
+        assert new_attended == [a + (s.strip() not in ("Present", "Late")) for s, a in zip(status, attended)]
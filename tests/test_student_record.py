@@ -0,0 +1,41 @@
+import pickle
+
+from core.schedule import compile_schedule
+from database import storage
+from database.student_record import StudentRecord, records_from_csv_rows
+
+HEADER = ["ID", "Name", "Status", "ClassesAttended", "TimeIn", "TimeOut", "Img_Path"]
+
+
+def test_unparsable_time_in_is_kept():
+    [row] = records_from_csv_rows(HEADER, [["1", "Ada", "Late", "2", "around 8ish", " ", ""]])
+    assert row.time_in is None and row.time_out is None
+    assert row["TimeIn"] == "around 8ish"
+    assert row["TimeOut"] == ""
+    assert row == StudentRecord.from_row(row.to_row())
+    assert pickle.loads(pickle.dumps(row)) == row
+    assert row.copy().to_row() == row.to_row()
+    # no minutes: the status rules still see no TimeIn
+    assert compile_schedule("08:00 AM", "09:00 AM", 15).status(row.time_in) == "Late"
+
+
+def test_parsed_time_replaces_raw_text():
+    row = StudentRecord.from_row({"ID": "1", "TimeIn": "25:99"})
+    assert row["TimeIn"] == "25:99"
+    row["TimeIn"] = "08:05 AM"
+    assert (row.time_in, row.time_in_raw, row["TimeIn"]) == (485, "", "8:05 AM")
+    row["TimeIn"] = ""
+    assert row["TimeIn"] == ""
+
+
+def test_backends_write_unparsable_time_back_unchanged(data_dir):
+    rows = [StudentRecord.from_row({"ID": "1", "Name": "Ada", "TimeIn": "8.05am", "TimeOut": "later"}),
+            StudentRecord.from_row({"ID": "2", "Name": "Ben", "TimeIn": "8:05 AM"})]
+    for backend in (storage.CsvBackend(), storage.SqliteBackend(data_dir / "recordsync.db")):
+        backend.write_students(rows)
+        stored = backend.read_students()
+        assert [(r["TimeIn"], r["TimeOut"]) for r in stored] == [("8.05am", "later"), ("8:05 AM", "")]
+        assert stored == rows
+        if hasattr(backend, "close"):
+            backend.close()
+    assert "8.05am,later" in (data_dir / "Students_Data.csv").read_text(encoding="utf-8")
@@ -0,0 +1,55 @@
+import pytest
+
+from core.student_store import get_store
+from database.storage import get_backend
+
+
+class _Fail(Exception):
+    pass
+
+
+def _names(store):
+    return [(row.id, row.name) for row in store.rows()]
+
+
+def test_batch_commits_on_success(data_dir):
+    store = get_store()
+    with store.batch():
+        store.insert({"ID": "1", "Name": "Ada"})
+        store.record_scan("2", "Ben", "Present", "8:00 AM")
+    assert [row.id for row in get_backend().read_students()] == ["1", "2"]
+
+
+def test_failed_batch_writes_nothing_and_rolls_back(data_dir):
+    store = get_store()
+    store.insert({"ID": "1", "Name": "Ada"})
+    writes = store.writes
+    with pytest.raises(_Fail):
+        with store.batch():
+            store.update("1", {"Name": "Changed", "Status": "Late"})
+            store.insert({"ID": "2", "Name": "Ben"})
+            store.record_scan("1", "Ada", "Present", "8:00 AM")
+            raise _Fail
+    assert store.writes == writes
+    assert _names(store) == [("1", "Ada")]
+    assert store.get("1").status == ""
+    assert store.find_by_name("Changed") is None
+    assert store.find_by_name("Ada").id == "1"
+    assert [row.name for row in get_backend().read_students()] == ["Ada"]
+
+
+def test_nested_batch_rolls_back_only_its_own_changes(data_dir):
+    store = get_store()
+    store.insert({"ID": "1", "Name": "Ada"})
+    with store.batch():
+        store.update("1", {"Name": "Ann"})
+        with pytest.raises(_Fail):
+            with store.batch():
+                store.update("1", {"Name": "Zed"})
+                store.delete("1")
+                store.insert({"ID": "3", "Name": "Cy"})
+                raise _Fail
+        with store.batch():
+            store.insert({"ID": "2", "Name": "Ben"})
+    assert _names(store) == [("1", "Ann"), ("2", "Ben")]
+    assert [(row.id, row.name) for row in get_backend().read_students()] == [("1", "Ann"), ("2", "Ben")]
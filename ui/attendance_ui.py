@@ -2,7 +2,10 @@ import flet as ft
 from typing import List, Dict, Any, Callable, Optional
 import threading
 import time
-from core.attendance_manager import ATTENDANCE_CSV, sync_students_data
+from core.attendance_manager import sync_students_data, preview_statuses
+from database.changes import write_origin
+from database.storage import change_notifier, get_backend
+from utils.metrics import counter, histogram
 
 MAROON = "#7B0C0C"
 YELLOW = "#FFD400"
@@ -15,6 +18,13 @@ HEADING_ROW = MAROON
 LIGHT_BORDER = "#E0E0E0"
 SHADOW_SOFT = "#0000001A"
 
+# tags the watcher's own writes (status sync, the re-render it triggers) so its tail skips them
+WATCHER_ORIGIN = "attendance-watcher"
+
+
+def _count_ui_error(where: str) -> None:
+    counter("recordsync_ui_errors_total", "Errors caught in the attendance watcher", where=where).inc()
+
 
 def build_attendance_table(
     attendance_data: List[Dict[str, Any]],
@@ -60,19 +70,12 @@ def build_attendance_table(
     # ---------- BUILD TABLE ROWS ----------
 
     rows = []
+    rows_by_id = {}
 
     for r in attendance_data:
-        rows.append(
-            ft.DataRow(
-                cells=[
-                    ft.DataCell(ft.Text(r.get("ID", ""), color=TEXT_COLOR)),
-                    ft.DataCell(ft.Text(r.get("Name", ""), color=TEXT_COLOR)),
-                    ft.DataCell(ft.Text(r.get("Status", ""), color=TEXT_COLOR)),
-                    ft.DataCell(ft.Text(r.get("TimeIn", ""), color=TEXT_COLOR)),
-                    ft.DataCell(ft.Text(r.get("TimeOut", ""), color=TEXT_COLOR)),
-                ]
-            )
-        )
+        data_row = _build_attendance_row(r)
+        rows.append(data_row)
+        rows_by_id.setdefault(r.get("ID", ""), data_row)
 
     table = ft.DataTable(
         columns=[
@@ -163,18 +166,71 @@ def build_attendance_table(
         padding=ft.padding.symmetric(horizontal=24, vertical=12),
         bgcolor=BG,
     )
+    # lets apply_attendance_changes patch rows in place instead of rebuilding the table
+    outer.data = {"table": table, "rows_by_id": rows_by_id}
 
     return outer
 
 
+_ROW_FIELDS = ("ID", "Name", "Status", "TimeIn", "TimeOut")
+
+
+def _build_attendance_row(r: Dict[str, Any]) -> ft.DataRow:
+    return ft.DataRow(
+        cells=[
+            ft.DataCell(ft.Text(r.get(field, ""), color=TEXT_COLOR))
+            for field in _ROW_FIELDS
+        ]
+    )
+
+
+def apply_attendance_changes(attendance_view, changed_rows: List[Dict[str, Any]]) -> bool:
+    """
+    Patch a table built by build_attendance_table with changed/new rows.
+    Returns False when attendance_view is not such a table (caller should re-render).
+    """
+    state = getattr(attendance_view, "data", None)
+    if not isinstance(state, dict) or "table" not in state:
+        return False
+    table = state["table"]
+    rows_by_id = state["rows_by_id"]
+    for r in changed_rows:
+        sid = r.get("ID", "")
+        data_row = rows_by_id.get(sid)
+        if data_row is None:
+            data_row = _build_attendance_row(r)
+            table.rows.append(data_row)
+            rows_by_id[sid] = data_row
+            continue
+        for cell, field in zip(data_row.cells, _ROW_FIELDS):
+            cell.content.value = r.get(field, "")
+    return True
+
+
 # ============================================================
-# FILE WATCHER (UNCHANGED LOGIC)
+# FILE WATCHER
 # ============================================================
 
-def start_attendance_watcher(page: ft.Page, controller, on_changed_callback, poll_interval: float = 1.0):
+def start_attendance_watcher(page: ft.Page, controller, on_changed_callback, poll_interval: float = 1.0,
+                             on_rows_changed: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
     """
-    Start a background daemon thread that watches ATTENDANCE_CSV mtime and calls
-    on_changed_callback() (scheduled with page.call_from_worker) whenever the file changes.
+    Start a background daemon thread that follows the storage backend with an
+    incremental tail reader (CSV backend: only newly journaled scans are parsed).
+    The thread sleeps until the backend's change notifier (storage.change_notifier,
+    inotify where available) reports a change; poll_interval only sets how often
+    the files are stat'ed when the notifier has to fall back to polling.
+
+    - Changed rows get their statuses recomputed and stored for the current
+      class time (sync_students_data limited to those IDs, through the writer)
+      and go to on_rows_changed(rows), so the dashboard can patch just those rows.
+    - Removed rows, or no on_rows_changed, fall back to the old behaviour:
+      sync_students_data() and on_changed_callback().
+    Both callbacks are scheduled with page.call_from_worker.
+    Writes made by that sync and by on_changed_callback are tagged as the
+    watcher's own (database/changes.py), so they do not trigger it again.
+    Poll time, change-to-screen latency, polls by outcome, the watcher
+    thread's CPU time and caught errors are recorded in utils/metrics.py
+    (recordsync_ui_*); while nothing changes neither counter moves.
 
     - Ensures only one watcher per page.
     - Does not block UI thread.
@@ -186,46 +242,124 @@ def start_attendance_watcher(page: ft.Page, controller, on_changed_callback, pol
     page._attendance_watcher_stop_flag = stop_flag
     page._attendance_watcher_running = True
 
-    # initialize last mtime
+    wake = threading.Event()
+    notified = {"at": None}  # perf_counter of the first notification not yet handled
+    page._attendance_watcher_wake = wake
+
+    def _on_change():
+        if notified["at"] is None:
+            notified["at"] = time.perf_counter()
+        wake.set()
+
+    notifier = change_notifier()
+    notifier.poll_interval = min(notifier.poll_interval, poll_interval)
+    # subscribe before priming so a change in between is not missed
+    unsubscribe = notifier.subscribe(_on_change)
+
+    tail = get_backend().tail_reader(WATCHER_ORIGIN)
+    # prime with the current contents; only later changes are reported
     try:
-        last_mtime = ATTENDANCE_CSV.stat().st_mtime if ATTENDANCE_CSV.exists() else 0
-    except Exception:
-        last_mtime = 0
+        tail.poll()
+    except Exception as e:
+        print(f"Error priming attendance watcher: {e}")
+        _count_ui_error("prime")
+
+    poll_latency = histogram("recordsync_ui_poll_seconds", "Time to poll storage for attendance changes")
+    refresh_latency = {
+        kind: histogram("recordsync_ui_refresh_seconds", "File change noticed to table updated", kind=kind)
+        for kind in ("rows", "full")
+    }
+    polls = {
+        result: counter("recordsync_ui_watcher_polls_total", "Attendance watcher polls by outcome", result=result)
+        for result in ("unchanged", "rows", "full")
+    }
+    cpu_seconds = counter("recordsync_ui_watcher_cpu_seconds_total", "CPU time used by the attendance watcher thread")
+
+    def _timed(fn, kind, detected):
+        def run():
+            try:
+                with write_origin(WATCHER_ORIGIN):
+                    fn()
+            except Exception as e:
+                print(f"Error calling attendance watcher callback: {e}")
+                _count_ui_error("callback")
+            refresh_latency[kind].observe(time.perf_counter() - detected)
+        return run
+
+    def _schedule(fn):
+        try:
+            page.call_from_worker(fn)
+        except Exception:
+            _count_ui_error("schedule")
+            fn()
+
+    def _full_refresh(detected):
+        # allow core to recompute statuses if needed
+        try:
+            class_start = controller.get_class_time()
+            class_end = "03:00 PM"
+            try:
+                # use 15 minute grace for "Late"
+                with write_origin(WATCHER_ORIGIN):
+                    sync_students_data(class_start, class_end, class_start_grace_minutes=15)
+            except Exception as e:
+                print(f"Warning: sync_students_data failed in watcher: {e}")
+                _count_ui_error("sync")
+        except Exception as e:
+            print(f"Error during watcher sync: {e}")
+            _count_ui_error("sync")
+        _schedule(_timed(lambda: on_changed_callback(), "full", detected))
+
+    def _sync_rows(rows):
+        # store the new statuses for just these rows, then show what was stored
+        class_start = controller.get_class_time()
+        try:
+            with write_origin(WATCHER_ORIGIN):
+                results = sync_students_data(class_start, "03:00 PM", class_start_grace_minutes=15,
+                                             student_ids=[row.id for row in rows])
+        except Exception as e:
+            results = {"errors": [str(e)]}
+        if results.get("errors"):
+            print(f"Warning: sync_students_data failed in watcher: {results['errors'][0]}")
+            _count_ui_error("sync")
+            preview_statuses(rows, class_start, "03:00 PM", class_start_grace_minutes=15)
+            return
+        stored = {r["ID"]: r for r in results.get("rows", [])}
+        for row in rows:
+            if row.id in stored:
+                row.update(stored[row.id])
 
     def _watcher():
-        nonlocal last_mtime
         try:
             while not stop_flag["stop"]:
+                wake.wait()
+                wake.clear()
+                if stop_flag["stop"]:
+                    break
                 try:
-                    if ATTENDANCE_CSV.exists():
-                        current_mtime = ATTENDANCE_CSV.stat().st_mtime
-                        if current_mtime > last_mtime:
-                            last_mtime = current_mtime
-                            # allow core to recompute statuses if needed
-                            try:
-                                class_start = controller.get_class_time()
-                                class_end = "03:00 PM"
-                                try:
-                                    # use 15 minute grace for "Late"
-                                    sync_students_data(class_start, class_end, class_start_grace_minutes=15)
-                                except Exception as e:
-                                    print(f"Warning: sync_students_data failed in watcher: {e}")
-                            except Exception as e:
-                                print(f"Error during watcher sync: {e}")
-
-                            # Schedule UI update on main thread
-                            try:
-                                page.call_from_worker(lambda: on_changed_callback())
-                            except Exception:
-                                try:
-                                    on_changed_callback()
-                                except Exception as e:
-                                    print(f"Error calling on_changed_callback: {e}")
-                    time.sleep(poll_interval)
+                    cpu_started = time.thread_time()
+                    started = time.perf_counter()
+                    detected = notified["at"] or started
+                    notified["at"] = None
+                    changed, full_reload = tail.poll()
+                    poll_latency.observe(time.perf_counter() - started)
+                    if full_reload or (changed and on_rows_changed is None):
+                        polls["full"].inc()
+                        _full_refresh(detected)
+                    elif changed:
+                        polls["rows"].inc()
+                        _sync_rows(changed)
+                        _schedule(_timed(lambda rows=changed: on_rows_changed(rows), "rows", detected))
+                    else:
+                        polls["unchanged"].inc()
+                    cpu_seconds.inc(time.thread_time() - cpu_started)
                 except Exception as e:
                     print(f"Attendance watcher loop error: {e}")
+                    _count_ui_error("loop")
                     time.sleep(1)
+                    wake.set()  # try again
         finally:
+            unsubscribe()
             page._attendance_watcher_running = False
 
     t = threading.Thread(target=_watcher, daemon=True, name="attendance-watcher")
@@ -240,6 +374,11 @@ def stop_attendance_watcher(page: ft.Page):
     if stop_flag:
         stop_flag["stop"] = True
 
+    wake = getattr(page, "_attendance_watcher_wake", None)
+
+    if wake:
+        wake.set()
+
     thr = getattr(page, "_attendance_watcher_thread", None)
 
     if thr and thr.is_alive():
@@ -0,0 +1,190 @@
+import os
+import select
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from database import changes
+from utils import inotify
+from utils.metrics import counter
+
+# -----------------------------
+# File change notifier
+# -----------------------------
+# Tells subscribers that one of a set of files changed, without each of them
+# polling. One background thread per notifier:
+#   - Linux: inotify watches on the files' directories (so atomic replaces and
+#     files created later are seen); the thread sleeps in select() and does no
+#     work at all while nothing changes
+#   - elsewhere, or when inotify cannot be used: the files are stat'ed every
+#     poll_interval seconds
+# A burst of events (journal append + fsync, CSV written to a temp file and
+# renamed, a sqlite commit) is delivered as one notification once the files
+# have been quiet for DEBOUNCE_SECONDS, or MAX_DELAY_SECONDS after the first
+# event at the latest. Subscribers are called on the notifier thread and
+# should only hand the work off (set an Event, schedule a callback).
+
+DEBOUNCE_SECONDS = 0.02
+MAX_DELAY_SECONDS = 0.05
+POLL_SECONDS = 1.0
+
+_WATCH_MASK = (inotify.IN_MODIFY | inotify.IN_ATTRIB | inotify.IN_CLOSE_WRITE | inotify.IN_CREATE
+               | inotify.IN_DELETE | inotify.IN_MOVED_TO | inotify.IN_MOVED_FROM
+               | inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF | inotify.IN_ONLYDIR)
+
+
+class FileNotifier:
+    """Calls every subscriber (with no arguments) after any of `paths` changes."""
+
+    def __init__(self, paths: Iterable[Path], poll_interval: float = POLL_SECONDS,
+                 debounce: float = DEBOUNCE_SECONDS, max_delay: float = MAX_DELAY_SECONDS):
+        self.paths = [Path(p) for p in paths]
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.mode = "stopped"
+        self._subscribers: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._names: Dict[str, Set[str]] = {}  # watched directory -> file names in it
+        for p in self.paths:
+            self._names.setdefault(str(p.parent), set()).add(p.name)
+        self._inotify: Optional[inotify.Inotify] = None
+        self._wake_r, self._wake_w = -1, -1
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -----------------------------
+    # Subscribers
+    # -----------------------------
+    def subscribe(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Register callback and start the notifier if needed; returns a function that unsubscribes."""
+        with self._lock:
+            self._subscribers.append(callback)
+        self.start()
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _notify(self) -> None:
+        counter("recordsync_file_notifications_total", "Debounced file change notifications",
+                mode=self.mode).inc()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in file change subscriber: {e}")
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._inotify = inotify.open_inotify()
+            if self._inotify is not None and not self._add_watches():
+                self._inotify.close()
+                self._inotify = None
+            if self._inotify is not None:
+                self.mode = "inotify"
+                self._wake_r, self._wake_w = os.pipe()
+                target = self._run_inotify
+            else:
+                self.mode = "poll"
+                target = self._run_polling
+            self._thread = threading.Thread(target=target, name="file-notifier", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopping.set()
+        if self._wake_w >= 0:
+            os.write(self._wake_w, b"x")
+        thread.join(2.0)
+        for fd in (self._wake_r, self._wake_w):
+            if fd >= 0:
+                os.close(fd)
+        self._wake_r, self._wake_w = -1, -1
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self.mode = "stopped"
+
+    # -----------------------------
+    # inotify
+    # -----------------------------
+    def _add_watches(self) -> bool:
+        watched = set(self._inotify.watched())
+        for directory in self._names:
+            if directory in watched:
+                continue
+            try:
+                self._inotify.add_watch(directory, _WATCH_MASK)
+            except OSError as e:
+                print(f"Cannot watch {directory}: {e}")
+                return False
+        return True
+
+    def _relevant(self, events) -> bool:
+        for directory, mask, name in events:
+            if mask & (inotify.IN_Q_OVERFLOW | inotify.IN_IGNORED | inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF):
+                return True  # lost events or the directory itself went away: assume a change
+            if name in self._names.get(directory, ()):
+                return True
+        return False
+
+    def _run_inotify(self) -> None:
+        fd = self._inotify.fileno()
+        first = None  # time of the first event of the current burst
+        last = None
+        while not self._stopping.is_set():
+            if first is None:
+                timeout = None  # idle: sleep until something happens
+            else:
+                timeout = max(0.0, min(last + self.debounce, first + self.max_delay) - time.monotonic())
+            try:
+                ready, _, _ = select.select([fd, self._wake_r], [], [], timeout)
+            except OSError:
+                break
+            if self._stopping.is_set():
+                break
+            if fd in ready:
+                try:
+                    events = self._inotify.read_events()
+                except OSError as e:
+                    print(f"Error reading file change events: {e}")
+                    events = []
+                if self._relevant(events):
+                    last = time.monotonic()
+                    first = first if first is not None else last
+                if any(mask & inotify.IN_IGNORED for _, mask, _ in events) and not self._add_watches():
+                    # directory gone and not back yet: keep going by polling
+                    self.mode = "poll"
+                    self._notify()
+                    self._run_polling()
+                    return
+            if first is not None and time.monotonic() >= min(last + self.debounce, first + self.max_delay):
+                first = last = None
+                self._notify()
+
+    # -----------------------------
+    # Polling fallback
+    # -----------------------------
+    def _run_polling(self) -> None:
+        sig = changes.file_signature(self.paths)
+        while not self._stopping.wait(self.poll_interval):
+            current = changes.file_signature(self.paths)
+            if current != sig:
+                sig = current
+                self._notify()
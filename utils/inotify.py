@@ -0,0 +1,134 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# -----------------------------
+# Minimal inotify binding (Linux, via ctypes)
+# -----------------------------
+# Just enough to wait for files and directories to change without polling:
+# the descriptor can be registered with an asyncio loop (loop.add_reader) or
+# a selector, and read_events() drains whatever is queued. Callers fall back
+# to polling when available() is False (other platforms, no libc symbols,
+# watch limit reached).
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows, NUL padded)
+_READ_SIZE = 64 * 1024
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        name = ctypes.util.find_library("c") or "libc.so.6"
+        libc = ctypes.CDLL(name, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+
+def available() -> bool:
+    """True when inotify can be used on this system."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        _load_libc()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+class Inotify:
+    """One inotify instance; watch paths with add_watch() and drain with read_events()."""
+
+    def __init__(self):
+        libc = _load_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+        self._paths: Dict[int, str] = {}  # watch descriptor -> watched path
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = _load_libc().inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self._paths[wd] = str(path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        if self._paths.pop(wd, None) is not None:
+            _load_libc().inotify_rm_watch(self.fd, wd)
+
+    def watched(self) -> List[str]:
+        return list(self._paths.values())
+
+    def read_events(self) -> List[Tuple[str, int, str]]:
+        """Queued events as (watched path, mask, name); [] when nothing is pending."""
+        events: List[Tuple[str, int, str]] = []
+        while True:
+            try:
+                data = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                return events
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            if not data:
+                return events
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, pos)
+                pos += _EVENT.size
+                name = data[pos:pos + length].rstrip(b"\0").decode(errors="replace")
+                pos += length
+                if mask & IN_IGNORED:
+                    path = self._paths.pop(wd, "")  # watch removed (path deleted or rm_watch)
+                else:
+                    path = self._paths.get(wd, "")
+                events.append((path, mask, name))
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+            self._paths.clear()
+
+
+def open_inotify() -> Optional[Inotify]:
+    """An Inotify instance, or None when the platform (or a resource limit) does not allow one."""
+    if not available():
+        return None
+    try:
+        return Inotify()
+    except OSError as e:
+        print(f"inotify unavailable, falling back to polling: {e}")
+        return None
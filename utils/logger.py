@@ -0,0 +1,79 @@
+import io
+import logging
+import os
+import sys
+from typing import Optional
+
+# -----------------------------
+# Application logging
+# -----------------------------
+# Every RecordSync logger hangs off the "recordsync" logger, which writes
+# "time level name: message" lines to stderr. RECORDSYNC_LOG_LEVEL (DEBUG,
+# INFO, ...) sets the level; the default is INFO.
+#
+# Background workers that still report with print() (the serial loop) can be
+# pointed at a logger with PrintToLogger, so their output ends up in the same
+# place as everything else and can be forwarded from a child process.
+
+ROOT_LOGGER = "recordsync"
+LOG_LEVEL_ENV = "RECORDSYNC_LOG_LEVEL"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_configured = False
+
+
+def configure(handler: Optional[logging.Handler] = None) -> logging.Logger:
+    """
+    Set up the "recordsync" logger once (a stderr handler unless `handler` is
+    given). Passing a handler later replaces the existing ones, e.g. to send
+    records to a parent process.
+    """
+    global _configured
+    root = logging.getLogger(ROOT_LOGGER)
+    if _configured and handler is None:
+        return root
+    level = os.environ.get(LOG_LEVEL_ENV, "INFO").upper()
+    root.setLevel(getattr(logging, level, logging.INFO))
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    if handler is None:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    root.propagate = False
+    _configured = True
+    return root
+
+
+def get_logger(name: str) -> logging.Logger:
+    """A "recordsync.<name>" logger, configuring logging on first use."""
+    configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class PrintToLogger(io.TextIOBase):
+    """
+    File-like object that logs each complete line written to it, so
+    sys.stdout = PrintToLogger(log) turns print() output into log records.
+    """
+
+    def __init__(self, logger: logging.Logger, level: int = logging.INFO):
+        self.logger = logger
+        self.level = level
+        self._pending = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._pending += text
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            if line.strip():
+                self.logger.log(self.level, line.rstrip())
+        return len(text)
+
+    def flush(self) -> None:
+        if self._pending.strip():
+            self.logger.log(self.level, self._pending.rstrip())
+        self._pending = ""
@@ -0,0 +1,468 @@
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# -----------------------------
+# Metrics
+# -----------------------------
+# A small in-process registry for the hot paths (frame parsing, dedup,
+# persistence, UI refresh):
+#   - Counter / Gauge: one add or assignment per sample
+#   - HdrHistogram: log-linear buckets (about 1.6% precision, fixed memory),
+#     one bucket increment per sample; percentiles cover the whole lifetime
+#
+# Recording takes no lock (a lock would double the cost of a sample). Each
+# metric is meant to be updated from one thread, as the ingest loop does; one
+# updated from several threads may rarely lose a count, which is acceptable
+# for metrics. Reading copies the counts and is always safe.
+#   - collectors: objects that already keep their own counters (the ingest
+#     pipeline, the dedup filter) are read only when metrics are collected,
+#     so they pay nothing per scan
+#
+# MetricsExporter serves the registry in Prometheus text format on
+# http://127.0.0.1:<port>/metrics (JSON on /metrics.json) and writes a JSON
+# snapshot file every few seconds:
+#   RECORDSYNC_METRICS_PORT      default 9464, 0 = no HTTP endpoint
+#   RECORDSYNC_METRICS_FILE      default database/metrics.json, "" = no file
+#   RECORDSYNC_METRICS_INTERVAL  seconds between snapshot files, default 15
+
+METRICS_PORT = 9464
+METRICS_FILE = Path(__file__).resolve().parent.parent / "database" / "metrics.json"
+METRICS_INTERVAL_SECONDS = 15.0
+METRICS_PORT_ENV = "RECORDSYNC_METRICS_PORT"
+METRICS_FILE_ENV = "RECORDSYNC_METRICS_FILE"
+METRICS_INTERVAL_ENV = "RECORDSYNC_METRICS_INTERVAL"
+
+# Prometheus bucket bounds ("le") for exported histograms
+LATENCY_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+_SUB_BITS = 7  # values below 2**7 get exact buckets; above, 64 buckets per power of two
+_SUB = 1 << _SUB_BITS
+_HALF = _SUB >> 1
+
+
+class HdrHistogram:
+    """
+    Log-linear histogram over the whole lifetime, HdrHistogram style: values
+    are recorded as integers of 1/scale units (scale=1e6: microseconds) into
+    buckets that are exact below 128 units and 1/64 of a power of two wide
+    above. observe() is one bucket increment; memory is fixed by max_value.
+    snapshot() gives count, avg, min, p50/p95/p99 and max in plain units.
+    """
+
+    def __init__(self, scale: float = 1e6, max_value: float = 3600.0,
+                 bounds: Sequence[float] = LATENCY_BOUNDS):
+        self.scale = scale
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (self._index(int(max_value * scale)) + 1)
+        self._last = len(self._counts) - 1
+        self.total = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    @staticmethod
+    def _index(units: int) -> int:
+        if units < _SUB:
+            return units if units > 0 else 0
+        shift = units.bit_length() - _SUB_BITS
+        return _HALF * shift + (units >> shift)
+
+    @staticmethod
+    def _bucket_range(idx: int) -> Tuple[int, int]:
+        """Lowest and highest unit value that lands in bucket idx."""
+        if idx < _SUB:
+            return idx, idx
+        shift = idx // _HALF - 1
+        mantissa = idx - _HALF * shift
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def observe(self, value: float) -> None:
+        # _index() inlined: this runs once per scan
+        units = int(value * self.scale)
+        if units < _SUB:
+            idx = units if units > 0 else 0
+        else:
+            shift = units.bit_length() - _SUB_BITS
+            idx = _HALF * shift + (units >> shift)
+            if idx > self._last:
+                idx = self._last
+        self._counts[idx] += 1
+        self.total += value
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def min(self) -> float:
+        return self._min if self._min != math.inf else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._max if self._max != -math.inf else 0.0
+
+    def _quantiles(self, counts: List[int], pcts: Sequence[float]) -> List[float]:
+        """Values at each percentile in pcts (ascending), in one pass over a copy of the counts."""
+        total = sum(counts)
+        if not total:
+            return [0.0] * len(pcts)
+        ranks = [max(1, math.ceil(pct / 100.0 * total)) for pct in pcts]
+        out: List[float] = []
+        seen = 0
+        for idx, n in enumerate(counts):
+            if not n:
+                continue
+            seen += n
+            while len(out) < len(ranks) and seen >= ranks[len(out)]:
+                value = self._bucket_range(idx)[1] / self.scale
+                out.append(min(max(value, self.min), self.max))
+            if len(out) == len(ranks):
+                break
+        return out + [self.max] * (len(ranks) - len(out))
+
+    def percentile(self, pct: float) -> float:
+        return self._quantiles(list(self._counts), [pct])[0]
+
+    def buckets(self, counts: Optional[List[int]] = None) -> List[Tuple[float, int]]:
+        """Cumulative counts for each of self.bounds (a bucket counts once its lowest value is <= le)."""
+        if counts is None:
+            counts = list(self._counts)
+        out: List[Tuple[float, int]] = []
+        seen = 0
+        bounds = iter(self.bounds)
+        le = next(bounds, None)
+        for idx, n in enumerate(counts):
+            if not n:
+                continue
+            low = self._bucket_range(idx)[0] / self.scale
+            while le is not None and low > le:
+                out.append((le, seen))
+                le = next(bounds, None)
+            seen += n
+        while le is not None:
+            out.append((le, seen))
+            le = next(bounds, None)
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        counts = list(self._counts)
+        count = sum(counts)
+        p50, p95, p99 = self._quantiles(counts, (50, 95, 99))
+        return {
+            "count": count,
+            "avg": (self.total / count) if count else 0.0,
+            "min": self.min,
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "max": self.max,
+        }
+
+    def sample(self, **labels: str) -> Dict[str, Any]:
+        """This histogram as a snapshot sample (quantiles plus Prometheus buckets)."""
+        counts = list(self._counts)
+        count = sum(counts)
+        p50, p90, p95, p99, p999 = self._quantiles(counts, (50, 90, 95, 99, 99.9))
+        return {
+            "labels": labels,
+            "count": count,
+            "sum": self.total,
+            "avg": (self.total / count) if count else 0.0,
+            "min": self.min,
+            "p50": p50,
+            "p90": p90,
+            "p95": p95,
+            "p99": p99,
+            "p999": p999,
+            "max": self.max,
+            "buckets": [[le, n] for le, n in self.buckets(counts)],
+        }
+
+
+class Counter:
+    """Monotonic count."""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Value that goes up and down; set_function() makes it read a callback at collection time."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._fn = fn
+
+    @property
+    def value(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return float("nan")
+        return self._value
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+def family(kind: str, help_text: str, samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One metric family in snapshot form (what collectors return, keyed by metric name)."""
+    return {"type": kind, "help": help_text, "samples": samples}
+
+
+def sample(value: float, **labels: str) -> Dict[str, Any]:
+    return {"labels": labels, "value": value}
+
+
+class MetricsRegistry:
+    """
+    Named metrics plus collectors. counter()/gauge()/histogram() return the
+    existing metric for a name and label set, so call sites can look theirs
+    up once and keep it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> (type, help, {sorted label items: metric})
+        self._families: Dict[str, Tuple[str, str, Dict[tuple, Any]]] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Dict[str, Any]]]] = {}
+
+    def _get(self, kind: str, name: str, help_text: str, labels: Dict[str, str], factory: Callable[[], Any]):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            fam = self._families.get(name)
+            if fam is None:
+                fam = self._families[name] = (kind, help_text, {})
+            elif fam[0] != kind:
+                raise ValueError(f"metric {name} is a {fam[0]}, not a {kind}")
+            metric = fam[2].get(key)
+            if metric is None:
+                metric = fam[2][key] = factory()
+            return metric
+
+    def counter(self, name: str, help_text: str = "", **labels: str) -> Counter:
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name: str, help_text: str = "", **labels: str) -> Gauge:
+        return self._get("gauge", name, help_text, labels, Gauge)
+
+    def histogram(self, name: str, help_text: str = "", scale: float = 1e6,
+                  bounds: Sequence[float] = LATENCY_BOUNDS, **labels: str) -> HdrHistogram:
+        return self._get("histogram", name, help_text, labels, lambda: HdrHistogram(scale, bounds=bounds))
+
+    def register_collector(self, key: str, fn: Callable[[], Dict[str, Dict[str, Any]]]) -> None:
+        """fn() -> {metric name: family(...)}; registering the same key again replaces it."""
+        with self._lock:
+            self._collectors[key] = fn
+
+    def unregister_collector(self, key: str) -> None:
+        with self._lock:
+            self._collectors.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Every metric as {name: {"type", "help", "samples": [...]}} (JSON-serializable)."""
+        with self._lock:
+            families = [(name, kind, help_text, list(metrics.items()))
+                        for name, (kind, help_text, metrics) in self._families.items()]
+            collectors = list(self._collectors.items())
+        out: Dict[str, Dict[str, Any]] = {}
+        for name, kind, help_text, metrics in families:
+            samples = []
+            for key, metric in metrics:
+                labels = dict(key)
+                samples.append(metric.sample(**labels) if kind == "histogram" else sample(metric.value, **labels))
+            out[name] = family(kind, help_text, samples)
+        for key, fn in collectors:
+            try:
+                collected = fn() or {}
+            except Exception as e:
+                print(f"Error collecting metrics from {key}: {e}")
+                continue
+            merge_snapshot(out, collected)
+        return out
+
+    def prometheus_text(self) -> str:
+        return render_prometheus(self.snapshot())
+
+
+def merge_snapshot(into: Dict[str, Dict[str, Any]], other: Dict[str, Dict[str, Any]]) -> None:
+    """Add the families of one snapshot to another (samples of the same metric are combined)."""
+    for name, fam in other.items():
+        if name in into:
+            into[name]["samples"] = into[name]["samples"] + list(fam.get("samples", []))
+        else:
+            into[name] = family(fam.get("type", "untyped"), fam.get("help", ""), list(fam.get("samples", [])))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(labels: Dict[str, Any], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _number(value: Any) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+def render_prometheus(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    """A snapshot in the Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    for name in sorted(snapshot):
+        fam = snapshot[name]
+        kind = fam.get("type", "untyped")
+        if fam.get("help"):
+            lines.append(f"# HELP {name} {fam['help']}")
+        lines.append(f"# TYPE {name} {kind}")
+        for s in fam.get("samples", []):
+            labels = s.get("labels", {})
+            if kind != "histogram":
+                lines.append(f"{name}{_labels_text(labels)} {_number(s.get('value', 0))}")
+                continue
+            for le, n in s.get("buckets", []):
+                lines.append(f"{name}_bucket{_labels_text(labels, ('le', _number(le)))} {_number(n)}")
+            lines.append(f"{name}_bucket{_labels_text(labels, ('le', '+Inf'))} {_number(s.get('count', 0))}")
+            lines.append(f"{name}_sum{_labels_text(labels)} {_number(s.get('sum', 0))}")
+            lines.append(f"{name}_count{_labels_text(labels)} {_number(s.get('count', 0))}")
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, help_text: str = "", **labels: str) -> Counter:
+    return REGISTRY.counter(name, help_text, **labels)
+
+
+def gauge(name: str, help_text: str = "", **labels: str) -> Gauge:
+    return REGISTRY.gauge(name, help_text, **labels)
+
+
+def histogram(name: str, help_text: str = "", scale: float = 1e6,
+              bounds: Sequence[float] = LATENCY_BOUNDS, **labels: str) -> HdrHistogram:
+    return REGISTRY.histogram(name, help_text, scale, bounds, **labels)
+
+
+# -----------------------------
+# Exposition
+# -----------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        registry: MetricsRegistry = self.server.registry
+        path = self.path.split("?", 1)[0]
+        try:
+            if path in ("/", "/metrics"):
+                body = registry.prometheus_text().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body = json.dumps({"time": time.time(), "metrics": registry.snapshot()}).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # scrapes would flood the console
+
+
+class MetricsExporter:
+    """
+    Publishes a registry over HTTP (127.0.0.1 only) and as a JSON snapshot
+    file; settings default to the RECORDSYNC_METRICS_* environment variables.
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, port: Optional[int] = None,
+                 path: Optional[str] = None, interval: Optional[float] = None):
+        self.registry = registry
+        self.port = port if port is not None else int(os.environ.get(METRICS_PORT_ENV, METRICS_PORT))
+        if path is None:
+            path = os.environ.get(METRICS_FILE_ENV, str(METRICS_FILE))
+        self.path = Path(path) if path else None
+        self.interval = interval if interval is not None else \
+            float(os.environ.get(METRICS_INTERVAL_ENV, METRICS_INTERVAL_SECONDS))
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.port:
+            try:
+                self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _MetricsHandler)
+                self._server.daemon_threads = True
+                self._server.registry = self.registry
+                threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+                print(f"Metrics on http://127.0.0.1:{self.port}/metrics")
+            except OSError as e:
+                print(f"Cannot serve metrics on port {self.port}: {e}")
+                self._server = None
+        if self.path is not None:
+            self._writer = threading.Thread(target=self._write_loop, name="metrics-snapshot", daemon=True)
+            self._writer.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(2.0)
+            self.write_snapshot()  # final numbers
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def write_snapshot(self) -> None:
+        """Write the registry to self.path atomically (readers never see a half-written file)."""
+        if self.path is None:
+            return
+        try:
+            data = json.dumps({"time": time.time(), "metrics": self.registry.snapshot()}, indent=1)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"Error writing metrics snapshot: {e}")
+
+    def _write_loop(self) -> None:
+        while not self._stop.wait(max(0.5, self.interval)):
+            self.write_snapshot()